@@ -0,0 +1,249 @@
+"""
+Admission control.
+
+Without a limit, a burst of requests is accepted all at once and every
+request queues on the MongoDB connection pool, so latency grows for
+everyone until clients time out and retry. ``AdmissionMiddleware`` caps
+the requests in progress per route pool and gives each pool a bounded
+FIFO wait queue:
+
+- ``scoring``: ``POST /calculate-score`` and its batch and statement forms
+- ``lists``: ``GET /users``, which pages (or streams) many users
+- ``reads``: ``GET /user/{id}`` (and its ``/users`` router forms) and
+  ``GET /stats``, kept apart so they never wait behind list pages
+- ``default``: every other route
+
+A request that finds its pool's queue full, or waits in it longer than
+``ADMISSION_QUEUE_TIMEOUT_MS``, is rejected immediately with ``503`` and a
+``Retry-After`` header instead of adding to the backlog. ``/health``,
+``/metrics`` and ``/`` are never queued, so probes and scrapes still
+answer while the API is shedding load.
+
+Limits are per worker process. Queue depth, requests in progress, wait
+times and rejections are exported by ``/metrics`` and summarized by
+``/health``.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Sequence, Tuple
+
+import orjson
+
+from app.metrics import ADMISSION_ACTIVE, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, ADMISSION_WAIT
+
+# Admission settings; limits are requests in progress per worker
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() in ("1", "true", "yes")
+ADMISSION_SCORING_LIMIT = int(os.getenv("ADMISSION_SCORING_LIMIT", "64"))
+ADMISSION_SCORING_QUEUE = int(os.getenv("ADMISSION_SCORING_QUEUE", "128"))
+ADMISSION_LISTS_LIMIT = int(os.getenv("ADMISSION_LISTS_LIMIT", "16"))
+ADMISSION_LISTS_QUEUE = int(os.getenv("ADMISSION_LISTS_QUEUE", "32"))
+ADMISSION_READS_LIMIT = int(os.getenv("ADMISSION_READS_LIMIT", "32"))
+ADMISSION_READS_QUEUE = int(os.getenv("ADMISSION_READS_QUEUE", "64"))
+ADMISSION_DEFAULT_LIMIT = int(os.getenv("ADMISSION_DEFAULT_LIMIT", "16"))
+ADMISSION_DEFAULT_QUEUE = int(os.getenv("ADMISSION_DEFAULT_QUEUE", "32"))
+ADMISSION_QUEUE_TIMEOUT_MS = int(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "2000"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+
+# Paths that bypass admission control
+EXEMPT_PATHS = frozenset({"/", "/health", "/metrics"})
+
+# (method, path) -> pool, checked before the prefixes
+EXACT_ROUTE_POOLS: Dict[Tuple[str, str], str] = {
+    ("GET", "/users"): "lists",
+    ("GET", "/users/"): "lists",
+}
+# (method, path prefixes, pool), first match wins; unmatched requests use "default"
+PREFIX_ROUTE_POOLS: Sequence[Tuple[str, Tuple[str, ...], str]] = (
+    ("POST", ("/calculate-score", "/credit/calculate-score"), "scoring"),
+    ("GET", ("/users/", "/user/", "/stats"), "reads"),
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; ``reason`` is queue_full or timeout"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionPool:
+    """
+    A concurrency limit with a bounded FIFO wait queue.
+
+    A released slot is handed directly to the oldest waiter, so queued
+    requests are admitted in arrival order and new arrivals cannot jump
+    the queue.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        if limit < 1:
+            raise ValueError(f"Admission limit for {name} must be at least 1")
+
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        """
+        Wait for a slot.
+
+        Raises:
+            AdmissionRejected: if the queue is full or the wait times out
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._admit(0.0)
+            return
+        if len(self._waiters) >= self.queue_size:
+            self._reject("queue_full")
+
+        start = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.labels(self.name).set(len(self._waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over as the wait ended; pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            ADMISSION_QUEUE_DEPTH.labels(self.name).set(len(self._waiters))
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            self._reject("timeout")
+        self._admit(time.perf_counter() - start)
+
+    def release(self):
+        """Free a slot, handing it to the oldest waiter if there is one"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                ADMISSION_QUEUE_DEPTH.labels(self.name).set(len(self._waiters))
+                return
+        self.active -= 1
+        ADMISSION_QUEUE_DEPTH.labels(self.name).set(0)
+        ADMISSION_ACTIVE.labels(self.name).set(self.active)
+
+    def _admit(self, waited: float):
+        self.admitted += 1
+        ADMISSION_ACTIVE.labels(self.name).set(self.active)
+        ADMISSION_WAIT.labels(self.name).observe(waited)
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        ADMISSION_REJECTED.labels(self.name, reason).inc()
+        raise AdmissionRejected(reason)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "queue_size": self.queue_size,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+def create_pools(queue_timeout_ms: int = ADMISSION_QUEUE_TIMEOUT_MS) -> Dict[str, AdmissionPool]:
+    """The route pools configured by the ADMISSION_* settings"""
+    timeout = queue_timeout_ms / 1000
+    return {
+        "scoring": AdmissionPool("scoring", ADMISSION_SCORING_LIMIT, ADMISSION_SCORING_QUEUE, timeout),
+        "lists": AdmissionPool("lists", ADMISSION_LISTS_LIMIT, ADMISSION_LISTS_QUEUE, timeout),
+        "reads": AdmissionPool("reads", ADMISSION_READS_LIMIT, ADMISSION_READS_QUEUE, timeout),
+        "default": AdmissionPool("default", ADMISSION_DEFAULT_LIMIT, ADMISSION_DEFAULT_QUEUE, timeout),
+    }
+
+
+def route_pool(method: str, path: str) -> Optional[str]:
+    """Name of the pool admitting a request, or None if it bypasses admission"""
+    if path in EXEMPT_PATHS:
+        return None
+    pool = EXACT_ROUTE_POOLS.get((method, path))
+    if pool is not None:
+        return pool
+    for pool_method, prefixes, pool in PREFIX_ROUTE_POOLS:
+        if method == pool_method and path.startswith(prefixes):
+            return pool
+    return "default"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware admitting HTTP requests through per-route pools"""
+
+    def __init__(
+        self,
+        app,
+        pools: Optional[Dict[str, AdmissionPool]] = None,
+        retry_after: int = ADMISSION_RETRY_AFTER_SECONDS
+    ):
+        global _pools
+
+        self.app = app
+        self.pools = pools if pools is not None else create_pools()
+        self.retry_after = retry_after
+        _pools = self.pools
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        name = route_pool(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        pool = self.pools[name]
+        try:
+            await pool.acquire()
+        except AdmissionRejected as exc:
+            await self._reject(send, exc.reason)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release()
+
+    async def _reject(self, send, reason: str):
+        detail = "Server is busy, retry later" if reason == "queue_full" else "Timed out waiting to be served"
+        body = orjson.dumps({"detail": detail})
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# Pools of the installed middleware, for /health
+_pools: Optional[Dict[str, AdmissionPool]] = None
+
+
+def admission_stats() -> Optional[Dict[str, Dict[str, Any]]]:
+    """Per-pool admission counters, or None if admission control is off"""
+    if _pools is None:
+        return None
+    return {name: pool.stats() for name, pool in _pools.items()}
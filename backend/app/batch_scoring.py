@@ -0,0 +1,105 @@
+"""
+Vectorized Digital Trust Score engine.
+
+Scores many applicants in a single NumPy pass. The rules mirror
+``app.scoring.calculate_digital_trust_score`` exactly; only the evaluation
+strategy differs (columnar arrays instead of one applicant at a time).
+"""
+
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy as np
+
+from app.explanations import RULE_CODE_OFFSETS
+from app.scoring import RISK_CATEGORIES, RULE_EXPLANATIONS
+
+# Points awarded per rule bucket, in the same order as RULE_EXPLANATIONS
+_RULE_POINTS = (
+    np.array([25, 0], dtype=np.int16),        # income stability
+    np.array([0, 10, 20], dtype=np.int16),    # UPI activity
+    np.array([0, 10, 20], dtype=np.int16),    # bill payments
+    np.array([0, 15, 25], dtype=np.int16),    # work duration
+    np.array([0, 0, -10], dtype=np.int16),    # cash withdrawals
+    np.array([0, 0, 0], dtype=np.int16),      # income level (explanation only)
+)
+
+
+@dataclass
+class BatchScoreResult:
+    """Columnar output of ``score_batch``"""
+    scores: np.ndarray              # (n,) int - Digital Trust Score 0-100
+    risk_indices: np.ndarray        # (n,) int - index into RISK_CATEGORIES
+    explanation_indices: np.ndarray  # (n, 6) int - bucket per rule
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def risk_category(self, row: int) -> str:
+        """Risk category label for one row"""
+        return RISK_CATEGORIES[self.risk_indices[row]]
+
+    def explanations(self, row: int) -> List[str]:
+        """Explanation strings for one row, in rule order"""
+        return [
+            messages[bucket]
+            for messages, bucket in zip(RULE_EXPLANATIONS, self.explanation_indices[row].tolist())
+        ]
+
+    def explanation_codes(self, row: int) -> List[int]:
+        """Explanation catalog codes for one row (see ``app.explanations``)"""
+        return [offset + bucket for offset, bucket in zip(RULE_CODE_OFFSETS, self.explanation_indices[row].tolist())]
+
+
+def score_batch(
+    avg_income: Sequence[float],
+    income_variance: Sequence[float],
+    upi_txn_count: Sequence[int],
+    bill_payment_score: Sequence[int],
+    withdrawal_ratio: Sequence[float],
+    months_active: Sequence[int]
+) -> BatchScoreResult:
+    """
+    Calculate Digital Trust Scores for a batch of applicants.
+
+    All arguments are equal-length columns (lists or NumPy arrays), one
+    entry per applicant.
+
+    Returns:
+        BatchScoreResult with scores, risk category indices and per-rule
+        explanation indices
+    """
+    avg_income = np.asarray(avg_income, dtype=np.float64)
+    income_variance = np.asarray(income_variance, dtype=np.float64)
+    upi_txn_count = np.asarray(upi_txn_count)
+    bill_payment_score = np.asarray(bill_payment_score)
+    withdrawal_ratio = np.asarray(withdrawal_ratio, dtype=np.float64)
+    months_active = np.asarray(months_active)
+
+    n = len(avg_income)
+    for column in (income_variance, upi_txn_count, bill_payment_score, withdrawal_ratio, months_active):
+        if column.shape != (n,):
+            raise ValueError("All feature columns must be one-dimensional and of equal length")
+
+    # Bucket index per rule = number of thresholds crossed
+    buckets = np.empty((n, len(RULE_EXPLANATIONS)), dtype=np.int8)
+    buckets[:, 0] = income_variance >= 0.3
+    buckets[:, 1] = (upi_txn_count > 15).astype(np.int8) + (upi_txn_count > 30)
+    buckets[:, 2] = (bill_payment_score > 4).astype(np.int8) + (bill_payment_score > 7)
+    buckets[:, 3] = (months_active >= 6).astype(np.int8) + (months_active >= 12)
+    buckets[:, 4] = (withdrawal_ratio > 0.5).astype(np.int8) + (withdrawal_ratio > 0.7)
+    buckets[:, 5] = (avg_income > 15000).astype(np.int8) + (avg_income > 30000)
+
+    scores = np.zeros(n, dtype=np.int16)
+    for rule, points in enumerate(_RULE_POINTS):
+        scores += points[buckets[:, rule]]
+    np.clip(scores, 0, 100, out=scores)
+
+    # Same cut-offs as classify_risk: <40 High, <70 Medium, otherwise Low
+    risk_indices = (scores >= 40).astype(np.int8) + (scores >= 70)
+
+    return BatchScoreResult(
+        scores=scores,
+        risk_indices=risk_indices,
+        explanation_indices=buckets
+    )
@@ -0,0 +1,158 @@
+"""
+In-process async caching.
+
+``AsyncLRUCache`` is a read-through cache with LRU + TTL eviction. Concurrent
+misses for the same key share a single load, so a burst of requests for a
+cold user issues one database query instead of one per request. If the
+request running a shared load is cancelled (e.g. its client disconnected),
+the requests waiting on it start a new load instead of failing too.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from bson import ObjectId
+
+from app.database import get_database
+from app.metrics import CacheMetrics
+
+# User cache settings
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+
+
+class _LoadCancelled(Exception):
+    """Set on a shared load whose caller was cancelled; waiters retry the load"""
+
+
+class AsyncLRUCache:
+    """
+    Read-through cache with LRU + TTL eviction and single-flight loading.
+
+    Loaders returning ``None`` (e.g. unknown IDs) are not cached. Cached
+    values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, metrics: Optional[CacheMetrics] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.metrics = metrics
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        # Bumped on invalidation so loads that started earlier are not stored
+        self._generation: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``key``, loading it on a miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._record("hits")
+                return value
+            del self._entries[key]
+            self._record_size()
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            self._record("coalesced")
+            try:
+                return await asyncio.shield(in_flight)
+            except _LoadCancelled:
+                # The entry is already cleared; the first retry leads the new load
+                return await self.get_or_load(key, loader)
+
+        self.misses += 1
+        self._record("misses")
+        generation = self._generation.get(key, 0)
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            # Only this caller was cancelled; don't pass that on to the waiters
+            future.set_exception(_LoadCancelled())
+            future.exception()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if value is not None and self._generation.get(key, 0) == generation:
+                self._store(key, value)
+            return value
+        finally:
+            del self._in_flight[key]
+            self._generation.pop(key, None)
+
+    def _store(self, key: Hashable, value: Any):
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            self._record("evictions")
+        self._record_size()
+
+    def _record(self, event: str):
+        if self.metrics is not None:
+            self.metrics.events[event].inc()
+
+    def _record_size(self):
+        if self.metrics is not None:
+            self.metrics.size.set(len(self._entries))
+
+    def invalidate(self, key: Hashable):
+        """Drop ``key`` so the next read goes to the database"""
+        if self._entries.pop(key, None) is not None:
+            self._record_size()
+        if key in self._in_flight:
+            self._generation[key] = self._generation.get(key, 0) + 1
+
+    def clear(self):
+        for key in list(self._entries):
+            self.invalidate(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+# Cache of user documents keyed by ObjectId
+user_cache = AsyncLRUCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS, CacheMetrics("user_cache"))
+
+
+async def get_cached_user(user_id: ObjectId) -> Optional[dict]:
+    """Fetch a user document through the user cache"""
+    async def load():
+        # The embedded latest profile changes on every score; don't cache it
+        return await get_database().users.find_one({"_id": user_id}, {"latest_credit_profile": 0})
+
+    return await user_cache.get_or_load(user_id, load)
+
+
+def invalidate_user(user_id: ObjectId):
+    """Invalidate a cached user after it is registered or updated"""
+    user_cache.invalidate(user_id)
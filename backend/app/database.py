@@ -1,21 +1,118 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import os
+import time
+
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.server_api import ServerApi
-import os
+
+from app.metrics import MONGO_PING_LATENCY, mongo_command_metrics, mongo_pool_metrics
+
+# Compressors pymongo supports; snappy and zstd need python-snappy / zstandard installed
+SUPPORTED_COMPRESSORS = ("zlib", "zstd", "snappy")
+READ_PREFERENCES = ("primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest")
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """MongoDB connection settings, read from the environment by ``from_env``"""
+
+    url: str = "mongodb://localhost:27017"
+    database_name: str = "credit_risk_db"
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = None
+    wait_queue_timeout_ms: Optional[int] = None
+    server_selection_timeout_ms: int = 30000
+    connect_timeout_ms: int = 20000
+    socket_timeout_ms: Optional[int] = None
+    compressors: Tuple[str, ...] = ()
+    read_preference: str = "primary"
+    app_name: str = "credit-risk-api"
+    # /health reports unhealthy when the ping fails or takes longer than this
+    health_ping_timeout_ms: int = 1000
+
+    def __post_init__(self):
+        if self.max_pool_size < 0 or self.min_pool_size < 0:
+            raise ValueError("MongoDB pool sizes must not be negative")
+        if self.max_pool_size and self.min_pool_size > self.max_pool_size:
+            raise ValueError("MONGODB_MIN_POOL_SIZE cannot exceed MONGODB_MAX_POOL_SIZE")
+        unknown = [name for name in self.compressors if name not in SUPPORTED_COMPRESSORS]
+        if unknown:
+            raise ValueError(f"Unsupported MongoDB compressors: {', '.join(unknown)}")
+        if self.read_preference not in READ_PREFERENCES:
+            raise ValueError(f"Unknown MongoDB read preference: {self.read_preference}")
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        def optional_int(name: str) -> Optional[int]:
+            value = os.getenv(name, "")
+            return int(value) if value else None
+
+        compressors = os.getenv("MONGODB_COMPRESSORS", "")
+        return cls(
+            url=os.getenv("MONGODB_URL", cls.url),
+            database_name=os.getenv("MONGODB_DATABASE", cls.database_name),
+            max_pool_size=int(os.getenv("MONGODB_MAX_POOL_SIZE", str(cls.max_pool_size))),
+            min_pool_size=int(os.getenv("MONGODB_MIN_POOL_SIZE", str(cls.min_pool_size))),
+            max_idle_time_ms=optional_int("MONGODB_MAX_IDLE_TIME_MS"),
+            wait_queue_timeout_ms=optional_int("MONGODB_WAIT_QUEUE_TIMEOUT_MS"),
+            server_selection_timeout_ms=int(os.getenv(
+                "MONGODB_SERVER_SELECTION_TIMEOUT_MS", str(cls.server_selection_timeout_ms)
+            )),
+            connect_timeout_ms=int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", str(cls.connect_timeout_ms))),
+            socket_timeout_ms=optional_int("MONGODB_SOCKET_TIMEOUT_MS"),
+            compressors=tuple(name.strip() for name in compressors.split(",") if name.strip()),
+            read_preference=os.getenv("MONGODB_READ_PREFERENCE", cls.read_preference),
+            app_name=os.getenv("MONGODB_APP_NAME", cls.app_name),
+            health_ping_timeout_ms=int(os.getenv("HEALTH_PING_TIMEOUT_MS", str(cls.health_ping_timeout_ms))),
+        )
+
+    def client_options(self) -> Dict[str, Any]:
+        """Keyword arguments for ``AsyncIOMotorClient``"""
+        options: Dict[str, Any] = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "readPreference": self.read_preference,
+            "appname": self.app_name,
+        }
+        for key, value in (
+            ("maxIdleTimeMS", self.max_idle_time_ms),
+            ("waitQueueTimeoutMS", self.wait_queue_timeout_ms),
+            ("socketTimeoutMS", self.socket_timeout_ms),
+        ):
+            if value is not None:
+                options[key] = value
+        if self.compressors:
+            options["compressors"] = ",".join(self.compressors)
+        return options
+
 
 # MongoDB connection settings
-MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-DATABASE_NAME = "credit_risk_db"
+settings = DatabaseSettings.from_env()
+MONGODB_URL = settings.url
+DATABASE_NAME = settings.database_name
 
 # Global MongoDB client
 client = None
 database = None
 
 
-async def connect_to_mongo():
+async def connect_to_mongo(db_settings: Optional[DatabaseSettings] = None):
     """Connect to MongoDB"""
-    global client, database
-    client = AsyncIOMotorClient(MONGODB_URL, server_api=ServerApi('1'))
-    database = client[DATABASE_NAME]
+    global client, database, settings
+    if db_settings is not None:
+        settings = db_settings
+    client = AsyncIOMotorClient(
+        settings.url,
+        server_api=ServerApi('1'),
+        event_listeners=[mongo_command_metrics, mongo_pool_metrics],
+        **settings.client_options()
+    )
+    database = client[settings.database_name]
     print("Connected to MongoDB")
 
 
@@ -30,3 +127,22 @@ async def close_mongo_connection():
 def get_database():
     """Get database instance"""
     return database
+
+
+async def ping_database() -> float:
+    """
+    Run ``ping`` against the deployment and return its latency in seconds.
+
+    Raises ``asyncio.TimeoutError`` when the ping takes longer than
+    ``health_ping_timeout_ms``, and the driver's error when it fails.
+    """
+    start = time.perf_counter()
+    await asyncio.wait_for(database.command("ping"), settings.health_ping_timeout_ms / 1000)
+    latency = time.perf_counter() - start
+    MONGO_PING_LATENCY.set(latency)
+    return latency
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Connection pool usage per server address"""
+    return mongo_pool_metrics.snapshot(settings.max_pool_size)
@@ -0,0 +1,83 @@
+"""
+ETags and conditional GETs for user reads.
+
+``GET /user/{id}`` is tagged with a per-user ``version`` counter that every
+write changing the response increments atomically with the change (the
+registration insert, embedding a new latest credit profile, re-scoring).
+``GET /users`` is tagged with a collection-level counter in the
+``counters`` collection (``_id: "users"``), incremented after every
+registration, since only registrations change the listing.
+
+A request whose ``If-None-Match`` holds the current tag gets ``304 Not
+Modified`` after reading just the counter, so the response is not built
+or encoded. For ``GET /users`` that skips the page query; for
+``GET /user/{id}`` the version read is still a point read of the user,
+so a 304 there saves bytes rather than server work. Responses carry ``Cache-Control: no-cache``,
+so browsers keep them and revalidate on every poll without any frontend
+changes.
+
+Counters are incremented after the write they describe, so a tag is never
+newer than the data it was served with; at worst a client refetches once.
+"""
+
+from typing import Dict, Optional
+
+from fastapi import Response, status
+
+COUNTERS_COLLECTION = "counters"
+USERS_COUNTER_ID = "users"
+
+# Bump when the shape of a tagged response changes, so cached copies are refetched
+ETAG_SCHEMA_VERSION = 1
+
+# Field holding the per-user version
+USER_VERSION_FIELD = "version"
+
+
+def user_etag(user_id, version: int) -> str:
+    """Strong ETag of ``GET /user/{id}``; users written before versions count as 0"""
+    return f'"{ETAG_SCHEMA_VERSION}-user-{user_id}-{version}"'
+
+
+def users_list_etag(version: int) -> str:
+    """Strong ETag of ``GET /users`` (the query string selects the page)"""
+    return f'"{ETAG_SCHEMA_VERSION}-users-{version}"'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+
+async def users_list_version(db) -> int:
+    """Current value of the ``GET /users`` change counter"""
+    counter = await db[COUNTERS_COLLECTION].find_one({"_id": USERS_COUNTER_ID})
+    return counter["version"] if counter else 0
+
+
+async def bump_users_list_version(db):
+    """Record a change to the user listing; call after the write"""
+    await db[COUNTERS_COLLECTION].update_one(
+        {"_id": USERS_COUNTER_ID}, {"$inc": {"version": 1}}, upsert=True
+    )
+
+
+async def user_version(db, user_id) -> Optional[int]:
+    """A user's version from a projected point read, or None if the user does not exist"""
+    user = await db.users.find_one({"_id": user_id}, {USER_VERSION_FIELD: 1})
+    if user is None:
+        return None
+    return user.get(USER_VERSION_FIELD, 0)
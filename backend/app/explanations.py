@@ -0,0 +1,260 @@
+"""
+Explanation codes.
+
+Credit profiles store their explanations as small integer codes into a
+versioned message catalog instead of six full English sentences::
+
+    explanation_codes: [0, 4, 7, 10, 11, 16], explanation_version: 1
+
+which cuts each document by a few hundred bytes (most of its size), so
+more profiles fit in the working set and scans read fewer pages. Codes
+are expanded to text only when a response is built
+(``serialization.credit_profile_document`` and the score routes).
+
+Catalogs are append-only history: a document is always expanded with the
+catalog version it was written with. When the explanation text in
+``app.scoring`` changes, add the new messages as a new version here and
+bump ``EXPLANATION_CATALOG_VERSION``; importing this module fails until
+the current catalog matches the scoring rules.
+
+Documents written before codes existed keep their ``explanation`` text
+(and are served as is) until migrated:
+
+    python -m app.explanations --report
+    python -m app.explanations --migrate
+"""
+
+from itertools import chain
+from typing import Any, Dict, List, Optional, Sequence
+
+import bson
+from pymongo import UpdateOne
+
+from app.profiles import LATEST_PROFILE_FIELD
+from app.scoring import RULE_EXPLANATIONS
+
+EXPLANATION_CATALOG_VERSION = 1
+
+# Version -> messages; a code is an index into its version's tuple
+EXPLANATION_CATALOGS: Dict[int, Sequence[str]] = {
+    1: (
+        # Income stability
+        "Stable income pattern detected with low variance",
+        "Income fluctuation detected - consider stabilizing earnings",
+        # UPI activity
+        "Low digital payment activity - increase UPI usage for better score",
+        "Moderate UPI transaction activity detected",
+        "High UPI transaction activity observed - strong digital footprint",
+        # Bill payments
+        "Irregular bill payment history - maintain consistent payments",
+        "Occasional bill payments detected",
+        "Regular bill payments recorded - demonstrates financial discipline",
+        # Work duration
+        "Short work history - longer tenure will improve creditworthiness",
+        "Moderate work duration demonstrates some commitment",
+        "Long-term work activity improves trust and stability",
+        # Cash withdrawals
+        "Low withdrawal ratio indicates good digital transaction habits",
+        "Moderate cash withdrawal ratio detected",
+        "High cash withdrawal behavior increases risk - reduce dependency on cash",
+        # Income level
+        "Lower income bracket - focus on building savings and reducing withdrawals",
+        "Moderate income level observed",
+        "Above-average income level supports creditworthiness",
+    ),
+}
+
+if tuple(EXPLANATION_CATALOGS[EXPLANATION_CATALOG_VERSION]) != tuple(chain.from_iterable(RULE_EXPLANATIONS)):
+    raise RuntimeError(
+        "Explanation text in app.scoring differs from explanation catalog "
+        f"v{EXPLANATION_CATALOG_VERSION}; add a new catalog version"
+    )
+
+# Code of the first message of each rule; code = offset + bucket
+RULE_CODE_OFFSETS = tuple(
+    sum(len(messages) for messages in RULE_EXPLANATIONS[:rule]) for rule in range(len(RULE_EXPLANATIONS))
+)
+
+_CODES = {message: code for code, message in enumerate(EXPLANATION_CATALOGS[EXPLANATION_CATALOG_VERSION])}
+
+MIGRATION_BATCH_SIZE = 1000
+
+
+def encode_explanations(explanations: Sequence[str]) -> List[int]:
+    """
+    Codes for explanation messages in the current catalog.
+
+    Raises:
+        KeyError: if a message is not in the current catalog
+    """
+    return [_CODES[message] for message in explanations]
+
+
+def explanation_fields(explanations: Sequence[str]) -> Dict[str, Any]:
+    """The fields that store ``explanations`` in a credit profile document"""
+    return {
+        "explanation_codes": encode_explanations(explanations),
+        "explanation_version": EXPLANATION_CATALOG_VERSION,
+    }
+
+
+def decode_explanations(codes: Sequence[int], version: int = EXPLANATION_CATALOG_VERSION) -> List[str]:
+    """Messages for codes written with catalog ``version``"""
+    catalog = EXPLANATION_CATALOGS[version]
+    return [catalog[code] for code in codes]
+
+
+def profile_explanations(credit_profile: Dict[str, Any]) -> List[str]:
+    """Explanation text of a stored credit profile, coded or not yet migrated"""
+    if "explanation_codes" in credit_profile:
+        return decode_explanations(credit_profile["explanation_codes"], credit_profile["explanation_version"])
+    return credit_profile["explanation"]
+
+
+def _migration_update(explanation: Sequence[str], prefix: str = "") -> Optional[Dict[str, Any]]:
+    try:
+        fields = explanation_fields(explanation)
+    except KeyError:
+        # Written with text that is in no catalog; left as is
+        return None
+    return {
+        "$set": {f"{prefix}{field}": value for field, value in fields.items()},
+        "$unset": {f"{prefix}explanation": ""},
+    }
+
+
+async def migrate_explanations(db, batch_size: int = MIGRATION_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Replace explanation text with codes in ``credit_profiles`` and in the
+    users' embedded latest profiles.
+
+    Only documents still holding text are touched, so the migration can be
+    re-run or resumed at any time, including while the API is writing.
+
+    Returns:
+        Documents converted per collection, and documents skipped because
+        their text is in no catalog
+    """
+    counts = {"credit_profiles": 0, "users": 0, "skipped": 0}
+    targets = (
+        ("credit_profiles", "explanation", ""),
+        ("users", f"{LATEST_PROFILE_FIELD}.explanation", f"{LATEST_PROFILE_FIELD}."),
+    )
+    for collection, field, prefix in targets:
+        cursor = db[collection].find({field: {"$exists": True}}, {field: 1}).batch_size(batch_size)
+        updates = []
+        async for document in cursor:
+            explanation = document[LATEST_PROFILE_FIELD]["explanation"] if prefix else document["explanation"]
+            update = _migration_update(explanation, prefix)
+            if update is None:
+                counts["skipped"] += 1
+                continue
+            # Matches only while the text is still there (a rescore may have coded it)
+            updates.append(UpdateOne({"_id": document["_id"], field: {"$exists": True}}, update))
+            if len(updates) == batch_size:
+                counts[collection] += (await db[collection].bulk_write(updates, ordered=False)).modified_count
+                updates = []
+        if updates:
+            counts[collection] += (await db[collection].bulk_write(updates, ordered=False)).modified_count
+    return counts
+
+
+async def collection_storage(db, collection: str) -> Dict[str, int]:
+    """Document count, data size, average document size, storage size and index size"""
+    stats = await db[collection].aggregate([{"$collStats": {"storageStats": {}}}]).to_list(length=1)
+    storage = stats[0]["storageStats"]
+    return {
+        "count": storage.get("count", 0),
+        "size": storage.get("size", 0),
+        "avg_obj_size": storage.get("avgObjSize", 0),
+        "storage_size": storage.get("storageSize", 0),
+        "total_index_size": storage.get("totalIndexSize", 0),
+    }
+
+
+async def estimate_savings(db, sample_size: int = 1000) -> Dict[str, Any]:
+    """
+    Estimate the bytes migrating ``credit_profiles`` would save, from a
+    random sample of documents that still hold explanation text.
+    """
+    legacy = await db.credit_profiles.count_documents({"explanation": {"$exists": True}})
+    sample = await db.credit_profiles.aggregate([
+        {"$match": {"explanation": {"$exists": True}}},
+        {"$sample": {"size": sample_size}},
+    ]).to_list(length=sample_size)
+
+    sampled = before = after = 0
+    for document in sample:
+        update = _migration_update(document["explanation"])
+        if update is None:
+            continue
+        converted = {key: value for key, value in document.items() if key != "explanation"}
+        converted.update(update["$set"])
+        sampled += 1
+        before += len(bson.encode(document))
+        after += len(bson.encode(converted))
+
+    avg_before = before / sampled if sampled else 0.0
+    avg_after = after / sampled if sampled else 0.0
+    return {
+        "legacy_documents": legacy,
+        "sampled": sampled,
+        "avg_bytes_before": avg_before,
+        "avg_bytes_after": avg_after,
+        "estimated_bytes_saved": int((avg_before - avg_after) * legacy),
+    }
+
+
+def _format_storage(name: str, stats: Dict[str, int]) -> str:
+    mb = 1024 * 1024
+    return (
+        f"{name}: {stats['count']} documents, data {stats['size'] / mb:.1f} MB "
+        f"(avg {stats['avg_obj_size']} B), storage {stats['storage_size'] / mb:.1f} MB, "
+        f"indexes {stats['total_index_size'] / mb:.1f} MB"
+    )
+
+
+async def _main(argv: Optional[Sequence[str]] = None):
+    import argparse
+
+    from app.database import connect_to_mongo, close_mongo_connection, get_database
+
+    parser = argparse.ArgumentParser(description="Explanation code storage report and migration")
+    parser.add_argument("--report", action="store_true", help="show storage sizes and the estimated savings")
+    parser.add_argument("--migrate", action="store_true", help="convert explanation text to codes")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        before = {name: await collection_storage(db, name) for name in ("credit_profiles", "users")}
+        for name, stats in before.items():
+            print(_format_storage(name, stats))
+
+        if args.report:
+            estimate = await estimate_savings(db)
+            print(f"{estimate['legacy_documents']} credit profiles still store explanation text; "
+                  f"sampled {estimate['sampled']}: {estimate['avg_bytes_before']:.0f} B -> "
+                  f"{estimate['avg_bytes_after']:.0f} B per document, about "
+                  f"{estimate['estimated_bytes_saved'] / 1024 / 1024:.1f} MB of data in total")
+
+        if args.migrate:
+            counts = await migrate_explanations(db, args.batch_size)
+            print(f"Converted {counts['credit_profiles']} credit profiles and {counts['users']} embedded "
+                  f"profiles ({counts['skipped']} with unknown text left as is)")
+            for name, stats in before.items():
+                after = await collection_storage(db, name)
+                print(_format_storage(name, after))
+                print(f"  data {(stats['size'] - after['size']) / 1024 / 1024:+.1f} MB saved, "
+                      f"indexes {(stats['total_index_size'] - after['total_index_size']) / 1024 / 1024:+.1f} MB saved")
+            # WiredTiger reuses freed space but does not return it to the OS
+            print("Run the compact command to release storage to the operating system")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(_main())
@@ -0,0 +1,219 @@
+"""
+Score history.
+
+Every score calculation appends a small point (time, user, score, risk
+category, profile ID) to ``score_history``, a MongoDB time-series
+collection with ``created_at`` as its time field and ``user_id`` as its
+meta field. MongoDB stores each user's points in compressed buckets, so
+the history costs a fraction of the full ``credit_profiles`` documents it
+mirrors, and range queries for one user read only that user's buckets.
+
+``GET /user/{id}/history`` returns raw points, or downsamples them on the
+server into daily or weekly buckets with ``$dateTrunc``, so a chart for a
+long-tenure worker gets a bounded number of points.
+
+Profiles written before this collection existed can be copied over with:
+
+    python -m app.history --backfill
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import CollectionInvalid
+
+SCORE_HISTORY_COLLECTION = "score_history"
+
+# Score history settings; disable TIMESERIES only where time-series
+# collections are unavailable (the history then lives in a regular collection)
+SCORE_HISTORY_TIMESERIES = os.getenv("SCORE_HISTORY_TIMESERIES", "true").lower() in ("1", "true", "yes")
+SCORE_HISTORY_RETENTION_DAYS = int(os.getenv("SCORE_HISTORY_RETENTION_DAYS", "0"))
+
+HISTORY_BUCKETS = ("none", "day", "week")
+DEFAULT_HISTORY_LIMIT = 365
+MAX_HISTORY_LIMIT = 5000
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+async def ensure_score_history(db):
+    """
+    Create the time-series collection if it does not exist.
+
+    Must run before ``ensure_indexes``: creating an index on a missing
+    collection would create it as a regular collection.
+    """
+    if not SCORE_HISTORY_TIMESERIES:
+        return
+    if SCORE_HISTORY_COLLECTION in await db.list_collection_names(filter={"name": SCORE_HISTORY_COLLECTION}):
+        return
+
+    options: Dict[str, Any] = {
+        "timeseries": {"timeField": "created_at", "metaField": "user_id", "granularity": "hours"}
+    }
+    if SCORE_HISTORY_RETENTION_DAYS > 0:
+        options["expireAfterSeconds"] = SCORE_HISTORY_RETENTION_DAYS * 86400
+    try:
+        await db.create_collection(SCORE_HISTORY_COLLECTION, **options)
+        print(f"Created time-series collection {SCORE_HISTORY_COLLECTION}")
+    except CollectionInvalid:
+        # Another worker created it first
+        pass
+
+
+def history_point(credit_profile: Dict[str, Any]) -> Dict[str, Any]:
+    """The ``score_history`` point for a ``credit_profiles`` document"""
+    return {
+        "created_at": credit_profile["created_at"],
+        "user_id": ObjectId(credit_profile["user_id"]),
+        "digital_trust_score": credit_profile["digital_trust_score"],
+        "risk_category": credit_profile["risk_category"],
+        "credit_profile_id": credit_profile["_id"],
+    }
+
+
+async def record_scores(db, credit_profiles: Iterable[Dict[str, Any]]):
+    """Append history points for stored credit profiles"""
+    points = [history_point(profile) for profile in credit_profiles]
+    if points:
+        await db[SCORE_HISTORY_COLLECTION].insert_many(points, ordered=False)
+
+
+def _time_filter(user_id: ObjectId, start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"user_id": user_id}
+    created_at: Dict[str, Any] = {}
+    if start is not None:
+        created_at["$gte"] = start
+    if end is not None:
+        created_at["$lt"] = end
+    if created_at:
+        query["created_at"] = created_at
+    return query
+
+
+async def get_score_history(
+    db,
+    user_id: ObjectId,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = "none",
+    limit: int = DEFAULT_HISTORY_LIMIT
+) -> List[Dict[str, Any]]:
+    """
+    A user's score history in ``[start, end)``, oldest first.
+
+    With ``bucket="none"`` every calculation is one point; with ``"day"`` or
+    ``"week"`` (weeks start on Monday, UTC) points are grouped per bucket
+    with their count, average, minimum and maximum score, and the risk
+    category of the last calculation in the bucket. When the range holds
+    more than ``limit`` points or buckets, the most recent ones are returned.
+    """
+    if bucket not in HISTORY_BUCKETS:
+        raise ValueError(f"Unknown history bucket: {bucket}")
+
+    collection = db[SCORE_HISTORY_COLLECTION]
+    query = _time_filter(user_id, start, end)
+
+    if bucket == "none":
+        cursor = collection.find(
+            query, {"_id": 0, "created_at": 1, "digital_trust_score": 1, "risk_category": 1}
+        ).sort("created_at", DESCENDING).limit(limit)
+        points = [
+            {
+                "timestamp": point["created_at"],
+                "count": 1,
+                "avg_score": float(point["digital_trust_score"]),
+                "min_score": point["digital_trust_score"],
+                "max_score": point["digital_trust_score"],
+                "risk_category": point["risk_category"],
+            }
+            async for point in cursor
+        ]
+    else:
+        truncate = {"date": "$created_at", "unit": bucket}
+        if bucket == "week":
+            truncate["startOfWeek"] = "monday"
+        pipeline = [
+            {"$match": query},
+            {"$sort": {"created_at": ASCENDING}},
+            {"$group": {
+                "_id": {"$dateTrunc": truncate},
+                "count": {"$sum": 1},
+                "avg_score": {"$avg": "$digital_trust_score"},
+                "min_score": {"$min": "$digital_trust_score"},
+                "max_score": {"$max": "$digital_trust_score"},
+                "risk_category": {"$last": "$risk_category"},
+            }},
+            {"$sort": {"_id": DESCENDING}},
+            {"$limit": limit},
+            {"$project": {
+                "_id": 0, "timestamp": "$_id", "count": 1, "avg_score": {"$round": ["$avg_score", 2]},
+                "min_score": 1, "max_score": 1, "risk_category": 1,
+            }},
+        ]
+        points = await collection.aggregate(pipeline).to_list(length=limit)
+
+    points.reverse()
+    return points
+
+
+async def backfill_score_history(db, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Copy existing credit profiles into ``score_history``.
+
+    Profiles are copied newest first, walking ``_id`` downwards from the
+    oldest profile that already has a history point. Points the API writes
+    meanwhile are all newer, so the job is safe to run live, resumes where
+    it stopped if interrupted, and copies nothing once complete.
+    """
+    oldest = await db[SCORE_HISTORY_COLLECTION].find_one(
+        {}, {"credit_profile_id": 1}, sort=[("credit_profile_id", ASCENDING)]
+    )
+    # Without any points yet, stop at profiles created after the job started
+    boundary = oldest["credit_profile_id"] if oldest else ObjectId.from_datetime(datetime.utcnow())
+    query = {"_id": {"$lt": boundary}}
+
+    copied = 0
+    batch: List[Dict[str, Any]] = []
+    projection = {"user_id": 1, "created_at": 1, "digital_trust_score": 1, "risk_category": 1}
+    cursor = db.credit_profiles.find(query, projection).sort("_id", DESCENDING).batch_size(batch_size)
+    async for profile in cursor:
+        batch.append(profile)
+        if len(batch) >= batch_size:
+            await record_scores(db, batch)
+            copied += len(batch)
+            batch = []
+    if batch:
+        await record_scores(db, batch)
+        copied += len(batch)
+    return copied
+
+
+async def _main(argv: Optional[Sequence[str]] = None):
+    import argparse
+
+    from app.database import connect_to_mongo, close_mongo_connection, get_database
+
+    parser = argparse.ArgumentParser(description="Manage the score history collection")
+    parser.add_argument("--backfill", action="store_true", help="copy existing credit profiles into score_history")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        await ensure_score_history(db)
+        if args.backfill:
+            copied = await backfill_score_history(db, args.batch_size)
+            print(f"Copied {copied} credit profiles into {SCORE_HISTORY_COLLECTION}")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(_main())
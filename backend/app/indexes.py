@@ -0,0 +1,303 @@
+"""
+Index management.
+
+Declares every index the API relies on and applies them idempotently at
+startup. Also provides a report of missing/unused indexes and a plan check
+that runs ``explain()`` on each query the routes issue and fails if any of
+them would scan the whole collection.
+
+Usage:
+    python -m app.indexes --report
+    python -m app.indexes --check-plans
+    python -m app.indexes --duplicates
+"""
+
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+# Set to run the query plan check during startup (test/benchmark mode)
+INDEX_PLAN_CHECK = os.getenv("INDEX_PLAN_CHECK", "false").lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Declarative description of one index"""
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    # Only documents matching this filter are indexed
+    partial_filter: Optional[Dict[str, Any]] = None
+
+    @property
+    def name(self) -> str:
+        """Index name, following MongoDB's default naming scheme"""
+        return "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+    def to_index_model(self) -> IndexModel:
+        options: Dict[str, Any] = {"name": self.name, "unique": self.unique}
+        if self.partial_filter is not None:
+            options["partialFilterExpression"] = self.partial_filter
+        return IndexModel(list(self.keys), **options)
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    """A query issued by a route, with representative values for explain()"""
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[Tuple[Tuple[str, int], ...]] = None
+    allow_collscan: bool = False
+
+
+# Unique indexes that features rely on for correctness; see index_missing
+USERS_EMAIL_INDEX = IndexSpec("users", (("email", ASCENDING),), unique=True)
+RUNNING_JOB_INDEX = IndexSpec("jobs", (("type", ASCENDING),), unique=True, partial_filter={"status": "running"})
+
+# Registry of indexes required by the routes
+INDEXES: Tuple[IndexSpec, ...] = (
+    # register_user / register_users_bulk duplicate email detection
+    USERS_EMAIL_INDEX,
+    # get_user_details: latest profile for a user
+    IndexSpec("credit_profiles", (("user_id", ASCENDING), ("created_at", DESCENDING))),
+    # get_score_history: one user's points in a time range (created automatically on MongoDB 6.3+)
+    IndexSpec("score_history", (("user_id", ASCENDING), ("created_at", ASCENDING))),
+    # start_rescore_job: is a re-scoring job already running
+    IndexSpec("jobs", (("type", ASCENDING), ("status", ASCENDING))),
+    # claim_job: at most one running job per type, so concurrent starts cannot both win
+    RUNNING_JOB_INDEX,
+)
+
+_SAMPLE_ID = ObjectId("507f1f77bcf86cd799439011")
+
+# Every query the routes issue; keep in sync when adding or changing queries
+QUERY_SHAPES: Tuple[QueryShape, ...] = (
+    QueryShape("calculate_score.user_lookup", "users", {"_id": _SAMPLE_ID}),
+    QueryShape("calculate_score_batch.user_lookup", "users", {"_id": {"$in": [_SAMPLE_ID]}}),
+    QueryShape("get_user_details.user_lookup", "users", {"_id": _SAMPLE_ID}),
+    QueryShape(
+        "get_user_details.latest_profile", "credit_profiles",
+        {"user_id": str(_SAMPLE_ID)}, sort=(("created_at", DESCENDING),)
+    ),
+    QueryShape(
+        "get_score_history.range", "score_history",
+        {"user_id": _SAMPLE_ID, "created_at": {"$gte": datetime(2024, 1, 1), "$lt": datetime(2025, 1, 1)}},
+        sort=(("created_at", DESCENDING),)
+    ),
+    QueryShape(
+        "rescore_job.active", "jobs",
+        {"type": "rescore", "status": "running", "heartbeat_at": {"$gte": datetime(2024, 1, 1)}}
+    ),
+    QueryShape(
+        "rescore_job.profiles", "credit_profiles",
+        {"_id": {"$gt": _SAMPLE_ID, "$lte": _SAMPLE_ID}}, sort=(("_id", ASCENDING),)
+    ),
+    QueryShape("get_all_users.version", "counters", {"_id": "users"}),
+    QueryShape("get_all_users.first_page", "users", {}, sort=(("_id", ASCENDING),)),
+    QueryShape(
+        "get_all_users.next_page", "users",
+        {"_id": {"$gt": _SAMPLE_ID}}, sort=(("_id", ASCENDING),)
+    ),
+)
+
+
+@dataclass
+class IndexReport:
+    """Result of comparing the registry with the live database"""
+    missing: List[str] = field(default_factory=list)
+    unused: List[str] = field(default_factory=list)
+    unregistered: List[str] = field(default_factory=list)
+
+
+class CollectionScanError(Exception):
+    """Raised when a registered query would run as a collection scan"""
+
+
+async def ensure_indexes(db, indexes: Sequence[IndexSpec] = INDEXES) -> List[str]:
+    """
+    Create all registered indexes. Safe to call on every startup.
+
+    An index the server refuses to build (e.g. a unique index over data
+    that already holds duplicates) is logged and skipped, so the API still
+    starts; it is recorded for ``index_missing``, so the routes that
+    depend on a unique index refuse to run without it, and stays in the
+    ``--report`` missing list until fixed.
+
+    Returns:
+        Names of the indexes that could not be created
+    """
+    failed = []
+    for spec in indexes:
+        try:
+            await db[spec.collection].create_indexes([spec.to_index_model()])
+        except OperationFailure as exc:
+            failed.append(f"{spec.collection}.{spec.name}")
+            _missing.add(f"{spec.collection}.{spec.name}")
+            print(f"Index {spec.collection}.{spec.name} not created: {exc}")
+            if spec.unique:
+                print("  Existing documents share a key. List them with "
+                      "`python -m app.indexes --duplicates`, remove or merge the extra "
+                      "documents, then restart to build the index.")
+        else:
+            _missing.discard(f"{spec.collection}.{spec.name}")
+    return failed
+
+
+# Indexes the last ensure_indexes call in this process failed to build
+_missing: Set[str] = set()
+
+
+def index_missing(spec: IndexSpec) -> bool:
+    """Whether ``spec`` could not be built at startup"""
+    return f"{spec.collection}.{spec.name}" in _missing
+
+
+def missing_indexes() -> List[str]:
+    """Names of the indexes that could not be built at startup, for /health"""
+    return sorted(_missing)
+
+
+async def find_duplicates(db, spec: IndexSpec, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Keys held by more than one document, which block building a unique index.
+
+    Returns:
+        Up to ``limit`` groups of ``{"key": ..., "count": ..., "ids": [...]}``
+    """
+    pipeline: List[Dict[str, Any]] = []
+    if spec.partial_filter is not None:
+        pipeline.append({"$match": spec.partial_filter})
+    pipeline += [
+        {"$group": {
+            "_id": {key.replace(".", "_"): f"${key}" for key, _ in spec.keys},
+            "count": {"$sum": 1},
+            "ids": {"$push": "$_id"},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limit},
+    ]
+    groups = await db[spec.collection].aggregate(pipeline, allowDiskUse=True).to_list(length=limit)
+    return [{"key": group["_id"], "count": group["count"], "ids": group["ids"]} for group in groups]
+
+
+async def report_indexes(db, indexes: Sequence[IndexSpec] = INDEXES) -> IndexReport:
+    """
+    Compare registered indexes with the ones present in the database.
+
+    ``unused`` lists indexes with no recorded accesses since the server
+    started (per ``$indexStats``), ``unregistered`` lists indexes that
+    exist in the database but not in the registry.
+    """
+    report = IndexReport()
+    collections = sorted({spec.collection for spec in indexes})
+    registered = {(spec.collection, spec.name) for spec in indexes}
+
+    for collection in collections:
+        existing = await db[collection].index_information()
+        for spec in indexes:
+            if spec.collection == collection and spec.name not in existing:
+                report.missing.append(f"{collection}.{spec.name}")
+
+        async for stats in db[collection].aggregate([{"$indexStats": {}}]):
+            name = stats["name"]
+            if name == "_id_":
+                continue
+            if (collection, name) not in registered:
+                report.unregistered.append(f"{collection}.{name}")
+            if stats["accesses"]["ops"] == 0:
+                report.unused.append(f"{collection}.{name}")
+
+    return report
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """Collect stage names from an explain() plan tree"""
+    stages = []
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    # Slot-based engine plans nest the classic tree under "queryPlan"
+    for key in ("queryPlan", "inputStage"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+async def explain_query(db, shape: QueryShape) -> List[str]:
+    """Return the winning plan stages for a registered query"""
+    cursor = db[shape.collection].find(shape.filter)
+    if shape.sort:
+        cursor = cursor.sort(list(shape.sort))
+    explanation = await cursor.limit(1).explain()
+    if "queryPlanner" not in explanation:
+        # Queries on time-series collections run as a pipeline over the
+        # buckets collection; the plan is under the first stage's $cursor
+        explanation = explanation["stages"][0]["$cursor"]
+    return _plan_stages(explanation["queryPlanner"]["winningPlan"])
+
+
+async def assert_no_collscan(db, shapes: Sequence[QueryShape] = QUERY_SHAPES):
+    """
+    Run explain() on every registered query.
+
+    Raises:
+        CollectionScanError: if any query not marked ``allow_collscan``
+            would run as a COLLSCAN
+    """
+    offenders = []
+    for shape in shapes:
+        stages = await explain_query(db, shape)
+        if "COLLSCAN" in stages and not shape.allow_collscan:
+            offenders.append(f"{shape.name} ({shape.collection}: {' <- '.join(stages)})")
+
+    if offenders:
+        raise CollectionScanError("Queries running as collection scans: " + ", ".join(offenders))
+
+
+async def _main(argv: Optional[Sequence[str]] = None):
+    import argparse
+
+    from app.database import connect_to_mongo, close_mongo_connection, get_database
+
+    parser = argparse.ArgumentParser(description="Manage MongoDB indexes")
+    parser.add_argument("--report", action="store_true", help="report missing and unused indexes")
+    parser.add_argument("--check-plans", action="store_true", help="fail if any route query is a COLLSCAN")
+    parser.add_argument("--duplicates", action="store_true", help="list keys blocking a unique index")
+    args = parser.parse_args(argv)
+
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        await ensure_indexes(db)
+        if args.duplicates:
+            for spec in INDEXES:
+                if not spec.unique:
+                    continue
+                groups = await find_duplicates(db, spec)
+                print(f"{spec.collection}.{spec.name}: {len(groups) or 'no'} duplicate keys")
+                for group in groups:
+                    print(f"  {group['key']}: {group['count']} documents {[str(i) for i in group['ids']]}")
+        if args.report:
+            report = await report_indexes(db)
+            print(f"Missing: {report.missing or 'none'}")
+            print(f"Unused: {report.unused or 'none'}")
+            print(f"Unregistered: {report.unregistered or 'none'}")
+        if args.check_plans:
+            await assert_no_collscan(db)
+            print(f"All {len(QUERY_SHAPES)} route queries use an index")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(_main())
@@ -0,0 +1,89 @@
+"""
+One-time backfill of ``users.latest_credit_profile``.
+
+Finds users without the embedded field, looks up their newest credit
+profile in chunks and stores it (or ``None`` if they were never scored).
+Safe to re-run and to run while the API is serving: users that gain the
+field in the meantime are left untouched.
+
+Usage (from backend/):
+    python -m app.jobs.backfill_latest_profile [--batch-size 1000]
+"""
+
+import asyncio
+import time
+from typing import List, Optional, Sequence
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.profiles import LATEST_PROFILE_FIELD
+
+
+async def _backfill_chunk(db, user_ids: List[ObjectId]) -> int:
+    latest = {}
+    pipeline = [
+        {"$match": {"user_id": {"$in": [str(user_id) for user_id in user_ids]}}},
+        {"$sort": {"user_id": 1, "created_at": -1}},
+        {"$group": {"_id": "$user_id", "profile": {"$first": "$$ROOT"}}},
+    ]
+    async for row in db.credit_profiles.aggregate(pipeline):
+        latest[row["_id"]] = row["profile"]
+
+    result = await db.users.bulk_write(
+        [
+            UpdateOne(
+                {"_id": user_id, LATEST_PROFILE_FIELD: {"$exists": False}},
+                {"$set": {LATEST_PROFILE_FIELD: latest.get(str(user_id))}}
+            )
+            for user_id in user_ids
+        ],
+        ordered=False
+    )
+    return result.modified_count
+
+
+async def backfill_latest_profiles(db, batch_size: int = 1000) -> int:
+    """
+    Embed the newest credit profile in every user that lacks one.
+
+    Returns:
+        Number of users updated
+    """
+    updated = 0
+    cursor = db.users.find(
+        {LATEST_PROFILE_FIELD: {"$exists": False}}, {"_id": 1}
+    ).batch_size(batch_size)
+
+    chunk = []
+    async for user in cursor:
+        chunk.append(user["_id"])
+        if len(chunk) == batch_size:
+            updated += await _backfill_chunk(db, chunk)
+            chunk = []
+    if chunk:
+        updated += await _backfill_chunk(db, chunk)
+
+    return updated
+
+
+async def _main(argv: Optional[Sequence[str]] = None):
+    import argparse
+
+    from app.database import connect_to_mongo, close_mongo_connection, get_database
+
+    parser = argparse.ArgumentParser(description="Backfill users.latest_credit_profile")
+    parser.add_argument("--batch-size", type=int, default=1000, help="users per chunk")
+    args = parser.parse_args(argv)
+
+    await connect_to_mongo()
+    try:
+        start = time.perf_counter()
+        updated = await backfill_latest_profiles(get_database(), args.batch_size)
+        print(f"Backfilled {updated} users in {time.perf_counter() - start:.1f}s")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,408 @@
+"""
+Bulk re-scoring of stored credit profiles.
+
+After the rules in ``app.scoring`` change, every stored profile carries a
+stale score. This job walks ``credit_profiles`` in ``_id`` order with a
+batched cursor, re-scores each chunk in one vectorized pass
+(``app.batch_scoring``) using the inputs stored in the profile and the
+user's current ``months_active``, and writes the profiles whose score,
+risk category or explanations changed with an unordered ``bulk_write``.
+Users whose embedded latest profile was re-scored get the same update,
+and the portfolio stats are rebuilt once the job completes. Score history
+points are left as they were computed.
+
+Each job is a document in the ``jobs`` collection holding its progress
+and a checkpoint (the last profile ``_id`` processed), updated after every
+chunk. A job whose process stopped can be resumed from its checkpoint;
+the job is claimed with a heartbeat lease, so two workers never run it at
+once.
+
+Usage (from backend/):
+    python -m app.jobs.rescore [--batch-size 1000]
+    python -m app.jobs.rescore --resume <job id>
+"""
+
+import asyncio
+import os
+import secrets
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.etags import USER_VERSION_FIELD
+from app.explanations import EXPLANATION_CATALOG_VERSION, profile_explanations
+from app.profiles import LATEST_PROFILE_FIELD
+
+JOB_TYPE = "rescore"
+DEFAULT_BATCH_SIZE = 1000
+# A running job whose heartbeat is older than this is considered dead
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+FEATURE_FIELDS = ("avg_income", "income_variance", "upi_txn_count", "bill_payment_score", "withdrawal_ratio")
+SCORE_FIELDS = ("digital_trust_score", "risk_category")
+# Coded explanations, or the text of profiles not yet migrated (see app.explanations)
+EXPLANATION_FIELDS = ("explanation_codes", "explanation_version", "explanation")
+
+
+class JobConflictError(Exception):
+    """Raised when a job cannot be claimed because it is running or finished"""
+
+
+class LeaseLostError(Exception):
+    """Raised when a job's lease expired and another claim took it over"""
+
+
+def _owner() -> str:
+    """A new owner token per claim, so even a reclaim in the same process is told apart"""
+    return f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+
+
+async def create_rescore_job(db, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Create a pending re-scoring job covering every profile that exists now.
+
+    Profiles written after this point are scored with the current rules
+    already, so the job stops at the newest ``_id`` seen here.
+    """
+    newest = await db.credit_profiles.find_one({}, {"_id": 1}, sort=[("_id", DESCENDING)])
+    now = datetime.utcnow()
+    job = {
+        "_id": ObjectId(),
+        "type": JOB_TYPE,
+        "status": "pending",
+        "batch_size": batch_size,
+        "until_id": newest["_id"] if newest else None,
+        "checkpoint": None,
+        "total": await db.credit_profiles.estimated_document_count(),
+        "processed": 0,
+        "changed": 0,
+        "active_seconds": 0.0,
+        "created_at": now,
+        "updated_at": now,
+        "started_at": None,
+        "finished_at": None,
+        "heartbeat_at": None,
+        "owner": None,
+        "error": None,
+    }
+    await db.jobs.insert_one(job)
+    return job
+
+
+async def claim_job(db, job_id: ObjectId) -> Dict[str, Any]:
+    """
+    Mark a job as running in this process.
+
+    The unique partial index on ``jobs.type`` (running jobs only) makes the
+    claim atomic: of two concurrent claims for jobs of the same type, one
+    fails with a duplicate key. Other running jobs whose lease expired are
+    marked ``interrupted`` first, so a dead worker does not block new jobs;
+    they can be resumed later.
+
+    Raises:
+        JobConflictError: if the job is completed or held by a live worker,
+            or another job of its type is running
+        LookupError: if there is no such job
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=JOB_LEASE_SECONDS)
+    await db.jobs.update_many(
+        {"_id": {"$ne": job_id}, "type": JOB_TYPE, "status": "running", "heartbeat_at": {"$lt": stale}},
+        {"$set": {"status": "interrupted", "owner": None, "updated_at": now}}
+    )
+    try:
+        job = await db.jobs.find_one_and_update(
+            {
+                "_id": job_id,
+                "type": JOB_TYPE,
+                "$or": [
+                    {"status": {"$in": ["pending", "interrupted", "failed"]}},
+                    {"status": "running", "heartbeat_at": {"$lt": stale}},
+                ],
+            },
+            {"$set": {
+                "status": "running", "owner": _owner(), "heartbeat_at": now, "updated_at": now, "error": None,
+                "run_started_at": now, "run_processed": 0,
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise JobConflictError(f"Another {JOB_TYPE} job is already running")
+    if job is not None:
+        if job["started_at"] is None:
+            await db.jobs.update_one({"_id": job_id}, {"$set": {"started_at": now}})
+            job["started_at"] = now
+        return job
+
+    existing = await db.jobs.find_one({"_id": job_id, "type": JOB_TYPE}, {"status": 1})
+    if existing is None:
+        raise LookupError(f"Job {job_id} not found")
+    raise JobConflictError(f"Job {job_id} is {existing['status']}")
+
+
+async def find_active_job(db) -> Optional[Dict[str, Any]]:
+    """The re-scoring job currently held by a live worker, if any"""
+    stale = datetime.utcnow() - timedelta(seconds=JOB_LEASE_SECONDS)
+    return await db.jobs.find_one({"type": JOB_TYPE, "status": "running", "heartbeat_at": {"$gte": stale}})
+
+
+async def _rescore_chunk(db, profiles: List[Dict[str, Any]]) -> int:
+    """Re-score one chunk of profiles; returns how many changed"""
+    from app.batch_scoring import score_batch
+
+    user_ids = list({ObjectId(profile["user_id"]) for profile in profiles})
+    months_active = {}
+    async for user in db.users.find({"_id": {"$in": user_ids}}, {"months_active": 1}):
+        months_active[str(user["_id"])] = user["months_active"]
+
+    # Profiles of deleted users keep their score
+    scorable = [profile for profile in profiles if str(ObjectId(profile["user_id"])) in months_active]
+    if not scorable:
+        return 0
+
+    result = score_batch(
+        *[[profile[field] for profile in scorable] for field in FEATURE_FIELDS],
+        months_active=[months_active[str(ObjectId(profile["user_id"]))] for profile in scorable]
+    )
+    scores = result.scores.tolist()
+
+    now = datetime.utcnow()
+    profile_updates = []
+    user_updates = []
+    for row, profile in enumerate(scorable):
+        rescored = {
+            "digital_trust_score": scores[row],
+            "risk_category": result.risk_category(row),
+        }
+        if (
+            all(profile[field] == rescored[field] for field in SCORE_FIELDS)
+            and profile_explanations(profile) == result.explanations(row)
+        ):
+            continue
+        rescored["explanation_codes"] = result.explanation_codes(row)
+        rescored["explanation_version"] = EXPLANATION_CATALOG_VERSION
+        # Rewritten profiles drop any explanation text left from before codes
+        profile_updates.append(UpdateOne(
+            {"_id": profile["_id"]},
+            {"$set": {**rescored, "rescored_at": now}, "$unset": {"explanation": ""}}
+        ))
+        # Only touches the user if this profile is still their embedded latest
+        user_updates.append(UpdateOne(
+            {"_id": ObjectId(profile["user_id"]), f"{LATEST_PROFILE_FIELD}._id": profile["_id"]},
+            {
+                "$set": {
+                    **{f"{LATEST_PROFILE_FIELD}.{field}": value for field, value in rescored.items()},
+                    f"{LATEST_PROFILE_FIELD}.rescored_at": now,
+                },
+                "$unset": {f"{LATEST_PROFILE_FIELD}.explanation": ""},
+                "$inc": {USER_VERSION_FIELD: 1},
+            }
+        ))
+
+    if profile_updates:
+        await db.credit_profiles.bulk_write(profile_updates, ordered=False)
+        await db.users.bulk_write(user_updates, ordered=False)
+    return len(profile_updates)
+
+
+async def run_rescore_job(db, job_id: ObjectId, job: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Claim a job (unless ``job`` was already claimed with ``claim_job``) and
+    process it from its checkpoint to the end.
+
+    Cancellation (e.g. shutdown) marks the job ``interrupted``; any other
+    error marks it ``failed``. Either way it can be resumed.
+
+    Every job write is conditional on this claim still owning the job. If
+    the lease lapsed (e.g. during a slow chunk) and another worker
+    reclaimed the job, this run stops without touching the job further.
+
+    Returns:
+        The final job document
+    """
+    from app.stats import rebuild_portfolio_stats
+
+    if job is None:
+        job = await claim_job(db, job_id)
+    batch_size = job["batch_size"]
+    lease = {"_id": job_id, "owner": job["owner"], "status": "running"}
+
+    query: Dict[str, Any] = {}
+    bounds: Dict[str, Any] = {}
+    if job["checkpoint"] is not None:
+        bounds["$gt"] = job["checkpoint"]
+    if job["until_id"] is not None:
+        bounds["$lte"] = job["until_id"]
+    if bounds:
+        query["_id"] = bounds
+    projection = {"user_id": 1, **{field: 1 for field in FEATURE_FIELDS + SCORE_FIELDS + EXPLANATION_FIELDS}}
+
+    status = "completed"
+    error = None
+    try:
+        if job["until_id"] is not None:
+            cursor = db.credit_profiles.find(query, projection).sort("_id", ASCENDING).batch_size(batch_size)
+            chunk: List[Dict[str, Any]] = []
+            async for profile in cursor:
+                chunk.append(profile)
+                if len(chunk) == batch_size:
+                    await _process_chunk(db, lease, chunk)
+                    chunk = []
+            if chunk:
+                await _process_chunk(db, lease, chunk)
+
+        # Risk categories and score buckets moved; cached users hold no profile
+        await rebuild_portfolio_stats(db)
+    except LeaseLostError:
+        # The job belongs to another worker now; leave its status alone
+        status = None
+        print(f"Rescore job {job_id} lost its lease to another worker; stopping")
+    except asyncio.CancelledError:
+        status = "interrupted"
+        raise
+    except Exception as exc:
+        status = "failed"
+        error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        final = None
+        if status is not None:
+            now = datetime.utcnow()
+            update: Dict[str, Any] = {"status": status, "error": error, "updated_at": now, "owner": None}
+            if status == "completed":
+                update["finished_at"] = now
+            # Shielded so an interrupted job is still recorded as such
+            final = await asyncio.shield(db.jobs.find_one_and_update(
+                lease, {"$set": update}, return_document=ReturnDocument.AFTER
+            ))
+        job = final if final is not None else await db.jobs.find_one({"_id": job_id})
+
+    return job
+
+
+async def _process_chunk(db, lease: Dict[str, Any], chunk: List[Dict[str, Any]]):
+    """
+    Re-score a chunk and record it on the job.
+
+    Raises:
+        LeaseLostError: if ``lease`` (the job's ID, owner and running
+            status) no longer matches the job
+    """
+    start = time.perf_counter()
+    changed = await _rescore_chunk(db, chunk)
+    now = datetime.utcnow()
+    result = await db.jobs.update_one(
+        lease,
+        {
+            "$set": {"checkpoint": chunk[-1]["_id"], "heartbeat_at": now, "updated_at": now},
+            "$inc": {
+                "processed": len(chunk),
+                "run_processed": len(chunk),
+                "changed": changed,
+                "active_seconds": time.perf_counter() - start,
+            },
+        }
+    )
+    if result.matched_count == 0:
+        raise LeaseLostError(f"Job {lease['_id']} is no longer owned by {lease['owner']}")
+
+
+def job_progress(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Progress summary for a job document"""
+    total = max(job["total"], job["processed"])
+    now = datetime.utcnow()
+    rate = None
+    if job["status"] == "running" and job.get("run_started_at"):
+        elapsed = (now - job["run_started_at"]).total_seconds()
+        rate = job.get("run_processed", 0) / elapsed if elapsed > 0 else None
+    elif job["active_seconds"]:
+        rate = job["processed"] / job["active_seconds"]
+
+    remaining = total - job["processed"]
+    return {
+        "id": str(job["_id"]),
+        "type": job["type"],
+        "status": job["status"],
+        "processed": job["processed"],
+        "changed": job["changed"],
+        "total": total,
+        "percent": round(job["processed"] / total * 100, 2) if total else 100.0,
+        "profiles_per_second": round(rate, 1) if rate else None,
+        "eta_seconds": round(remaining / rate, 1) if rate and job["status"] == "running" else None,
+        "checkpoint": str(job["checkpoint"]) if job["checkpoint"] else None,
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "updated_at": job["updated_at"],
+        "error": job["error"],
+    }
+
+
+# Jobs running in this process, cancelled by the lifespan shutdown
+_running_jobs: Dict[ObjectId, asyncio.Task] = {}
+
+
+async def start_rescore_job(db, job_id: ObjectId) -> Dict[str, Any]:
+    """
+    Claim a job and run it in a background task of this process.
+
+    Returns the claimed job document.
+    """
+    # Claimed here so conflicts surface to the caller
+    job = await claim_job(db, job_id)
+
+    async def run():
+        try:
+            await run_rescore_job(db, job_id, job)
+        except asyncio.CancelledError:
+            pass
+        except Exception as exc:
+            print(f"Rescore job {job_id} failed: {exc}")
+        finally:
+            _running_jobs.pop(job_id, None)
+
+    _running_jobs[job_id] = asyncio.create_task(run())
+    return job
+
+
+async def stop_rescore_jobs():
+    """Cancel jobs running in this process; they are left ``interrupted``"""
+    tasks = list(_running_jobs.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _main(argv: Optional[Sequence[str]] = None):
+    import argparse
+
+    from app.database import connect_to_mongo, close_mongo_connection, get_database
+
+    parser = argparse.ArgumentParser(description="Re-score stored credit profiles with the current rules")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="profiles per chunk")
+    parser.add_argument("--resume", help="ID of an interrupted or failed job to continue")
+    args = parser.parse_args(argv)
+
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        if args.resume:
+            job_id = ObjectId(args.resume)
+        else:
+            job_id = (await create_rescore_job(db, args.batch_size))["_id"]
+            print(f"Created rescore job {job_id}")
+        job = await run_rescore_job(db, job_id)
+        progress = job_progress(job)
+        print(f"Re-scored {progress['processed']} profiles ({progress['changed']} changed) "
+              f"at {progress['profiles_per_second'] or 0} profiles/s")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -1,9 +1,24 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, File, Form, Header, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from typing import Optional
+import asyncio
 
-from app.database import connect_to_mongo, close_mongo_connection
-from app.routes import users, credit
+from pymongo.errors import PyMongoError
+
+from app.database import connect_to_mongo, close_mongo_connection, get_database, ping_database, pool_stats
+from app.indexes import ensure_indexes, assert_no_collscan, missing_indexes, INDEX_PLAN_CHECK
+from app.routes import users, credit, stats, jobs
+from app.stats import ensure_portfolio_stats
+from app.history import ensure_score_history
+from app.jobs.rescore import stop_rescore_jobs
+from app.ml.serving import preload_ml, start_inference_service, stop_inference_service
+from app.ml.shadow import start_shadow_scoring, stop_shadow_scoring
+from app.write_behind import start_credit_profile_buffer, drain_credit_profile_buffer
+from app.metrics import MetricsMiddleware, metrics_registry
+from app.admission import ADMISSION_CONTROL, AdmissionMiddleware, admission_stats
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 
 @asynccontextmanager
@@ -11,8 +26,21 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
     # Startup
     await connect_to_mongo()
+    await ensure_score_history(get_database())
+    await ensure_indexes(get_database())
+    if INDEX_PLAN_CHECK:
+        await assert_no_collscan(get_database())
+    await ensure_portfolio_stats(get_database())
+    preload_ml()
+    await start_inference_service()
+    start_shadow_scoring()
+    await start_credit_profile_buffer(on_written=credit.record_written_profiles)
     yield
     # Shutdown
+    await stop_rescore_jobs()
+    await stop_shadow_scoring()
+    await drain_credit_profile_buffer()
+    await stop_inference_service()
     await close_mongo_connection()
 
 
@@ -24,6 +52,11 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Per-route concurrency limits and bounded queues; innermost, so 503s
+# still get CORS headers and are recorded by the metrics middleware
+if ADMISSION_CONTROL:
+    app.add_middleware(AdmissionMiddleware)
+
 # CORS middleware for frontend integration
 app.add_middleware(
     CORSMiddleware,
@@ -33,6 +66,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency and in-flight metrics (outermost, so it times everything)
+app.add_middleware(MetricsMiddleware)
+
 
 # Root endpoint
 @app.get("/", tags=["Root"])
@@ -44,9 +80,16 @@ async def root():
         "status": "running",
         "endpoints": {
             "register": "POST /register",
+            "register_bulk": "POST /register/bulk",
             "calculate_score": "POST /calculate-score",
+            "calculate_score_batch": "POST /calculate-score/batch",
+            "calculate_score_statement": "POST /calculate-score/statement",
             "get_users": "GET /users",
-            "get_user_detail": "GET /user/{id}"
+            "get_user_detail": "GET /user/{id}",
+            "get_user_history": "GET /user/{id}/history",
+            "portfolio_stats": "GET /stats",
+            "rescore": "POST /jobs/rescore",
+            "job_status": "GET /jobs/{id}"
         }
     }
 
@@ -54,13 +97,43 @@ async def root():
 # Health check endpoint
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Health check endpoint"""
+    """
+    Health check endpoint.
+
+    Pings MongoDB and returns 503 when the ping fails or exceeds
+    HEALTH_PING_TIMEOUT_MS, so load balancers can take the instance out
+    of rotation. Never queued by admission control.
+    """
+    try:
+        latency = await ping_database()
+    except (PyMongoError, asyncio.TimeoutError) as exc:
+        reason = "ping timed out" if isinstance(exc, asyncio.TimeoutError) else str(exc)
+        return JSONResponse(status_code=503, content={
+            "status": "unhealthy",
+            "database": "unreachable",
+            "detail": reason,
+            "pool": pool_stats(),
+            "admission": admission_stats(),
+            "missing_indexes": missing_indexes()
+        })
+
     return {
         "status": "healthy",
-        "database": "connected"
+        "database": "connected",
+        "ping_ms": round(latency * 1000, 3),
+        "pool": pool_stats(),
+        "admission": admission_stats(),
+        "missing_indexes": missing_indexes()
     }
 
 
+# Metrics endpoint
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in text exposition format"""
+    return Response(generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
 # Register route: POST /register
 @app.post("/register", tags=["Registration"])
 async def register(user_data: users.UserRegisterRequest):
@@ -68,6 +141,13 @@ async def register(user_data: users.UserRegisterRequest):
     return await users.register_user(user_data)
 
 
+# Bulk register route: POST /register/bulk
+@app.post("/register/bulk", tags=["Registration"])
+async def register_bulk(bulk_data: users.BulkUserRegisterRequest):
+    """Register users in bulk - delegates to users router"""
+    return await users.register_users_bulk(bulk_data)
+
+
 # Calculate score route: POST /calculate-score
 @app.post("/calculate-score", tags=["Credit Score"])
 async def calculate_score(score_data: credit.CalculateScoreRequest):
@@ -75,23 +155,57 @@ async def calculate_score(score_data: credit.CalculateScoreRequest):
     return await credit.calculate_score(score_data)
 
 
+# Statement score route: POST /calculate-score/statement
+@app.post("/calculate-score/statement", tags=["Credit Score"])
+async def calculate_score_from_statement(
+    user_id: str = Form(...),
+    statement: UploadFile = File(...),
+    months: int = Form(credit.DEFAULT_STATEMENT_MONTHS, ge=1, le=120)
+):
+    """Calculate credit score from a statement upload - delegates to credit router"""
+    return await credit.calculate_score_from_statement(user_id, statement, months)
+
+
+# Batch calculate score route: POST /calculate-score/batch
+@app.post("/calculate-score/batch", tags=["Credit Score"])
+async def calculate_score_batch(batch_data: credit.BatchCalculateScoreRequest):
+    """Calculate credit scores in bulk - delegates to credit router"""
+    return await credit.calculate_score_batch(batch_data)
+
+
 # Get all users route: GET /users
 @app.get("/users", tags=["Users"])
-async def get_users():
-    """Get all users - delegates to users router"""
-    return await users.get_all_users()
+async def get_users(params: users.UserListParams = Depends()):
+    """Get users page by page - delegates to users router"""
+    return await users.get_all_users(params)
 
 
 # Get user detail route: GET /user/{id}
 @app.get("/user/{user_id}", tags=["Users"])
-async def get_user(user_id: str):
+async def get_user(user_id: str, if_none_match: Optional[str] = Header(None)):
     """Get user details - delegates to users router"""
-    return await users.get_user_details(user_id)
+    return await users.get_user_details(user_id, if_none_match)
+
+
+# Portfolio stats route: GET /stats
+@app.get("/stats", tags=["Stats"])
+async def get_stats():
+    """Get portfolio statistics - delegates to stats router"""
+    return await stats.get_portfolio()
+
+
+# Score history route: GET /user/{id}/history
+@app.get("/user/{user_id}/history", tags=["Users"])
+async def get_user_history(user_id: str, params: users.ScoreHistoryParams = Depends()):
+    """Get a user's score history - delegates to users router"""
+    return await users.get_user_history(user_id, params)
 
 
 # Include additional routers (for extensibility)
 app.include_router(users.router)
 app.include_router(credit.router)
+app.include_router(stats.router)
+app.include_router(jobs.router)
 
 
 if __name__ == "__main__":
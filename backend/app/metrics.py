@@ -0,0 +1,406 @@
+"""
+Prometheus metrics.
+
+Collects per-route request latency, in-flight requests, admission control
+queues and rejections, MongoDB command timings and connection pool usage
+(through pymongo command and pool monitoring on the Motor client), scoring
+and ML inference timings, and user cache statistics. Everything is exposed
+in Prometheus text format by ``GET /metrics``.
+
+Under the pre-fork server (``app.serve``) every worker writes its metrics
+to files in ``PROMETHEUS_MULTIPROC_DIR`` (prometheus_client's multiprocess
+mode) and ``/metrics`` merges them, so whichever worker answers a scrape
+reports the whole pool: counters and histograms are summed, and gauges are
+summed (or maxed) over the workers that are alive. Metrics therefore have
+to be recorded as events happen, not computed at scrape time.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from pymongo import monitoring
+
+# Buckets for sub-millisecond work such as rule scoring
+FAST_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1
+)
+# Buckets for database round trips
+DB_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status code",
+    ["method", "route", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum"
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by collection, command and outcome",
+    ["collection", "command", "outcome"],
+    buckets=DB_BUCKETS
+)
+SCORING_LATENCY = Histogram(
+    "scoring_duration_seconds",
+    "Time spent computing Digital Trust Scores (per request or per batch)",
+    ["engine"],
+    buckets=FAST_BUCKETS
+)
+SCORING_APPLICANTS = Counter(
+    "scoring_applicants_total",
+    "Applicants scored",
+    ["engine"]
+)
+ML_INFERENCE_LATENCY = Histogram(
+    "ml_inference_duration_seconds",
+    "Time spent in one batched ML inference call",
+    buckets=FAST_BUCKETS + (0.25, 0.5, 1.0)
+)
+ML_INFERENCE_BATCH_SIZE = Histogram(
+    "ml_inference_batch_size",
+    "Number of predictions per ML inference batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+ML_SHADOW_PREDICTIONS = Counter(
+    "ml_shadow_predictions_total",
+    "Shadow ML predictions by outcome (agree, disagree, sampled_out, dropped, failed)",
+    ["outcome"]
+)
+ML_SHADOW_LATENCY = Histogram(
+    "ml_shadow_duration_seconds",
+    "Time from queueing a shadow prediction to its result, including batching",
+    buckets=FAST_BUCKETS + (0.25, 0.5, 1.0)
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    "mongodb_pool_connections",
+    "Open connections in a MongoDB connection pool",
+    ["address"],
+    multiprocess_mode="livesum"
+)
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "mongodb_pool_checked_out_connections",
+    "Connections currently checked out of a MongoDB connection pool",
+    ["address"],
+    multiprocess_mode="livesum"
+)
+MONGO_POOL_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    ["address"],
+    buckets=FAST_BUCKETS + DB_BUCKETS[-7:]
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongodb_pool_checkout_failures_total",
+    "Connection checkouts that failed, by reason",
+    ["address", "reason"]
+)
+MONGO_PING_LATENCY = Gauge(
+    "mongodb_ping_duration_seconds",
+    "Latency of the most recent health check ping (the slowest worker's)",
+    multiprocess_mode="livemax"
+)
+WRITE_BEHIND_PENDING = Gauge(
+    "write_behind_pending_documents",
+    "Documents queued in a write-behind buffer",
+    ["collection"],
+    multiprocess_mode="livesum"
+)
+WRITE_BEHIND_WRITES = Counter(
+    "write_behind_documents_total",
+    "Documents flushed by a write-behind buffer, by outcome",
+    ["collection", "outcome"]
+)
+WRITE_BEHIND_FLUSH_LATENCY = Histogram(
+    "write_behind_flush_duration_seconds",
+    "Time spent in one write-behind insert_many",
+    ["collection"],
+    buckets=DB_BUCKETS
+)
+ADMISSION_ACTIVE = Gauge(
+    "admission_active_requests",
+    "Requests admitted and in progress, by admission pool",
+    ["pool"],
+    multiprocess_mode="livesum"
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Requests waiting for admission, by admission pool",
+    ["pool"],
+    multiprocess_mode="livesum"
+)
+ADMISSION_WAIT = Histogram(
+    "admission_wait_seconds",
+    "Time admitted requests spent waiting in the admission queue",
+    ["pool"],
+    buckets=FAST_BUCKETS + DB_BUCKETS[-7:]
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Requests rejected with 503 by admission control, by pool and reason (queue_full, timeout)",
+    ["pool", "reason"]
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            # The router stores the matched route in the scope; use its
+            # template so path parameters don't create new label values
+            route = scope.get("route")
+            route_path = getattr(route, "path", "<unmatched>")
+            REQUEST_LATENCY.labels(method, route_path, str(status_code[0])).observe(
+                time.perf_counter() - start
+            )
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener recording per-collection command timings"""
+
+    def __init__(self):
+        self._collections: Dict[Tuple[int, int], str] = {}
+
+    @staticmethod
+    def _key(event) -> Tuple[int, int]:
+        return event.request_id, event.operation_id
+
+    def started(self, event):
+        command = event.command
+        collection = command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = command.get("collection")
+        self._collections[self._key(event)] = collection if isinstance(collection, str) else ""
+
+    def _observe(self, event, outcome: str):
+        collection = self._collections.pop(self._key(event), "")
+        MONGO_COMMAND_LATENCY.labels(collection, event.command_name, outcome).observe(
+            event.duration_micros / 1_000_000
+        )
+
+    def succeeded(self, event):
+        self._observe(event, "success")
+
+    def failed(self, event):
+        self._observe(event, "failure")
+
+
+class PoolStats:
+    """Usage counters for one connection pool"""
+
+    __slots__ = ("connections", "checked_out", "waiting", "checkouts", "failures", "wait_total", "wait_max")
+
+    def __init__(self):
+        self.connections = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.failures = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    pymongo pool listener tracking connection usage and checkout wait time.
+
+    Pool events are published from whichever thread runs the operation, so
+    counters are updated under a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[str, PoolStats] = {}
+
+    def _pool(self, event) -> PoolStats:
+        address = self._address(event)
+        pool = self._pools.get(address)
+        if pool is None:
+            pool = self._pools[address] = PoolStats()
+        return pool
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def _publish(self, event, pool: PoolStats):
+        address = self._address(event)
+        MONGO_POOL_CONNECTIONS.labels(address).set(pool.connections)
+        MONGO_POOL_CHECKED_OUT.labels(address).set(pool.checked_out)
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pool(event)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        address = self._address(event)
+        with self._lock:
+            self._pools.pop(address, None)
+            MONGO_POOL_CONNECTIONS.labels(address).set(0)
+            MONGO_POOL_CHECKED_OUT.labels(address).set(0)
+
+    def connection_created(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool.connections += 1
+            self._publish(event, pool)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool.connections = max(0, pool.connections - 1)
+            self._publish(event, pool)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._pool(event).waiting += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool.waiting = max(0, pool.waiting - 1)
+            pool.checked_out += 1
+            pool.checkouts += 1
+            pool.wait_total += event.duration
+            pool.wait_max = max(pool.wait_max, event.duration)
+            self._publish(event, pool)
+        MONGO_POOL_WAIT.labels(self._address(event)).observe(event.duration)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool.waiting = max(0, pool.waiting - 1)
+            pool.failures += 1
+        MONGO_POOL_CHECKOUT_FAILURES.labels(self._address(event), event.reason).inc()
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool.checked_out = max(0, pool.checked_out - 1)
+            self._publish(event, pool)
+
+    def snapshot(self, max_pool_size: int) -> Dict[str, Dict[str, Any]]:
+        """Per-server pool usage, with utilization relative to ``max_pool_size``"""
+        with self._lock:
+            return {
+                address: {
+                    "connections": pool.connections,
+                    "checked_out": pool.checked_out,
+                    "waiting": pool.waiting,
+                    "utilization": round(pool.checked_out / max_pool_size, 3) if max_pool_size else None,
+                    "checkouts": pool.checkouts,
+                    "checkout_failures": pool.failures,
+                    "avg_wait_ms": round(pool.wait_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+                    "max_wait_ms": round(pool.wait_max * 1000, 3),
+                }
+                for address, pool in self._pools.items()
+            }
+
+
+class CacheMetrics:
+    """Prometheus metrics an ``AsyncLRUCache`` updates as lookups happen"""
+
+    def __init__(self, prefix: str):
+        self.size = Gauge(f"{prefix}_size", "Entries currently cached", multiprocess_mode="livesum")
+        self.events = {
+            name: Counter(f"{prefix}_{name}", f"Cache {name}")
+            for name in ("hits", "misses", "coalesced", "evictions")
+        }
+
+
+class WorkerCollector:
+    """
+    Exports per-worker counters kept in shared memory by ``app.serve``.
+
+    Every worker can read all slots, so whichever worker answers a scrape
+    reports the request and restart counts of the whole pool. Registered on
+    ``metrics_registry()`` by the parent, before the workers are forked.
+    """
+
+    def __init__(self, requests, restarts, pids):
+        self.requests = requests
+        self.restarts = restarts
+        self.pids = pids
+
+    def collect(self):
+        requests = CounterMetricFamily(
+            "serve_worker_requests", "HTTP requests handled per worker slot", labels=["worker"]
+        )
+        restarts = CounterMetricFamily(
+            "serve_worker_restarts", "Times a worker slot was respawned", labels=["worker"]
+        )
+        pids = GaugeMetricFamily("serve_worker_pid", "Process ID currently serving a worker slot", labels=["worker"])
+        for slot in range(len(self.requests)):
+            requests.add_metric([str(slot)], self.requests[slot])
+            restarts.add_metric([str(slot)], self.restarts[slot])
+            pids.add_metric([str(slot)], self.pids[slot])
+        yield requests
+        yield restarts
+        yield pids
+
+
+mongo_command_metrics = MongoCommandMetrics()
+mongo_pool_metrics = MongoPoolMetrics()
+
+# Registry served by /metrics, created on first use
+_registry: Optional[CollectorRegistry] = None
+
+
+def metrics_registry() -> CollectorRegistry:
+    """
+    The registry ``/metrics`` exposes: this process's, or with
+    ``PROMETHEUS_MULTIPROC_DIR`` set, the metrics of every worker merged.
+    """
+    global _registry
+
+    if _registry is None:
+        if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+            _registry = CollectorRegistry()
+            MultiProcessCollector(_registry)
+        else:
+            _registry = REGISTRY
+    return _registry
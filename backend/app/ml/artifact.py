@@ -0,0 +1,230 @@
+"""
+Memory-mappable model artifact format.
+
+An artifact is a single file laid out as::
+
+    magic "CRMA" | format version (u16) | reserved (u16) | header length (u32)
+    JSON header (model metadata, array table, checksum), padded
+    data section: raw arrays, each aligned to 64 bytes
+
+Arrays are opened with ``numpy.memmap`` in read-only mode, so every worker
+process that loads the same artifact shares its pages through the OS page
+cache instead of holding a private unpickled copy. Loading only parses the
+header; array pages are faulted in on first use.
+
+The ``Mapped*`` classes below evaluate the stored parameters with NumPy and
+expose the subset of the scikit-learn interface used by ``CreditRiskMLModel``
+(``transform``, ``predict_proba``, ``classes_``, ``feature_importances_``).
+"""
+
+import hashlib
+import json
+import os
+import struct
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+MAGIC = b"CRMA"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct("<4sHHI")
+
+
+class ArtifactError(ValueError):
+    """Raised when an artifact is malformed, of an unknown version or corrupt"""
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_artifact(filepath: str, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]):
+    """
+    Write arrays and metadata to ``filepath``.
+
+    The file is written next to the target and renamed into place, so a
+    worker never maps a partially written artifact.
+    """
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        table[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _align(offset + array.nbytes)
+
+    data = bytearray(offset)
+    for name, array in arrays.items():
+        start = table[name]["offset"]
+        data[start:start + array.nbytes] = np.ascontiguousarray(array).tobytes()
+
+    header = dict(metadata)
+    header.update({
+        "format_version": FORMAT_VERSION,
+        "arrays": table,
+        "data_size": len(data),
+        "checksum": "sha256:" + hashlib.sha256(data).hexdigest(),
+    })
+    header_bytes = json.dumps(header, sort_keys=True).encode()
+    data_start = _align(_PREAMBLE.size + len(header_bytes))
+
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, 0, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(bytes(data_start - _PREAMBLE.size - len(header_bytes)))
+        f.write(data)
+    os.replace(tmp_path, filepath)
+
+
+def load_artifact(filepath: str, verify: bool = True) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Open an artifact and memory-map its arrays.
+
+    Args:
+        filepath: Path to the artifact
+        verify: Check the data section checksum. This reads every page
+            once; pass False to defer page loading entirely.
+
+    Returns:
+        Tuple of (metadata, arrays)
+    """
+    with open(filepath, "rb") as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size:
+            raise ArtifactError(f"Truncated artifact: {filepath}")
+        magic, version, _, header_length = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ArtifactError(f"Not a model artifact: {filepath}")
+        if version != FORMAT_VERSION:
+            raise ArtifactError(f"Unsupported artifact version {version} (expected {FORMAT_VERSION})")
+        header = json.loads(f.read(header_length))
+
+    data_start = _align(_PREAMBLE.size + header_length)
+    if os.path.getsize(filepath) != data_start + header["data_size"]:
+        raise ArtifactError(f"Truncated artifact: {filepath}")
+
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        shape = tuple(entry["shape"])
+        if 0 in shape:
+            arrays[name] = np.empty(shape, dtype=np.dtype(entry["dtype"]))
+            continue
+        arrays[name] = np.memmap(
+            filepath, dtype=np.dtype(entry["dtype"]), mode="r",
+            offset=data_start + entry["offset"], shape=shape
+        )
+
+    if verify and header["data_size"]:
+        data = np.memmap(filepath, dtype=np.uint8, mode="r", offset=data_start, shape=(header["data_size"],))
+        if "sha256:" + hashlib.sha256(data).hexdigest() != header["checksum"]:
+            raise ArtifactError(f"Checksum mismatch: {filepath}")
+
+    return header, arrays
+
+
+class MappedStandardScaler:
+    """Read-only stand-in for a fitted ``StandardScaler``"""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class MappedForestClassifier:
+    """
+    Read-only stand-in for a fitted ``RandomForestClassifier``.
+
+    All trees are stored back to back in flat node arrays; child indices are
+    absolute positions in those arrays and ``-1`` marks a leaf. Prediction
+    walks every tree for every sample at once, one tree level per step.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], classes: np.ndarray, max_depth: int):
+        self.roots = arrays["roots"]
+        self.children_left = arrays["children_left"]
+        self.children_right = arrays["children_right"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.value = arrays["value"]
+        self.feature_importances_ = arrays["feature_importances"]
+        self.classes_ = classes
+        self.max_depth = max_depth
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        # Trees compare float32 features against float64 thresholds, as in sklearn
+        X = np.asarray(X, dtype=np.float32)
+        n_samples = X.shape[0]
+        nodes = np.repeat(np.asarray(self.roots)[:, np.newaxis], n_samples, axis=1)
+        samples = np.broadcast_to(np.arange(n_samples), nodes.shape)
+
+        for _ in range(self.max_depth):
+            left = self.children_left[nodes]
+            is_leaf = left == -1
+            if is_leaf.all():
+                break
+            go_left = X[samples, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(is_leaf, nodes, np.where(go_left, left, self.children_right[nodes]))
+
+        return self.value[nodes].mean(axis=0)
+
+
+class MappedLinearClassifier:
+    """
+    Read-only stand-in for a fitted linear classifier: multinomial
+    ``LogisticRegression`` or one-vs-rest ``SGDClassifier`` (``multi_class="ovr"``)
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], classes: np.ndarray, multi_class: str = "multinomial"):
+        self.coef_ = arrays["coef"]
+        self.intercept_ = arrays["intercept"]
+        self.classes_ = classes
+        self.multi_class = multi_class
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        scores = np.asarray(X, dtype=np.float64) @ self.coef_.T + self.intercept_
+        if scores.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        if self.multi_class == "ovr":
+            # Per-class sigmoids, normalized (as SGDClassifier.predict_proba)
+            scores = 1.0 / (1.0 + np.exp(-scores))
+            scores /= scores.sum(axis=1, keepdims=True)
+            return scores
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+
+def forest_arrays(forest) -> Tuple[Dict[str, np.ndarray], int]:
+    """Flatten a fitted ``RandomForestClassifier`` into node arrays"""
+    roots, lefts, rights, features, thresholds, values = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        roots.append(offset)
+        for children, out in ((tree.children_left, lefts), (tree.children_right, rights)):
+            out.append(np.where(children == -1, -1, children + offset))
+        # Leaves have feature -2; point them at a real column so gathers stay in bounds
+        features.append(np.where(tree.feature < 0, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        value = tree.value[:, 0, :]
+        values.append(value / value.sum(axis=1, keepdims=True))
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    arrays = {
+        "roots": np.array(roots, dtype=np.int64),
+        "children_left": np.concatenate(lefts).astype(np.int64),
+        "children_right": np.concatenate(rights).astype(np.int64),
+        "feature": np.concatenate(features).astype(np.int64),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "value": np.concatenate(values).astype(np.float64),
+        "feature_importances": np.asarray(forest.feature_importances_, dtype=np.float64),
+    }
+    return arrays, max_depth
@@ -6,14 +6,30 @@ credit risk modeling. Currently uses rule-based scoring, but can be extended
 with trained models.
 """
 
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
 import numpy as np
-from typing import Tuple, List
-import pickle
+from typing import List, Optional, Tuple
 import os
 
+from app.ml.artifact import (
+    ArtifactError, MappedForestClassifier, MappedLinearClassifier, MappedStandardScaler,
+    forest_arrays, load_artifact, save_artifact
+)
+
+# Feature order used by prepare_features and stored in model artifacts
+FEATURE_NAMES = [
+    "avg_income",
+    "income_variance",
+    "upi_txn_count",
+    "bill_payment_score",
+    "withdrawal_ratio",
+    "months_active"
+]
+
+MODEL_TYPES = ("random_forest", "logistic_regression", "sgd")
+
+# Labels used in training data (0: High Risk, 1: Medium Risk, 2: Low Risk)
+RISK_LABELS = (0, 1, 2)
+
 
 class CreditRiskMLModel:
     """
@@ -21,6 +37,9 @@ class CreditRiskMLModel:
     
     In production, this would be trained on historical data and used
     to predict credit risk categories.
+    
+    scikit-learn is only imported when a model is trained; a model loaded
+    from an artifact predicts with NumPy alone.
     """
     
     def __init__(self, model_type: str = "random_forest"):
@@ -28,19 +47,32 @@ class CreditRiskMLModel:
         Initialize ML model.
         
         Args:
-            model_type: Type of model - 'random_forest' or 'logistic_regression'
+            model_type: Type of model - 'random_forest', 'logistic_regression'
+                or 'sgd' (logistic loss, trainable incrementally with partial_fit)
         """
+        if model_type not in MODEL_TYPES:
+            raise ValueError(f"Unknown model type: {model_type}")
+        
         self.model_type = model_type
-        self.scaler = StandardScaler()
+        # Estimators are created by train() or load_model()
+        self.scaler = None
+        self.model = None
+        self.is_trained = False
+    
+    def _create_estimators(self):
+        """Create unfitted scikit-learn estimators for ``model_type``"""
+        from sklearn.preprocessing import StandardScaler
         
-        if model_type == "random_forest":
+        self.scaler = StandardScaler()
+        if self.model_type == "random_forest":
+            from sklearn.ensemble import RandomForestClassifier
             self.model = RandomForestClassifier(n_estimators=100, random_state=42)
-        elif model_type == "logistic_regression":
-            self.model = LogisticRegression(random_state=42, max_iter=1000)
+        elif self.model_type == "sgd":
+            from sklearn.linear_model import SGDClassifier
+            self.model = SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42)
         else:
-            raise ValueError(f"Unknown model type: {model_type}")
-        
-        self.is_trained = False
+            from sklearn.linear_model import LogisticRegression
+            self.model = LogisticRegression(random_state=42, max_iter=1000)
     
     def prepare_features(
         self,
@@ -76,6 +108,8 @@ class CreditRiskMLModel:
             X: Feature matrix
             y: Target labels (0: High Risk, 1: Medium Risk, 2: Low Risk)
         """
+        self._create_estimators()
+        
         # Scale features
         X_scaled = self.scaler.fit_transform(X)
         
@@ -85,6 +119,35 @@ class CreditRiskMLModel:
         
         print(f"{self.model_type} model trained successfully")
     
+    def partial_fit_scaler(self, X: np.ndarray):
+        """
+        Update the feature scaler's running mean and variance with one chunk.
+        
+        Starts a new, untrained model on the first call (or after
+        ``load_model``, whose scaler is read-only). Feed every chunk through
+        here before ``partial_fit`` so all chunks are scaled alike.
+        """
+        if self.scaler is None or not hasattr(self.scaler, "partial_fit"):
+            self._create_estimators()
+            self.is_trained = False
+        self.scaler.partial_fit(X)
+    
+    def partial_fit(self, X: np.ndarray, y: np.ndarray):
+        """
+        Train an ``sgd`` model incrementally on one chunk.
+        
+        Args:
+            X: Feature matrix chunk
+            y: Target labels for the chunk
+        """
+        if self.model_type != "sgd":
+            raise ValueError("Incremental training is only available for the sgd model")
+        if self.scaler is None or not hasattr(self.scaler, "partial_fit"):
+            raise ValueError("Fit the scaler with partial_fit_scaler first")
+        
+        self.model.partial_fit(self.scaler.transform(X), y, classes=np.array(RISK_LABELS))
+        self.is_trained = True
+    
     def predict_risk(
         self,
         avg_income: float,
@@ -109,19 +172,39 @@ class CreditRiskMLModel:
             bill_payment_score, withdrawal_ratio, months_active
         )
         
+        risk_categories, confidences = self.predict_risk_batch(features)
+        
+        return risk_categories[0], float(confidences[0])
+    
+    def predict_risk_batch(self, features: np.ndarray) -> Tuple[List[str], np.ndarray]:
+        """
+        Predict credit risk categories for a feature matrix.
+        
+        Class and confidence both come from a single ``predict_proba`` call,
+        so the per-call overhead of the estimator is paid once per batch.
+        
+        Args:
+            features: (n, 6) matrix with columns in ``prepare_features`` order
+            
+        Returns:
+            Tuple of (risk_categories, confidence_scores)
+        """
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        
         # Scale features
         features_scaled = self.scaler.transform(features)
         
         # Predict
-        prediction = self.model.predict(features_scaled)[0]
-        probabilities = self.model.predict_proba(features_scaled)[0]
+        probabilities = self.model.predict_proba(features_scaled)
+        best = probabilities.argmax(axis=1)
         
         # Map prediction to risk category
         risk_map = {0: "High Risk", 1: "Medium Risk", 2: "Low Risk"}
-        risk_category = risk_map[prediction]
-        confidence = probabilities[prediction]
+        risk_categories = [risk_map[label] for label in self.model.classes_[best].tolist()]
+        confidences = probabilities[np.arange(len(best)), best]
         
-        return risk_category, confidence
+        return risk_categories, confidences
     
     def get_feature_importance(self) -> List[Tuple[str, float]]:
         """
@@ -136,89 +219,117 @@ class CreditRiskMLModel:
         if self.model_type != "random_forest":
             raise ValueError("Feature importance only available for Random Forest")
         
-        feature_names = [
-            "avg_income",
-            "income_variance",
-            "upi_txn_count",
-            "bill_payment_score",
-            "withdrawal_ratio",
-            "months_active"
-        ]
-        
-        importances = self.model.feature_importances_
+        importances = np.asarray(self.model.feature_importances_).tolist()
         
         return sorted(
-            zip(feature_names, importances),
+            zip(FEATURE_NAMES, importances),
             key=lambda x: x[1],
             reverse=True
         )
     
     def save_model(self, filepath: str):
-        """Save trained model to disk"""
+        """
+        Save trained model to disk as a memory-mappable artifact.
+        
+        See ``app.ml.artifact`` for the file format.
+        """
         if not self.is_trained:
             raise ValueError("Cannot save untrained model")
         
-        model_data = {
-            "model": self.model,
-            "scaler": self.scaler,
-            "model_type": self.model_type
+        arrays = {
+            "scaler_mean": self.scaler.mean_,
+            "scaler_scale": self.scaler.scale_,
+            "classes": np.asarray(self.model.classes_, dtype=np.int64),
+        }
+        metadata = {
+            "model_type": self.model_type,
+            "feature_names": FEATURE_NAMES,
         }
         
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_data, f)
+        if self.model_type == "random_forest":
+            model_arrays, max_depth = forest_arrays(self.model)
+            metadata["max_depth"] = max_depth
+        else:
+            model_arrays = {"coef": self.model.coef_, "intercept": self.model.intercept_}
+            # SGDClassifier trains one-vs-rest; LogisticRegression is multinomial
+            metadata["multi_class"] = "ovr" if self.model_type == "sgd" else "multinomial"
+        arrays.update(model_arrays)
+        
+        save_artifact(filepath, arrays, metadata)
         
         print(f"Model saved to {filepath}")
     
-    def load_model(self, filepath: str):
-        """Load trained model from disk"""
+    def load_model(self, filepath: str, verify: bool = True):
+        """
+        Load trained model from disk.
+        
+        The artifact's arrays are memory-mapped read-only, so the loaded
+        model can predict but not be retrained in place.
+        """
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"Model file not found: {filepath}")
         
-        with open(filepath, 'rb') as f:
-            model_data = pickle.load(f)
+        metadata, arrays = load_artifact(filepath, verify=verify)
+        if metadata["feature_names"] != FEATURE_NAMES:
+            raise ArtifactError(f"Artifact features {metadata['feature_names']} do not match {FEATURE_NAMES}")
         
-        self.model = model_data["model"]
-        self.scaler = model_data["scaler"]
-        self.model_type = model_data["model_type"]
+        classes = arrays["classes"]
+        self.model_type = metadata["model_type"]
+        self.scaler = MappedStandardScaler(arrays["scaler_mean"], arrays["scaler_scale"])
+        if self.model_type == "random_forest":
+            self.model = MappedForestClassifier(arrays, classes, metadata["max_depth"])
+        else:
+            self.model = MappedLinearClassifier(arrays, classes, metadata.get("multi_class", "multinomial"))
         self.is_trained = True
         
         print(f"Model loaded from {filepath}")
 
 
 # Example usage (for future implementation)
-def create_dummy_training_data():
+def label_risk(X: np.ndarray) -> np.ndarray:
+    """
+    Label feature rows with the rule-based risk class, vectorized.
+    
+    Args:
+        X: (n, 6) matrix with columns in ``FEATURE_NAMES`` order
+        
+    Returns:
+        Labels (0: High Risk, 1: Medium Risk, 2: Low Risk)
+    """
+    score = (
+        np.where(X[:, 1] < 0.3, 25, 0)
+        + np.where(X[:, 2] > 30, 20, 0)
+        + np.where(X[:, 3] > 7, 20, 0)
+        + np.where(X[:, 5] >= 12, 25, 0)
+        - np.where(X[:, 4] > 0.7, 10, 0)
+    )
+    return np.select([score >= 70, score >= 40], [2, 1], default=0)
+
+
+def create_dummy_training_data(n_samples: int = 1000, seed: Optional[int] = 42):
     """
     Create dummy training data for demonstration.
     In production, this would come from historical data.
+    
+    Args:
+        n_samples: Number of rows
+        seed: Random seed; None for fresh randomness
     """
-    np.random.seed(42)
-    n_samples = 1000
+    rng = np.random.RandomState(seed)
     
     # Generate synthetic features
-    X = np.random.rand(n_samples, 6)
-    X[:, 0] *= 50000  # avg_income
-    X[:, 1] *= 1      # income_variance
-    X[:, 2] *= 100    # upi_txn_count
-    X[:, 3] *= 10     # bill_payment_score
-    X[:, 4] *= 1      # withdrawal_ratio
-    X[:, 5] *= 36     # months_active
+    X = rng.rand(n_samples, 6)
+    X *= np.array([
+        50000,  # avg_income
+        1,      # income_variance
+        100,    # upi_txn_count
+        10,     # bill_payment_score
+        1,      # withdrawal_ratio
+        36,     # months_active
+    ])
     
     # Generate synthetic labels based on simple rules
-    y = np.zeros(n_samples, dtype=int)
-    for i in range(n_samples):
-        score = 0
-        if X[i, 1] < 0.3: score += 25
-        if X[i, 2] > 30: score += 20
-        if X[i, 3] > 7: score += 20
-        if X[i, 5] >= 12: score += 25
-        if X[i, 4] > 0.7: score -= 10
-        
-        if score >= 70:
-            y[i] = 2  # Low Risk
-        elif score >= 40:
-            y[i] = 1  # Medium Risk
-        else:
-            y[i] = 0  # High Risk
+    y = label_risk(X)
     
     return X, y
 
@@ -0,0 +1,237 @@
+"""
+Micro-batching inference service for ``CreditRiskMLModel``.
+
+Concurrent prediction requests are queued and flushed to the model as a
+single feature matrix once ``max_batch_size`` requests are waiting or
+``max_wait_ms`` has passed since the first one arrived. Scaling and
+``predict_proba`` run in a worker thread so the event loop keeps serving
+requests while a batch is being scored.
+
+NumPy and the model module are imported when the service starts (or by
+``preload_ml``), not when this module is imported, so workers that only
+serve rule-based scoring never load them.
+"""
+
+import asyncio
+import importlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from app.metrics import ML_INFERENCE_BATCH_SIZE, ML_INFERENCE_LATENCY
+
+if TYPE_CHECKING:
+    from app.ml.model import CreditRiskMLModel
+
+# Inference service settings
+ML_MODEL_PATH = os.getenv("ML_MODEL_PATH")
+# Import the NumPy-backed modules during startup instead of on first use
+ML_PRELOAD = os.getenv("ML_PRELOAD", "false").lower() in ("1", "true", "yes")
+# Modules imported by preload_ml; scikit-learn is only needed for training
+PRELOAD_MODULES = ("numpy", "app.batch_scoring", "app.ml.model")
+ML_BATCH_MAX_SIZE = int(os.getenv("ML_BATCH_MAX_SIZE", "64"))
+ML_BATCH_MAX_WAIT_MS = float(os.getenv("ML_BATCH_MAX_WAIT_MS", "5"))
+
+
+class MLInferenceService:
+    """Queues prediction requests and scores them in batches"""
+
+    def __init__(
+        self,
+        model: "CreditRiskMLModel",
+        max_batch_size: int = ML_BATCH_MAX_SIZE,
+        max_wait_ms: float = ML_BATCH_MAX_WAIT_MS
+    ):
+        if not model.is_trained:
+            raise ValueError("Model must be trained before serving predictions")
+
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # One inference at a time; requests arriving meanwhile form the next batch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ml-inference")
+        self.batches = 0
+        self.predictions = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching loop and fail any requests still queued"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("ML inference service stopped"))
+
+        self._executor.shutdown(wait=True)
+
+    async def predict(
+        self,
+        avg_income: float,
+        income_variance: float,
+        upi_txn_count: int,
+        bill_payment_score: int,
+        withdrawal_ratio: float,
+        months_active: int
+    ) -> Tuple[str, float]:
+        """
+        Predict the risk category for one applicant.
+
+        Returns:
+            Tuple of (risk_category, confidence_score)
+        """
+        if self._worker is None:
+            raise RuntimeError("ML inference service is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        features = (
+            avg_income, income_variance, upi_txn_count,
+            bill_payment_score, withdrawal_ratio, months_active
+        )
+        self._queue.put_nowait((features, future))
+        return await future
+
+    async def _collect_batch(self) -> List[tuple]:
+        """Wait for the first request, then gather more until size or time runs out"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        import numpy as np
+
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            futures = [future for _, future in batch]
+            features = np.array([features for features, _ in batch], dtype=np.float64)
+
+            start = time.perf_counter()
+            try:
+                risk_categories, confidences = await loop.run_in_executor(
+                    self._executor, self.model.predict_risk_batch, features
+                )
+            except asyncio.CancelledError:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(RuntimeError("ML inference service stopped"))
+                raise
+            except Exception as exc:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            ML_INFERENCE_LATENCY.observe(time.perf_counter() - start)
+            ML_INFERENCE_BATCH_SIZE.observe(len(batch))
+            self.batches += 1
+            self.predictions += len(batch)
+            for future, risk_category, confidence in zip(futures, risk_categories, confidences.tolist()):
+                # Callers may have been cancelled while the batch was scored
+                if not future.done():
+                    future.set_result((risk_category, confidence))
+
+
+# Service started by the application lifespan, if a model is configured
+_inference_service: Optional[MLInferenceService] = None
+# Model loaded before forking workers (see app.serve), keyed by its path
+_preloaded_model: Optional[Tuple[str, "CreditRiskMLModel"]] = None
+
+
+def preload_ml(enabled: bool = ML_PRELOAD) -> float:
+    """
+    Import the ML and vectorized scoring modules up front.
+
+    Returns the seconds spent importing (0 when disabled or already loaded).
+    """
+    if not enabled:
+        return 0.0
+
+    start = time.perf_counter()
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    elapsed = time.perf_counter() - start
+    print(f"ML modules preloaded in {elapsed * 1000:.0f} ms")
+    return elapsed
+
+
+def preload_model(model_path: Optional[str] = ML_MODEL_PATH) -> Optional["CreditRiskMLModel"]:
+    """
+    Load the model now so ``start_inference_service`` reuses it.
+
+    Called by the pre-fork server in the parent process: workers inherit
+    the loaded model and its memory-mapped arrays instead of each opening
+    and verifying the artifact again.
+    """
+    global _preloaded_model
+
+    if not model_path:
+        return None
+
+    from app.ml.model import CreditRiskMLModel
+
+    model = CreditRiskMLModel()
+    model.load_model(model_path)
+    _preloaded_model = (model_path, model)
+    return model
+
+
+async def start_inference_service(model_path: Optional[str] = ML_MODEL_PATH) -> Optional[MLInferenceService]:
+    """Load the model once and start the batching service"""
+    global _inference_service
+
+    if not model_path:
+        print("ML_MODEL_PATH not set - ML inference service disabled")
+        return None
+
+    if _preloaded_model is not None and _preloaded_model[0] == model_path:
+        model = _preloaded_model[1]
+    else:
+        from app.ml.model import CreditRiskMLModel
+
+        model = CreditRiskMLModel()
+        model.load_model(model_path)
+    _inference_service = MLInferenceService(model)
+    await _inference_service.start()
+    print(f"ML inference service started ({model.model_type})")
+    return _inference_service
+
+
+async def stop_inference_service():
+    """Stop the batching service started by ``start_inference_service``"""
+    global _inference_service
+
+    if _inference_service is not None:
+        await _inference_service.stop()
+        _inference_service = None
+
+
+def get_inference_service() -> Optional[MLInferenceService]:
+    """Get the running inference service, or None if ML is disabled"""
+    return _inference_service
@@ -0,0 +1,170 @@
+"""
+Shadow ML scoring.
+
+When the ML inference service is running, a sample of scored applicants
+is also sent to the model in the background. The response never waits
+for it: the prediction goes through the service's micro-batching queue
+and its single inference thread, and the result is stored on the
+applicant's ``credit_profiles`` document as::
+
+    ml_shadow: {risk_category, confidence, agrees, inference_ms, model_type, scored_at}
+
+where ``agrees`` compares the model's category with the rule engine's and
+``inference_ms`` is the time from queueing to result. With write-behind
+enabled the result is usually added to the still-queued document, so it
+costs no extra write.
+
+``ML_SHADOW_SAMPLE_RATE`` caps the CPU spent on shadow predictions under
+load, and at most ``ML_SHADOW_MAX_PENDING`` predictions are in flight per
+worker; applicants beyond that are not shadow-scored.
+"""
+
+import asyncio
+import os
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from pymongo.errors import PyMongoError
+
+from app.database import get_database
+from app.metrics import ML_SHADOW_LATENCY, ML_SHADOW_PREDICTIONS
+from app.ml.serving import MLInferenceService, get_inference_service
+from app.write_behind import get_credit_profile_buffer
+
+# Shadow scoring settings; a rate of 0 disables it
+ML_SHADOW_SAMPLE_RATE = float(os.getenv("ML_SHADOW_SAMPLE_RATE", "1.0"))
+ML_SHADOW_MAX_PENDING = int(os.getenv("ML_SHADOW_MAX_PENDING", "1000"))
+# Seconds to wait for in-flight predictions at shutdown
+ML_SHADOW_DRAIN_TIMEOUT = 5.0
+# Attempts at storing a result whose profile is still being written
+STORE_ATTEMPTS = 3
+
+
+class ShadowScorer:
+    """Runs sampled background predictions and records them on credit profiles"""
+
+    def __init__(
+        self,
+        service: MLInferenceService,
+        sample_rate: float = ML_SHADOW_SAMPLE_RATE,
+        max_pending: int = ML_SHADOW_MAX_PENDING
+    ):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("ML_SHADOW_SAMPLE_RATE must be between 0 and 1")
+
+        self.service = service
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def submit(self, credit_profile: Dict[str, Any], months_active: int):
+        """
+        Schedule a shadow prediction for a stored credit profile.
+
+        Returns immediately; the profile must already carry its ``_id``.
+        """
+        if random.random() >= self.sample_rate:
+            ML_SHADOW_PREDICTIONS.labels("sampled_out").inc()
+            return
+        if len(self._tasks) >= self.max_pending:
+            ML_SHADOW_PREDICTIONS.labels("dropped").inc()
+            return
+
+        task = asyncio.create_task(self._score(credit_profile, months_active))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, credit_profile: Dict[str, Any], months_active: int):
+        start = time.perf_counter()
+        try:
+            risk_category, confidence = await self.service.predict(
+                avg_income=credit_profile["avg_income"],
+                income_variance=credit_profile["income_variance"],
+                upi_txn_count=credit_profile["upi_txn_count"],
+                bill_payment_score=credit_profile["bill_payment_score"],
+                withdrawal_ratio=credit_profile["withdrawal_ratio"],
+                months_active=months_active
+            )
+        except Exception as exc:
+            ML_SHADOW_PREDICTIONS.labels("failed").inc()
+            print(f"Shadow prediction failed: {exc}")
+            return
+        elapsed = time.perf_counter() - start
+        ML_SHADOW_LATENCY.observe(elapsed)
+
+        agrees = risk_category == credit_profile["risk_category"]
+        ML_SHADOW_PREDICTIONS.labels("agree" if agrees else "disagree").inc()
+        shadow = {
+            "risk_category": risk_category,
+            "confidence": round(confidence, 4),
+            "agrees": agrees,
+            "inference_ms": round(elapsed * 1000, 3),
+            "model_type": self.service.model.model_type,
+            "scored_at": datetime.utcnow(),
+        }
+        try:
+            await store_shadow_result(credit_profile["_id"], shadow)
+        except PyMongoError as exc:
+            print(f"Shadow result for {credit_profile['_id']} not stored: {exc}")
+
+    async def drain(self, timeout: float = ML_SHADOW_DRAIN_TIMEOUT):
+        """Wait for in-flight predictions, cancelling any still running after ``timeout``"""
+        if not self._tasks:
+            return
+        _, still_running = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        await asyncio.gather(*still_running, return_exceptions=True)
+
+
+async def store_shadow_result(credit_profile_id, shadow: Dict[str, Any]):
+    """Store a shadow result on its credit profile, wherever the profile is"""
+    fields = {"ml_shadow": shadow}
+    buffer = get_credit_profile_buffer()
+    if buffer is not None and buffer.amend(credit_profile_id, fields):
+        return
+
+    collection = get_database().credit_profiles
+    for attempt in range(1, STORE_ATTEMPTS + 1):
+        result = await collection.update_one({"_id": credit_profile_id}, {"$set": fields})
+        if result.matched_count or buffer is None or attempt == STORE_ATTEMPTS:
+            return
+        # The write-behind insert carrying the profile is still in flight
+        await asyncio.sleep(buffer.flush_interval * attempt)
+
+
+# Scorer started by the application lifespan, if the inference service runs
+_shadow_scorer: Optional[ShadowScorer] = None
+
+
+def start_shadow_scoring(sample_rate: float = ML_SHADOW_SAMPLE_RATE) -> Optional[ShadowScorer]:
+    """Start shadow scoring if the inference service is running and sampling is on"""
+    global _shadow_scorer
+
+    service = get_inference_service()
+    if service is None or sample_rate <= 0:
+        return None
+    _shadow_scorer = ShadowScorer(service, sample_rate)
+    print(f"ML shadow scoring enabled (sample rate {sample_rate:g})")
+    return _shadow_scorer
+
+
+async def stop_shadow_scoring():
+    """Finish in-flight shadow predictions; call before the inference service stops"""
+    global _shadow_scorer
+
+    if _shadow_scorer is not None:
+        await _shadow_scorer.drain()
+        _shadow_scorer = None
+
+
+def submit_shadow(credit_profile: Dict[str, Any], months_active: int):
+    """Shadow-score a stored credit profile, if shadow scoring is enabled"""
+    if _shadow_scorer is not None:
+        _shadow_scorer.submit(credit_profile, months_active)
@@ -0,0 +1,307 @@
+"""
+Out-of-core training for ``CreditRiskMLModel``.
+
+Training data is read in fixed-size chunks from one of three sources, so
+memory stays bounded however many profiles there are:
+
+- ``mongo_source``: stored ``credit_profiles`` (labelled with their rule-based
+  risk category) joined with the users' ``months_active``
+- ``csv_source``: a CSV file with a header row holding ``FEATURE_NAMES`` and
+  a ``risk_label`` (0-2) or ``risk_category`` column
+- ``synthetic_source``: ``create_dummy_training_data`` generated chunk by chunk
+
+The ``sgd`` model trains incrementally: one pass fits the scaler's running
+mean and variance with ``partial_fit``, then each epoch feeds every chunk
+to ``SGDClassifier.partial_fit``. Forests (and ``logistic_regression``)
+need all their rows at once, so they are fitted on a uniform reservoir
+sample of at most ``max_samples`` rows drawn chunk by chunk.
+
+Usage (from backend/):
+    python -m app.ml.training --model-type sgd --source mongo --output model.crma
+    python -m app.ml.training --model-type random_forest --source profiles.csv --max-samples 200000
+    python -m app.ml.training --source synthetic --samples 5000000 --chunk-size 100000
+"""
+
+import resource
+import time
+import warnings
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Optional, Sequence, Tuple
+
+import numpy as np
+from bson import ObjectId
+
+from app.ml.model import FEATURE_NAMES, CreditRiskMLModel, create_dummy_training_data
+from app.scoring import RISK_CATEGORIES
+
+DEFAULT_CHUNK_SIZE = 50000
+# Rows kept for estimators that cannot train incrementally
+DEFAULT_MAX_SAMPLES = 200000
+
+Chunk = Tuple[np.ndarray, np.ndarray]
+# Returns a fresh iterator over (X, y) chunks on every call
+ChunkSource = Callable[[], AsyncIterator[Chunk]]
+
+
+@dataclass
+class TrainingReport:
+    """Throughput and memory of one training run"""
+    model_type: str
+    rows: int
+    passes: int
+    fitted_rows: int
+    seconds: float
+    peak_rss_mb: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.model_type}: {self.rows} rows in {self.passes} pass(es), fitted on {self.fitted_rows}, "
+            f"{self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s), peak RSS {self.peak_rss_mb:.1f} MB"
+        )
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def synthetic_source(n_samples: int, chunk_size: int = DEFAULT_CHUNK_SIZE, seed: int = 42) -> ChunkSource:
+    """Synthetic rows from ``create_dummy_training_data``, the same on every pass"""
+    async def chunks():
+        for index, start in enumerate(range(0, n_samples, chunk_size)):
+            yield create_dummy_training_data(min(chunk_size, n_samples - start), seed=seed + index)
+
+    return chunks
+
+
+def csv_source(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ChunkSource:
+    """Rows of a CSV file, parsed ``chunk_size`` lines at a time"""
+    with open(path) as csv_file:
+        header = csv_file.readline().strip().split(",")
+
+    missing = [name for name in FEATURE_NAMES if name not in header]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    columns = [header.index(name) for name in FEATURE_NAMES]
+    converters = {}
+    if "risk_label" in header:
+        columns.append(header.index("risk_label"))
+    elif "risk_category" in header:
+        columns.append(header.index("risk_category"))
+        # Keyed by file column
+        converters[columns[-1]] = lambda value: RISK_CATEGORIES.index(value.strip().strip('"'))
+    else:
+        raise ValueError(f"{path} has neither a risk_label nor a risk_category column")
+
+    async def chunks():
+        with open(path) as csv_file:
+            csv_file.readline()
+            while True:
+                with warnings.catch_warnings():
+                    # loadtxt warns when the file is exhausted
+                    warnings.simplefilter("ignore", UserWarning)
+                    block = np.loadtxt(
+                        csv_file, delimiter=",", usecols=columns, converters=converters,
+                        max_rows=chunk_size, ndmin=2
+                    )
+                if not len(block):
+                    break
+                yield block[:, :-1], block[:, -1].astype(np.int64)
+
+    return chunks
+
+
+def mongo_source(db, chunk_size: int = DEFAULT_CHUNK_SIZE, limit: int = 0) -> ChunkSource:
+    """
+    Stored credit profiles in ``_id`` order, labelled with their risk category.
+
+    ``months_active`` is read from the user's current document; profiles of
+    deleted users are skipped.
+    """
+    profile_fields = FEATURE_NAMES[:-1]
+    projection = {"user_id": 1, "risk_category": 1, **{field: 1 for field in profile_fields}}
+
+    async def to_chunk(profiles) -> Optional[Chunk]:
+        user_ids = list({ObjectId(profile["user_id"]) for profile in profiles})
+        months_active = {}
+        async for user in db.users.find({"_id": {"$in": user_ids}}, {"months_active": 1}):
+            months_active[user["_id"]] = user["months_active"]
+
+        rows = [
+            [profile[field] for field in profile_fields] + [months_active[ObjectId(profile["user_id"])]]
+            for profile in profiles
+            if ObjectId(profile["user_id"]) in months_active
+        ]
+        if not rows:
+            return None
+        labels = [
+            RISK_CATEGORIES.index(profile["risk_category"])
+            for profile in profiles
+            if ObjectId(profile["user_id"]) in months_active
+        ]
+        return np.array(rows, dtype=np.float64), np.array(labels, dtype=np.int64)
+
+    async def chunks():
+        cursor = db.credit_profiles.find({}, projection).sort("_id", 1).batch_size(chunk_size)
+        if limit:
+            cursor = cursor.limit(limit)
+        profiles = []
+        async for profile in cursor:
+            profiles.append(profile)
+            if len(profiles) == chunk_size:
+                chunk = await to_chunk(profiles)
+                profiles = []
+                if chunk is not None:
+                    yield chunk
+        if profiles:
+            chunk = await to_chunk(profiles)
+            if chunk is not None:
+                yield chunk
+
+    return chunks
+
+
+class Reservoir:
+    """Uniform random sample of at most ``capacity`` rows from a stream of chunks"""
+
+    def __init__(self, capacity: int, n_features: int, seed: int = 42):
+        self.capacity = capacity
+        self.X = np.empty((capacity, n_features))
+        self.y = np.empty(capacity, dtype=np.int64)
+        self.seen = 0
+        self._rng = np.random.RandomState(seed)
+
+    def add(self, X: np.ndarray, y: np.ndarray):
+        # Fill the free slots first
+        free = max(self.capacity - self.seen, 0)
+        fill = min(free, len(X))
+        self.X[self.seen:self.seen + fill] = X[:fill]
+        self.y[self.seen:self.seen + fill] = y[:fill]
+        self.seen += fill
+        X, y = X[fill:], y[fill:]
+        if not len(X):
+            return
+
+        # Algorithm R, vectorized: row i of the stream replaces a random
+        # slot with probability capacity / (i + 1); later rows win ties
+        positions = self._rng.randint(0, np.arange(self.seen, self.seen + len(X)) + 1)
+        keep = positions < self.capacity
+        self.X[positions[keep]] = X[keep]
+        self.y[positions[keep]] = y[keep]
+        self.seen += len(X)
+
+    def sample(self) -> Chunk:
+        size = min(self.seen, self.capacity)
+        return self.X[:size], self.y[:size]
+
+
+async def train_streaming(
+    model: CreditRiskMLModel,
+    source: ChunkSource,
+    epochs: int = 1,
+    max_samples: int = DEFAULT_MAX_SAMPLES,
+    seed: int = 42
+) -> TrainingReport:
+    """
+    Train ``model`` from a chunk source without loading the whole dataset.
+
+    Args:
+        model: Model to train; its ``model_type`` selects the strategy
+        source: Chunk source, called once per pass
+        epochs: Passes over the data for the ``sgd`` model
+        max_samples: Reservoir size for the other model types
+        seed: Seed for shuffling and sampling
+
+    Returns:
+        Rows read, rows fitted, throughput and peak memory
+    """
+    start = time.perf_counter()
+    rows = 0
+
+    if model.model_type == "sgd":
+        async for X, _ in source():
+            model.partial_fit_scaler(X)
+            rows += len(X)
+        if not rows:
+            raise ValueError("No training data")
+
+        rng = np.random.RandomState(seed)
+        fitted_rows = rows
+        for _ in range(epochs):
+            async for X, y in source():
+                # Chunks may be ordered (by time, by user); shuffle within each
+                order = rng.permutation(len(X))
+                model.partial_fit(X[order], y[order])
+                rows += len(X)
+        passes = epochs + 1
+    else:
+        reservoir = Reservoir(max_samples, len(FEATURE_NAMES), seed)
+        async for X, y in source():
+            reservoir.add(X, y)
+            rows += len(X)
+        if not rows:
+            raise ValueError("No training data")
+
+        X, y = reservoir.sample()
+        model.train(X, y)
+        fitted_rows = len(X)
+        passes = 1
+
+    return TrainingReport(
+        model_type=model.model_type,
+        rows=rows,
+        passes=passes,
+        fitted_rows=fitted_rows,
+        seconds=time.perf_counter() - start,
+        peak_rss_mb=peak_rss_mb()
+    )
+
+
+async def _main(argv: Optional[Sequence[str]] = None):
+    import argparse
+
+    from app.ml.model import MODEL_TYPES
+
+    parser = argparse.ArgumentParser(description="Train the credit risk model out of core")
+    parser.add_argument("--model-type", choices=MODEL_TYPES, default="sgd")
+    parser.add_argument("--source", default="mongo", help="'mongo', 'synthetic' or the path of a CSV file")
+    parser.add_argument("--samples", type=int, default=1000000, help="rows to generate for --source synthetic")
+    parser.add_argument("--limit", type=int, default=0, help="profiles to read for --source mongo (0 = all)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--epochs", type=int, default=1, help="passes over the data for the sgd model")
+    parser.add_argument("--max-samples", type=int, default=DEFAULT_MAX_SAMPLES,
+                        help="reservoir sample size for the other model types")
+    parser.add_argument("--output", help="save the trained model artifact here")
+    args = parser.parse_args(argv)
+
+    model = CreditRiskMLModel(args.model_type)
+    if args.source == "mongo":
+        from app.database import connect_to_mongo, close_mongo_connection, get_database
+
+        await connect_to_mongo()
+        try:
+            report = await train_streaming(
+                model, mongo_source(get_database(), args.chunk_size, args.limit), args.epochs, args.max_samples
+            )
+        finally:
+            await close_mongo_connection()
+    elif args.source == "synthetic":
+        report = await train_streaming(
+            model, synthetic_source(args.samples, args.chunk_size), args.epochs, args.max_samples
+        )
+    else:
+        report = await train_streaming(model, csv_source(args.source, args.chunk_size), args.epochs, args.max_samples)
+
+    print(report)
+    if args.output:
+        model.save_model(args.output)
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(_main())
@@ -42,7 +42,9 @@ class CreditProfileModel(BaseModel):
     withdrawal_ratio: float
     digital_trust_score: int
     risk_category: str
-    explanation: List[str]
+    # Codes into the explanation catalog (see app.explanations)
+    explanation_codes: List[int]
+    explanation_version: int
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
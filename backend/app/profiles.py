@@ -0,0 +1,129 @@
+"""
+Denormalized latest credit profile.
+
+Each user document embeds a copy of its most recent credit profile under
+``latest_credit_profile`` so ``GET /user/{id}`` is a single point read. The
+field is ``None`` for users that have never been scored and absent only for
+users created before it existed and not yet backfilled
+(``python -m app.jobs.backfill_latest_profile``).
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.etags import USER_VERSION_FIELD
+
+LATEST_PROFILE_FIELD = "latest_credit_profile"
+
+# Updates embed_latest_profiles keeps in flight, well under the connection pool size
+EMBED_CONCURRENCY = 32
+
+# User fields returned by embed_latest_profile, as needed by app.stats
+PREVIOUS_PROFILE_PROJECTION = {
+    "job_type": 1,
+    f"{LATEST_PROFILE_FIELD}.risk_category": 1,
+    f"{LATEST_PROFILE_FIELD}.digital_trust_score": 1,
+}
+
+
+def _embed_update(credit_profile: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Filter and update that embed ``credit_profile`` in its user document.
+
+    The filter only matches while the embedded copy is missing, empty or
+    older, so concurrent or out-of-order writes never replace a newer profile.
+    """
+    query = {
+        "_id": ObjectId(credit_profile["user_id"]),
+        "$or": [
+            {LATEST_PROFILE_FIELD: None},
+            {f"{LATEST_PROFILE_FIELD}.created_at": {"$lte": credit_profile["created_at"]}},
+        ],
+    }
+    # The version tags GET /user/{id} responses (see app.etags)
+    return query, {"$set": {LATEST_PROFILE_FIELD: credit_profile}, "$inc": {USER_VERSION_FIELD: 1}}
+
+
+async def embed_latest_profile(db, credit_profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Atomically make ``credit_profile`` the user's embedded latest profile.
+
+    Returns the user's job type and previous latest profile (see
+    ``PREVIOUS_PROFILE_PROJECTION``) as they were before the update, or
+    None if the user already has a newer profile.
+    """
+    return await db.users.find_one_and_update(
+        *_embed_update(credit_profile),
+        projection=PREVIOUS_PROFILE_PROJECTION,
+        return_document=ReturnDocument.BEFORE
+    )
+
+
+async def embed_latest_profiles(
+    db, credit_profiles: Iterable[Dict[str, Any]]
+) -> Dict[ObjectId, Optional[Dict[str, Any]]]:
+    """
+    Embed many profiles (last one per user wins), running one
+    ``embed_latest_profile`` per user, ``EMBED_CONCURRENCY`` at a time.
+
+    Each update atomically returns the state it replaced, so stats deltas
+    stay exact under concurrent writers, which a bulk write plus an
+    earlier read could not guarantee.
+
+    Returns:
+        What ``embed_latest_profile`` returned, keyed by user ID
+    """
+    latest_by_user: Dict[ObjectId, Dict[str, Any]] = {}
+    for credit_profile in credit_profiles:
+        latest_by_user[ObjectId(credit_profile["user_id"])] = credit_profile
+    profiles = list(latest_by_user.values())
+    previous: List[Optional[Dict[str, Any]]] = []
+    for start in range(0, len(profiles), EMBED_CONCURRENCY):
+        previous += await asyncio.gather(
+            *(embed_latest_profile(db, profile) for profile in profiles[start:start + EMBED_CONCURRENCY])
+        )
+    return dict(zip(latest_by_user, previous))
+
+
+def latest_profile_lookup_stage(as_field: str = LATEST_PROFILE_FIELD) -> List[Dict[str, Any]]:
+    """
+    Aggregation stages that attach each user's newest credit profile.
+
+    ``credit_profiles.user_id`` stores the user ID as a string, so the user
+    ``_id`` is converted first; the lookup then uses the
+    ``user_id``/``created_at`` index.
+    """
+    return [
+        {"$addFields": {"_user_id_str": {"$toString": "$_id"}}},
+        {"$lookup": {
+            "from": "credit_profiles",
+            "localField": "_user_id_str",
+            "foreignField": "user_id",
+            "pipeline": [{"$sort": {"created_at": -1}}, {"$limit": 1}],
+            "as": as_field,
+        }},
+        {"$set": {as_field: {"$ifNull": [{"$first": f"${as_field}"}, None]}}},
+        {"$unset": "_user_id_str"},
+    ]
+
+
+async def find_user_with_latest_profile(db, user_id: ObjectId) -> Optional[Dict[str, Any]]:
+    """
+    Fallback for users that have not been backfilled: fetch the user and
+    their newest profile in one ``$lookup`` aggregation, then store the
+    embedded copy so later reads take the fast path.
+    """
+    pipeline = [{"$match": {"_id": user_id}}] + latest_profile_lookup_stage()
+    users = await db.users.aggregate(pipeline).to_list(length=1)
+    if not users:
+        return None
+
+    user = users[0]
+    await db.users.update_one(
+        {"_id": user_id, LATEST_PROFILE_FIELD: {"$exists": False}},
+        {"$set": {LATEST_PROFILE_FIELD: user[LATEST_PROFILE_FIELD]}}
+    )
+    return user
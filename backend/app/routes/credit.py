@@ -1,10 +1,28 @@
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+from dataclasses import asdict
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from bson import ObjectId
 from datetime import datetime
+from typing import List, Optional, Sequence
 
 from app.database import get_database
-from app.schemas import CalculateScoreRequest, ScoreCalculationResponse
+from app.cache import get_cached_user
+from app.schemas import (
+    CalculateScoreRequest, ScoreCalculationResponse,
+    BatchCalculateScoreRequest, BatchScoreCalculationResponse, BatchScoreError,
+    StatementScoreResponse
+)
 from app.scoring import calculate_digital_trust_score
+from app.metrics import SCORING_LATENCY, SCORING_APPLICANTS
+from app.write_behind import get_credit_profile_buffer
+from app.profiles import embed_latest_profile, embed_latest_profiles
+from app.stats import apply_stats_delta, batch_profile_delta, record_profile_write
+from app.history import record_scores
+from app.ml.shadow import submit_shadow
+from app.explanations import explanation_fields
+from app.statements import DEFAULT_STATEMENT_MONTHS, StatementError, parse_statement
 
 router = APIRouter(prefix="/credit", tags=["Credit"])
 
@@ -29,7 +47,7 @@ async def calculate_score(score_data: CalculateScoreRequest):
             detail="Invalid user ID format"
         )
     
-    user = await db.users.find_one({"_id": ObjectId(score_data.user_id)})
+    user = await get_cached_user(ObjectId(score_data.user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -37,36 +55,233 @@ async def calculate_score(score_data: CalculateScoreRequest):
         )
     
     # Calculate score using scoring logic
-    score, risk_category, explanations = calculate_digital_trust_score(
-        avg_income=score_data.avg_income,
-        income_variance=score_data.income_variance,
-        upi_txn_count=score_data.upi_txn_count,
-        bill_payment_score=score_data.bill_payment_score,
-        withdrawal_ratio=score_data.withdrawal_ratio,
-        months_active=user["months_active"]
-    )
+    with SCORING_LATENCY.labels("rules").time():
+        score, risk_category, explanations = calculate_digital_trust_score(
+            avg_income=score_data.avg_income,
+            income_variance=score_data.income_variance,
+            upi_txn_count=score_data.upi_txn_count,
+            bill_payment_score=score_data.bill_payment_score,
+            withdrawal_ratio=score_data.withdrawal_ratio,
+            months_active=user["months_active"]
+        )
+    SCORING_APPLICANTS.labels("rules").inc()
     
     # Create credit profile document
-    credit_profile = {
-        "user_id": score_data.user_id,
-        "avg_income": score_data.avg_income,
-        "income_variance": score_data.income_variance,
-        "upi_txn_count": score_data.upi_txn_count,
-        "bill_payment_score": score_data.bill_payment_score,
-        "withdrawal_ratio": score_data.withdrawal_ratio,
-        "digital_trust_score": score,
-        "risk_category": risk_category,
-        "explanation": explanations,
-        "created_at": datetime.utcnow()
-    }
+    credit_profile = build_credit_profile(score_data, score, risk_category, explanations)
     
     # Insert into database
-    result = await db.credit_profiles.insert_one(credit_profile)
+    await store_credit_profile(db, credit_profile)
+    # Compare with the ML model in the background, if enabled
+    submit_shadow(credit_profile, user["months_active"])
     
     return ScoreCalculationResponse(
         user_id=score_data.user_id,
         digital_trust_score=score,
         risk_category=risk_category,
         explanation=explanations,
-        credit_profile_id=str(result.inserted_id)
+        credit_profile_id=str(credit_profile["_id"])
     )
+
+
+@router.post("/calculate-score/statement", response_model=StatementScoreResponse)
+async def calculate_score_from_statement(
+    user_id: str = Form(...),
+    statement: UploadFile = File(..., description="Transaction statement CSV with amount and description columns"),
+    months: int = Form(DEFAULT_STATEMENT_MONTHS, ge=1, le=120, description="Months the statement covers")
+):
+    """
+    Calculate Digital Trust Score from an uploaded bank/UPI statement.
+    
+    The statement is parsed in one streaming pass in a worker thread (see
+    ``app.statements``) and the derived features are scored and stored
+    exactly as ``POST /calculate-score`` would.
+    
+    Args:
+        user_id: User ID
+        statement: Statement CSV file
+        months: Months the statement covers, used for average monthly income
+        
+    Returns:
+        Calculated score plus the features derived from the statement
+    """
+    try:
+        features = await run_in_threadpool(parse_statement, statement.file, months)
+    except (StatementError, UnicodeDecodeError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    finally:
+        await statement.close()
+    
+    result = await calculate_score(CalculateScoreRequest(user_id=user_id, **features.score_inputs()))
+    return StatementScoreResponse(**result.model_dump(), statement=asdict(features))
+
+
+@router.post("/calculate-score/batch", response_model=BatchScoreCalculationResponse)
+async def calculate_score_batch(batch_data: BatchCalculateScoreRequest):
+    """
+    Calculate Digital Trust Scores for many users in one request.
+
+    Users are fetched with a single ``$in`` query, all applicants are scored
+    in one vectorized pass, the resulting credit profiles are written with a
+    single ``insert_many`` and embedded in their users with one bulk write. Applicants with an invalid or unknown
+    user ID are reported in ``errors`` instead of failing the whole batch.
+
+    Args:
+        batch_data: Financial data for each applicant
+
+    Returns:
+        Scores for the applicants that could be scored, plus per-row errors
+    """
+    db = get_database()
+    applicants = batch_data.applicants
+    errors = []
+
+    # Validate user IDs up front so the lookup only sees well-formed ones
+    valid_rows = []
+    for index, applicant in enumerate(applicants):
+        if ObjectId.is_valid(applicant.user_id):
+            valid_rows.append((index, ObjectId(applicant.user_id)))
+        else:
+            errors.append(BatchScoreError(
+                index=index, user_id=applicant.user_id, detail="Invalid user ID format"
+            ))
+
+    users_by_id = {}
+    if valid_rows:
+        cursor = db.users.find(
+            {"_id": {"$in": list({object_id for _, object_id in valid_rows})}},
+            {"months_active": 1}
+        )
+        async for user in cursor:
+            users_by_id[user["_id"]] = user
+
+    rows = []
+    months_active = []
+    for index, object_id in valid_rows:
+        if object_id in users_by_id:
+            rows.append(index)
+            months_active.append(users_by_id[object_id]["months_active"])
+        else:
+            errors.append(BatchScoreError(
+                index=index, user_id=applicants[index].user_id, detail="User not found"
+            ))
+    errors.sort(key=lambda error: error.index)
+
+    if not rows:
+        return BatchScoreCalculationResponse(results=[], errors=errors)
+
+    # NumPy is only loaded once a batch is actually scored (or by ML_PRELOAD)
+    from app.batch_scoring import score_batch
+
+    scored = [applicants[index] for index in rows]
+    with SCORING_LATENCY.labels("batch").time():
+        result = score_batch(
+            avg_income=[a.avg_income for a in scored],
+            income_variance=[a.income_variance for a in scored],
+            upi_txn_count=[a.upi_txn_count for a in scored],
+            bill_payment_score=[a.bill_payment_score for a in scored],
+            withdrawal_ratio=[a.withdrawal_ratio for a in scored],
+            months_active=months_active
+        )
+    SCORING_APPLICANTS.labels("batch").inc(len(scored))
+
+    scores = result.scores.tolist()
+    created_at = datetime.utcnow()
+    credit_profiles = [
+        build_credit_profile(
+            applicant, scores[row], result.risk_category(row), result.explanations(row), created_at
+        )
+        for row, applicant in enumerate(scored)
+    ]
+
+    insert_result = await db.credit_profiles.insert_many(credit_profiles)
+    await asyncio.gather(record_scores(db, credit_profiles), _embed_and_count(db, credit_profiles))
+    for credit_profile, applicant_months_active in zip(credit_profiles, months_active):
+        submit_shadow(credit_profile, applicant_months_active)
+
+    results = [
+        ScoreCalculationResponse(
+            user_id=profile["user_id"],
+            digital_trust_score=profile["digital_trust_score"],
+            risk_category=profile["risk_category"],
+            explanation=result.explanations(row),
+            credit_profile_id=str(inserted_id)
+        )
+        for row, (profile, inserted_id) in enumerate(zip(credit_profiles, insert_result.inserted_ids))
+    ]
+
+    return BatchScoreCalculationResponse(results=results, errors=errors)
+
+
+async def store_credit_profile(db, credit_profile: dict):
+    """
+    Persist a credit profile, embed it as the user's latest profile,
+    update the portfolio stats and append it to the score history.
+
+    The ID is generated client-side so that, with write-behind enabled,
+    the profile can be queued and its ID returned before the write lands;
+    the other writes then follow in ``record_written_profiles``.
+    """
+    credit_profile["_id"] = ObjectId()
+    buffer = get_credit_profile_buffer()
+    if buffer is not None:
+        # The buffer runs the follow-on writes once the batch is inserted
+        await buffer.submit(credit_profile)
+        return
+    await db.credit_profiles.insert_one(credit_profile)
+
+    async def embed_and_count():
+        previous_user = await embed_latest_profile(db, credit_profile)
+        await record_profile_write(db, previous_user, credit_profile)
+
+    # The history point depends only on the profile, so it is written alongside
+    await asyncio.gather(record_scores(db, [credit_profile]), embed_and_count())
+
+
+async def record_written_profiles(credit_profiles: List[dict]):
+    """
+    Embed, count and record the history of a batch of profiles inserted by
+    the write-behind buffer (its ``on_written`` hook), with the same
+    writes as ``/calculate-score/batch``.
+    """
+    db = get_database()
+    # A shadow result amended into a queued profile stays out of the embedded copy
+    embedded = [
+        {field: value for field, value in profile.items() if field != "ml_shadow"}
+        for profile in credit_profiles
+    ]
+    await asyncio.gather(record_scores(db, credit_profiles), _embed_and_count(db, embedded))
+
+
+async def _embed_and_count(db, credit_profiles: List[dict]):
+    """Embed a batch of profiles, then apply the stats delta the embeds report"""
+    previous_users = await embed_latest_profiles(db, credit_profiles)
+    await apply_stats_delta(db, batch_profile_delta(credit_profiles, previous_users))
+
+
+def build_credit_profile(
+    score_data: CalculateScoreRequest,
+    score: int,
+    risk_category: str,
+    explanations: Sequence[str],
+    created_at: Optional[datetime] = None
+) -> dict:
+    """
+    Build the ``credit_profiles`` document for one scored applicant.
+
+    Explanations are stored as catalog codes (see ``app.explanations``).
+    """
+    return {
+        "user_id": score_data.user_id,
+        "avg_income": score_data.avg_income,
+        "income_variance": score_data.income_variance,
+        "upi_txn_count": score_data.upi_txn_count,
+        "bill_payment_score": score_data.bill_payment_score,
+        "withdrawal_ratio": score_data.withdrawal_ratio,
+        "digital_trust_score": score,
+        "risk_category": risk_category,
+        **explanation_fields(explanations),
+        "created_at": created_at or datetime.utcnow()
+    }
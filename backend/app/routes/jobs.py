@@ -0,0 +1,109 @@
+from fastapi import APIRouter, HTTPException, status
+from bson import ObjectId
+
+from app.database import get_database
+from app.indexes import RUNNING_JOB_INDEX, index_missing
+from app.jobs.rescore import (
+    JobConflictError, create_rescore_job, find_active_job, job_progress, start_rescore_job
+)
+from app.schemas import JobStatusResponse, RescoreJobRequest
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def _job_id(job_id: str) -> ObjectId:
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid job ID format"
+        )
+    return ObjectId(job_id)
+
+
+@router.post("/rescore", response_model=JobStatusResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_rescore(request: RescoreJobRequest = RescoreJobRequest()):
+    """
+    Re-score every stored credit profile with the current scoring rules.
+    
+    The job runs in the background of this worker; poll
+    ``GET /jobs/{id}`` for its progress. Only one re-scoring job runs at a time.
+    
+    Args:
+        request: Job options
+        
+    Returns:
+        The started job
+    """
+    db = get_database()
+    
+    # Without the index, concurrent starts could both claim a job
+    if index_missing(RUNNING_JOB_INDEX):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Rescore jobs are unavailable until the unique running-job index is built"
+        )
+    
+    active = await find_active_job(db)
+    if active:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Rescore job {active['_id']} is already running"
+        )
+    
+    job = await create_rescore_job(db, request.batch_size)
+    try:
+        job = await start_rescore_job(db, job["_id"])
+    except JobConflictError as exc:
+        # A concurrent request started a job between the check and the claim
+        await db.jobs.delete_one({"_id": job["_id"]})
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc)
+        )
+    return job_progress(job)
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """
+    Get a job's status, progress and throughput.
+    
+    Args:
+        job_id: Job ID
+        
+    Returns:
+        Job status
+    """
+    job = await get_database().jobs.find_one({"_id": _job_id(job_id)})
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job_progress(job)
+
+
+@router.post("/{job_id}/resume", response_model=JobStatusResponse, status_code=status.HTTP_202_ACCEPTED)
+async def resume_job(job_id: str):
+    """
+    Resume an interrupted or failed job from its checkpoint.
+    
+    Args:
+        job_id: Job ID
+        
+    Returns:
+        The resumed job
+    """
+    try:
+        job = await start_rescore_job(get_database(), _job_id(job_id))
+    except LookupError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    except JobConflictError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc)
+        )
+    return job_progress(job)
@@ -0,0 +1,38 @@
+from fastapi import APIRouter
+
+from app.database import get_database
+from app.schemas import PortfolioStatsResponse
+from app.stats import get_portfolio_stats, rebuild_portfolio_stats
+
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+
+@router.get("/portfolio", response_model=PortfolioStatsResponse)
+async def get_portfolio():
+    """
+    Get portfolio statistics.
+    
+    Counts of scored users per risk category and job type, and a histogram
+    of their latest Digital Trust Scores. Served from the materialized
+    ``stats`` document, so the cost does not grow with the number of users.
+    
+    Returns:
+        Portfolio statistics
+    """
+    return await get_portfolio_stats(get_database())
+
+
+@router.post("/portfolio/rebuild", response_model=PortfolioStatsResponse)
+async def rebuild_portfolio():
+    """
+    Recompute portfolio statistics from every user's latest credit profile.
+    
+    Corrects drift in the incrementally maintained counters. Scans all
+    scored users, so run it sparingly.
+    
+    Returns:
+        The rebuilt portfolio statistics
+    """
+    db = get_database()
+    await rebuild_portfolio_stats(db)
+    return await get_portfolio_stats(db)
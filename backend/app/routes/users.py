@@ -1,10 +1,27 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Literal, Optional
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timezone
+from pydantic import ValidationError
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from app.database import get_database
-from app.schemas import UserRegisterRequest, UserResponse, UserDetailResponse, CreditProfileResponse
+from app.cache import get_cached_user, invalidate_user
+from app.etags import (
+    USER_VERSION_FIELD, bump_users_list_version, etag_headers, etag_matches, not_modified,
+    user_etag, user_version, users_list_etag, users_list_version
+)
+from app.indexes import USERS_EMAIL_INDEX, index_missing
+from app.history import DEFAULT_HISTORY_LIMIT, MAX_HISTORY_LIMIT, get_score_history
+from app.profiles import LATEST_PROFILE_FIELD, find_user_with_latest_profile
+from app.serialization import MongoJSONResponse, credit_profile_document, dumps, user_document
+from app.schemas import (
+    UserRegisterRequest, UserResponse, UserDetailResponse,
+    BulkUserRegisterRequest, BulkRegisterResponse, BulkRegisterResult,
+    UserPageResponse, DEFAULT_USER_PAGE_SIZE, MAX_USER_PAGE_SIZE, ScoreHistoryResponse
+)
 from app.models import UserModel
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -22,21 +39,24 @@ async def register_user(user_data: UserRegisterRequest):
         Created user details
     """
     db = get_database()
-    
-    # Check if user with email already exists
-    existing_user = await db.users.find_one({"email": user_data.email})
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User with this email already exists"
-        )
+    _require_email_index()
     
     # Create user document
     user_dict = user_data.model_dump()
     user_dict["created_at"] = datetime.utcnow()
+    user_dict[LATEST_PROFILE_FIELD] = None
+    user_dict[USER_VERSION_FIELD] = 1
     
-    # Insert into database
-    result = await db.users.insert_one(user_dict)
+    # Insert into database; the unique email index rejects duplicates atomically
+    try:
+        result = await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists"
+        )
+    invalidate_user(result.inserted_id)
+    await bump_users_list_version(db)
     
     # Fetch and return created user
     created_user = await db.users.find_one({"_id": result.inserted_id})
@@ -51,39 +71,207 @@ async def register_user(user_data: UserRegisterRequest):
     )
 
 
-@router.get("", response_model=List[UserResponse])
-async def get_all_users():
+# MongoDB error code for a unique index violation
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _require_email_index():
+    """Refuse registrations while the unique email index is missing, since duplicates would go undetected"""
+    if index_missing(USERS_EMAIL_INDEX):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Registration is unavailable until the unique email index is built"
+        )
+
+
+@router.post("/register/bulk", response_model=BulkRegisterResponse)
+async def register_users_bulk(bulk_data: BulkUserRegisterRequest):
     """
-    Get all registered users.
-    
+    Register many users in a single round trip.
+
+    Each row is validated on its own, valid rows are written with one
+    unordered ``insert_many`` and duplicate emails are detected by the
+    unique index on ``users.email`` rather than by a lookup per row.
+    IDs are generated client-side, so inserted documents are never re-read.
+
+    Args:
+        bulk_data: Raw user registration records
+
     Returns:
-        List of all users
+        Per-row created/duplicate/invalid/failed results with summary counts
     """
     db = get_database()
-    
-    users = []
-    cursor = db.users.find({})
-    
+    _require_email_index()
+
+    results = []
+    user_docs = []
+    doc_rows = []
+    created_at = datetime.utcnow()
+
+    for index, row in enumerate(bulk_data.users):
+        try:
+            user_data = UserRegisterRequest.model_validate(row)
+        except ValidationError as exc:
+            error = exc.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            results.append(BulkRegisterResult(
+                index=index, status="invalid", detail=f"{field}: {error['msg']}"
+            ))
+            continue
+
+        user_dict = user_data.model_dump()
+        user_dict["_id"] = ObjectId()
+        user_dict["created_at"] = created_at
+        user_dict[LATEST_PROFILE_FIELD] = None
+        user_dict[USER_VERSION_FIELD] = 1
+        user_docs.append(user_dict)
+        doc_rows.append(index)
+        results.append(BulkRegisterResult(index=index, status="created", id=str(user_dict["_id"])))
+
+    if user_docs:
+        for user_dict in user_docs:
+            invalidate_user(user_dict["_id"])
+        try:
+            await db.users.insert_many(user_docs, ordered=False)
+        except BulkWriteError as exc:
+            # Rows not listed in writeErrors were inserted
+            for write_error in exc.details.get("writeErrors", []):
+                result = results[doc_rows[write_error["index"]]]
+                result.id = None
+                if write_error["code"] == DUPLICATE_KEY_ERROR:
+                    result.status = "duplicate"
+                    result.detail = "User with this email already exists"
+                else:
+                    result.status = "failed"
+                    result.detail = write_error.get("errmsg")
+
+    counts = {"created": 0, "duplicate": 0, "invalid": 0, "failed": 0}
+    for result in results:
+        counts[result.status] += 1
+    if counts["created"]:
+        await bump_users_list_version(db)
+
+    return BulkRegisterResponse(
+        created=counts["created"],
+        duplicates=counts["duplicate"],
+        invalid=counts["invalid"],
+        failed=counts["failed"],
+        results=results
+    )
+
+
+# Fields returned by the user listing
+USER_LIST_PROJECTION = {
+    "name": 1,
+    "email": 1,
+    "job_type": 1,
+    "months_active": 1,
+    "created_at": 1
+}
+
+# Documents fetched per cursor batch when streaming
+USER_STREAM_BATCH_SIZE = 500
+
+
+class UserListParams:
+    """Query parameters for the user listing"""
+
+    def __init__(
+        self,
+        after: Optional[str] = Query(None, description="Return users after this user ID (cursor from the previous page)"),
+        limit: Optional[int] = Query(None, ge=1, le=MAX_USER_PAGE_SIZE, description="Page size"),
+        response_format: Literal["json", "ndjson"] = Query("json", alias="format", description="ndjson streams every user"),
+        if_none_match: Optional[str] = Header(None, description="ETag of a previous response")
+    ):
+        self.after = after
+        self.limit = limit
+        self.response_format = response_format
+        self.if_none_match = if_none_match
+
+
+@router.get("", response_model=UserPageResponse)
+async def get_all_users(params: UserListParams = Depends()):
+    """
+    Get registered users, paginated by user ID.
+
+    Pages are ordered by ``_id`` and continue from the ``after`` cursor, so
+    every page is a bounded index range scan regardless of its position.
+    With ``format=ndjson`` users are streamed one JSON document per line as
+    the cursor yields them, starting after ``after`` and stopping after
+    ``limit`` users if given.
+
+    Responses are tagged with the user listing's change counter; a request
+    whose ``If-None-Match`` holds the current tag gets ``304 Not Modified``
+    without the users being read.
+
+    Returns:
+        Page of users and the cursor for the next page
+    """
+    db = get_database()
+
+    query = {}
+    if params.after is not None:
+        if not ObjectId.is_valid(params.after):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query["_id"] = {"$gt": ObjectId(params.after)}
+
+    # Read before the users, so the tag is never newer than the page
+    etag = users_list_etag(await users_list_version(db))
+    if etag_matches(params.if_none_match, etag):
+        return not_modified(etag)
+
+    cursor = db.users.find(query, USER_LIST_PROJECTION).sort("_id", ASCENDING)
+
+    if params.response_format == "ndjson":
+        if params.limit is not None:
+            cursor = cursor.limit(params.limit)
+        return StreamingResponse(
+            _stream_users(cursor.batch_size(USER_STREAM_BATCH_SIZE)),
+            media_type="application/x-ndjson",
+            headers=etag_headers(etag)
+        )
+
+    limit = params.limit or DEFAULT_USER_PAGE_SIZE
+    # Fetch one extra document to know whether another page exists
+    users = [user_document(user) async for user in cursor.limit(limit + 1)]
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = str(users[-1]["id"])
+
+    # Documents were validated on write; encode them without re-validation
+    return MongoJSONResponse({"users": users, "next_cursor": next_cursor}, headers=etag_headers(etag))
+
+
+async def _stream_users(cursor) -> AsyncIterator[bytes]:
+    """Yield one NDJSON line per user as the cursor produces them"""
     async for user in cursor:
-        users.append(UserResponse(
-            id=str(user["_id"]),
-            name=user["name"],
-            email=user["email"],
-            job_type=user["job_type"],
-            months_active=user["months_active"],
-            created_at=user["created_at"]
-        ))
-    
-    return users
+        yield dumps(user_document(user)) + b"\n"
 
 
 @router.get("/{user_id}", response_model=UserDetailResponse)
-async def get_user_details(user_id: str):
+async def get_user_details(
+    user_id: str,
+    if_none_match: Optional[str] = Header(None, description="ETag of a previous response")
+):
     """
     Get user details along with their latest credit profile.
     
+    The latest profile is embedded in the user document, so this is a
+    single point read. Users that have not been backfilled yet fall back to
+    a ``$lookup`` aggregation.
+    
+    Responses are tagged with the user's version. A request whose
+    ``If-None-Match`` holds the current tag reads only the version and
+    gets ``304 Not Modified``.
+    
     Args:
         user_id: User ID
+        if_none_match: ETag of a previous response
         
     Returns:
         User details with latest credit profile
@@ -97,46 +285,93 @@ async def get_user_details(user_id: str):
             detail="Invalid user ID format"
         )
     
-    # Find user
+    if if_none_match:
+        version = await user_version(db, ObjectId(user_id))
+        if version is not None and etag_matches(if_none_match, user_etag(user_id, version)):
+            return not_modified(user_etag(user_id, version))
+    
+    # Find user; the latest profile is embedded in the same document
     user = await db.users.find_one({"_id": ObjectId(user_id)})
+    if user and LATEST_PROFILE_FIELD not in user:
+        user = await find_user_with_latest_profile(db, user["_id"])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Get latest credit profile
-    credit_profile = await db.credit_profiles.find_one(
-        {"user_id": user_id},
-        sort=[("created_at", -1)]
-    )
+    # Documents were validated on write; encode them without re-validation
+    return MongoJSONResponse({
+        "user": user_document(user),
+        "latest_credit_profile": credit_profile_document(user[LATEST_PROFILE_FIELD])
+    }, headers=etag_headers(user_etag(user_id, user.get(USER_VERSION_FIELD, 0))))
+
+
+class ScoreHistoryParams:
+    """Query parameters for a user's score history"""
+
+    def __init__(
+        self,
+        start: Optional[datetime] = Query(None, description="Only calculations at or after this time (UTC)"),
+        end: Optional[datetime] = Query(None, description="Only calculations before this time (UTC)"),
+        bucket: Literal["none", "day", "week"] = Query("none", description="Downsample into daily or weekly buckets"),
+        limit: int = Query(
+            DEFAULT_HISTORY_LIMIT, ge=1, le=MAX_HISTORY_LIMIT, description="Most recent points or buckets"
+        )
+    ):
+        self.start = start
+        self.end = end
+        self.bucket = bucket
+        self.limit = limit
+
+
+@router.get("/{user_id}/history", response_model=ScoreHistoryResponse)
+async def get_user_history(user_id: str, params: ScoreHistoryParams = Depends()):
+    """
+    Get a user's Digital Trust Score history.
     
-    user_response = UserResponse(
-        id=str(user["_id"]),
-        name=user["name"],
-        email=user["email"],
-        job_type=user["job_type"],
-        months_active=user["months_active"],
-        created_at=user["created_at"]
-    )
+    Served from the ``score_history`` time-series collection. With
+    ``bucket=day`` or ``bucket=week`` points are aggregated on the server,
+    so long histories return at most one point per bucket.
     
-    credit_profile_response = None
-    if credit_profile:
-        credit_profile_response = CreditProfileResponse(
-            id=str(credit_profile["_id"]),
-            user_id=credit_profile["user_id"],
-            avg_income=credit_profile["avg_income"],
-            income_variance=credit_profile["income_variance"],
-            upi_txn_count=credit_profile["upi_txn_count"],
-            bill_payment_score=credit_profile["bill_payment_score"],
-            withdrawal_ratio=credit_profile["withdrawal_ratio"],
-            digital_trust_score=credit_profile["digital_trust_score"],
-            risk_category=credit_profile["risk_category"],
-            explanation=credit_profile["explanation"],
-            created_at=credit_profile["created_at"]
+    Args:
+        user_id: User ID
+        params: Time range, bucket size and limit
+        
+    Returns:
+        History points, oldest first
+    """
+    db = get_database()
+    
+    # Validate ObjectId
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid user ID format"
+        )
+    start, end = _as_utc(params.start), _as_utc(params.end)
+    if start and end and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
         )
     
-    return UserDetailResponse(
-        user=user_response,
-        latest_credit_profile=credit_profile_response
+    object_id = ObjectId(user_id)
+    if not await get_cached_user(object_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    points = await get_score_history(
+        db, object_id,
+        start=start, end=end, bucket=params.bucket, limit=params.limit
     )
+    return MongoJSONResponse({"user_id": user_id, "bucket": params.bucket, "points": points})
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to the naive UTC datetimes stored in MongoDB"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from datetime import datetime
 
 
@@ -44,6 +44,29 @@ class CalculateScoreRequest(BaseModel):
         }
 
 
+# Upper bound on users accepted by one bulk registration request
+MAX_REGISTER_BATCH_SIZE = 10000
+
+
+class BulkUserRegisterRequest(BaseModel):
+    """
+    Request schema for bulk user registration.
+
+    Rows are validated individually against ``UserRegisterRequest`` so that
+    one malformed record does not reject the whole roster.
+    """
+    users: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MAX_REGISTER_BATCH_SIZE)
+
+
+# Upper bound on applicants accepted by one batch scoring request
+MAX_SCORE_BATCH_SIZE = 10000
+
+
+class BatchCalculateScoreRequest(BaseModel):
+    """Request schema for batch score calculation"""
+    applicants: List[CalculateScoreRequest] = Field(..., min_length=1, max_length=MAX_SCORE_BATCH_SIZE)
+
+
 # Response Schemas
 class UserResponse(BaseModel):
     """Response schema for user data"""
@@ -67,6 +90,19 @@ class UserResponse(BaseModel):
         }
 
 
+# Page size limits for the user listing
+DEFAULT_USER_PAGE_SIZE = 100
+MAX_USER_PAGE_SIZE = 1000
+
+
+class UserPageResponse(BaseModel):
+    """Response schema for one page of the user listing"""
+    users: List[UserResponse]
+    next_cursor: Optional[str] = Field(
+        None, description="Pass as `after` to fetch the next page; null on the last page"
+    )
+
+
 class CreditProfileResponse(BaseModel):
     """Response schema for credit profile"""
     id: str
@@ -106,6 +142,54 @@ class ScoreCalculationResponse(BaseModel):
         }
 
 
+class StatementSummary(BaseModel):
+    """Score features and totals derived from an uploaded statement"""
+    avg_income: float
+    income_variance: float
+    upi_txn_count: int
+    bill_payment_score: int
+    withdrawal_ratio: float
+    total_income: float
+    total_expense: float
+    transactions: int
+    skipped_rows: int = Field(..., description="Rows with a different column count or a non-numeric amount")
+
+
+class StatementScoreResponse(ScoreCalculationResponse):
+    """Response schema for score calculation from a transaction statement"""
+    statement: StatementSummary
+
+
+class BulkRegisterResult(BaseModel):
+    """Outcome of one row in a bulk registration request"""
+    index: int
+    status: Literal["created", "duplicate", "invalid", "failed"]
+    id: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class BulkRegisterResponse(BaseModel):
+    """Response schema for bulk user registration"""
+    created: int
+    duplicates: int
+    invalid: int
+    failed: int
+    results: List[BulkRegisterResult]
+
+
+class BatchScoreError(BaseModel):
+    """Applicant that could not be scored in a batch request"""
+    index: int
+    user_id: str
+    detail: str
+
+
+class BatchScoreCalculationResponse(BaseModel):
+    """Response schema for batch score calculation"""
+    results: List[ScoreCalculationResponse]
+    errors: List[BatchScoreError]
+
+
 class UserDetailResponse(BaseModel):
     """Response schema for user details with credit profile"""
     user: UserResponse
@@ -131,3 +215,62 @@ class UserDetailResponse(BaseModel):
                 }
             }
         }
+
+
+class ScoreHistogramBucket(BaseModel):
+    """Number of scored users whose latest score is in [min_score, max_score]"""
+    min_score: int
+    max_score: int
+    count: int
+
+
+class PortfolioStatsResponse(BaseModel):
+    """Response schema for portfolio statistics over users' latest credit profiles"""
+    scored_users: int
+    profiles: int = Field(..., description="Credit profiles written, including superseded ones")
+    risk_category: Dict[str, int]
+    job_type: Dict[str, int]
+    score_histogram: List[ScoreHistogramBucket]
+    updated_at: Optional[datetime] = None
+    rebuilt_at: Optional[datetime] = None
+
+
+class ScoreHistoryPoint(BaseModel):
+    """One calculation, or a day/week bucket of calculations, in a score history"""
+    timestamp: datetime = Field(..., description="Calculation time, or the start of the bucket")
+    count: int
+    avg_score: float
+    min_score: int
+    max_score: int
+    risk_category: str = Field(..., description="Risk category of the last calculation in the bucket")
+
+
+class ScoreHistoryResponse(BaseModel):
+    """Response schema for a user's score history, oldest point first"""
+    user_id: str
+    bucket: Literal["none", "day", "week"]
+    points: List[ScoreHistoryPoint]
+
+
+class RescoreJobRequest(BaseModel):
+    """Request schema for starting a re-scoring job"""
+    batch_size: int = Field(1000, ge=1, le=10000, description="Profiles scored and written per chunk")
+
+
+class JobStatusResponse(BaseModel):
+    """Progress of a background job"""
+    id: str
+    type: str
+    status: Literal["pending", "running", "completed", "failed", "interrupted"]
+    processed: int
+    changed: int = Field(..., description="Profiles whose score, risk category or explanation changed")
+    total: int = Field(..., description="Estimated number of profiles to process")
+    percent: float
+    profiles_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    checkpoint: Optional[str] = Field(None, description="Last credit profile ID processed")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: datetime
+    error: Optional[str] = None
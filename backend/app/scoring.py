@@ -1,7 +1,55 @@
+from itertools import product
 from typing import List, Tuple
 
 
-def calculate_digital_trust_score(
+# Explanation text for each rule, indexed by the bucket the input falls into.
+# Buckets are numbered from the lowest input value upwards, so bucket ``i`` is
+# the number of thresholds the value has crossed. The batch engine in
+# ``app.batch_scoring`` shares these tables with the scalar path below.
+INCOME_STABILITY_EXPLANATIONS = (
+    "Stable income pattern detected with low variance",
+    "Income fluctuation detected - consider stabilizing earnings",
+)
+UPI_ACTIVITY_EXPLANATIONS = (
+    "Low digital payment activity - increase UPI usage for better score",
+    "Moderate UPI transaction activity detected",
+    "High UPI transaction activity observed - strong digital footprint",
+)
+BILL_PAYMENT_EXPLANATIONS = (
+    "Irregular bill payment history - maintain consistent payments",
+    "Occasional bill payments detected",
+    "Regular bill payments recorded - demonstrates financial discipline",
+)
+WORK_DURATION_EXPLANATIONS = (
+    "Short work history - longer tenure will improve creditworthiness",
+    "Moderate work duration demonstrates some commitment",
+    "Long-term work activity improves trust and stability",
+)
+WITHDRAWAL_EXPLANATIONS = (
+    "Low withdrawal ratio indicates good digital transaction habits",
+    "Moderate cash withdrawal ratio detected",
+    "High cash withdrawal behavior increases risk - reduce dependency on cash",
+)
+INCOME_LEVEL_EXPLANATIONS = (
+    "Lower income bracket - focus on building savings and reducing withdrawals",
+    "Moderate income level observed",
+    "Above-average income level supports creditworthiness",
+)
+
+# Explanation tables in the order the explanations are reported
+RULE_EXPLANATIONS = (
+    INCOME_STABILITY_EXPLANATIONS,
+    UPI_ACTIVITY_EXPLANATIONS,
+    BILL_PAYMENT_EXPLANATIONS,
+    WORK_DURATION_EXPLANATIONS,
+    WITHDRAWAL_EXPLANATIONS,
+    INCOME_LEVEL_EXPLANATIONS,
+)
+
+RISK_CATEGORIES = ("High Risk", "Medium Risk", "Low Risk")
+
+
+def _evaluate_rules(
     avg_income: float,
     income_variance: float,
     upi_txn_count: int,
@@ -10,7 +58,10 @@ def calculate_digital_trust_score(
     months_active: int
 ) -> Tuple[int, str, List[str]]:
     """
-    Calculate Digital Trust Score based on rule-based scoring logic.
+    Reference implementation of the rule-based scoring logic.
+    
+    Only used to compile the outcome table at import time (and to check
+    the table against); ``calculate_digital_trust_score`` serves requests.
     
     Returns:
         Tuple of (score, risk_category, explanations)
@@ -21,56 +72,56 @@ def calculate_digital_trust_score(
     # Rule 1: Stable income (income_variance < 0.3) → +25
     if income_variance < 0.3:
         score += 25
-        explanations.append("Stable income pattern detected with low variance")
+        explanations.append(INCOME_STABILITY_EXPLANATIONS[0])
     else:
-        explanations.append("Income fluctuation detected - consider stabilizing earnings")
+        explanations.append(INCOME_STABILITY_EXPLANATIONS[1])
 
     # Rule 2: High UPI activity (upi_txn_count > 30) → +20
     if upi_txn_count > 30:
         score += 20
-        explanations.append("High UPI transaction activity observed - strong digital footprint")
+        explanations.append(UPI_ACTIVITY_EXPLANATIONS[2])
     elif upi_txn_count > 15:
         score += 10
-        explanations.append("Moderate UPI transaction activity detected")
+        explanations.append(UPI_ACTIVITY_EXPLANATIONS[1])
     else:
-        explanations.append("Low digital payment activity - increase UPI usage for better score")
+        explanations.append(UPI_ACTIVITY_EXPLANATIONS[0])
 
     # Rule 3: Regular bill payments (bill_payment_score > 7) → +20
     if bill_payment_score > 7:
         score += 20
-        explanations.append("Regular bill payments recorded - demonstrates financial discipline")
+        explanations.append(BILL_PAYMENT_EXPLANATIONS[2])
     elif bill_payment_score > 4:
         score += 10
-        explanations.append("Occasional bill payments detected")
+        explanations.append(BILL_PAYMENT_EXPLANATIONS[1])
     else:
-        explanations.append("Irregular bill payment history - maintain consistent payments")
+        explanations.append(BILL_PAYMENT_EXPLANATIONS[0])
 
     # Rule 4: Work duration ≥ 12 months → +25
     if months_active >= 12:
         score += 25
-        explanations.append("Long-term work activity improves trust and stability")
+        explanations.append(WORK_DURATION_EXPLANATIONS[2])
     elif months_active >= 6:
         score += 15
-        explanations.append("Moderate work duration demonstrates some commitment")
+        explanations.append(WORK_DURATION_EXPLANATIONS[1])
     else:
-        explanations.append("Short work history - longer tenure will improve creditworthiness")
+        explanations.append(WORK_DURATION_EXPLANATIONS[0])
 
     # Rule 5: High withdrawal ratio (> 0.7) → −10
     if withdrawal_ratio > 0.7:
         score -= 10
-        explanations.append("High cash withdrawal behavior increases risk - reduce dependency on cash")
+        explanations.append(WITHDRAWAL_EXPLANATIONS[2])
     elif withdrawal_ratio > 0.5:
-        explanations.append("Moderate cash withdrawal ratio detected")
+        explanations.append(WITHDRAWAL_EXPLANATIONS[1])
     else:
-        explanations.append("Low withdrawal ratio indicates good digital transaction habits")
+        explanations.append(WITHDRAWAL_EXPLANATIONS[0])
 
     # Additional insights based on income
     if avg_income > 30000:
-        explanations.append("Above-average income level supports creditworthiness")
+        explanations.append(INCOME_LEVEL_EXPLANATIONS[2])
     elif avg_income > 15000:
-        explanations.append("Moderate income level observed")
+        explanations.append(INCOME_LEVEL_EXPLANATIONS[1])
     else:
-        explanations.append("Lower income bracket - focus on building savings and reducing withdrawals")
+        explanations.append(INCOME_LEVEL_EXPLANATIONS[0])
 
     # Ensure score stays within 0-100 range
     score = max(0, min(100, score))
@@ -99,7 +150,7 @@ def classify_risk(score: int) -> str:
         return "High Risk"
 
 
-def generate_recommendations(
+def _build_recommendations(
     score: int,
     risk_category: str,
     income_variance: float,
@@ -108,7 +159,9 @@ def generate_recommendations(
     withdrawal_ratio: float
 ) -> List[str]:
     """
-    Generate personalized recommendations for improving credit score.
+    Reference implementation of the recommendation rules.
+    
+    Only used to compile the recommendation table at import time.
     
     Returns:
         List of recommendation strings
@@ -134,3 +187,124 @@ def generate_recommendations(
         recommendations.append("Continue working in your current role to build a stronger work history")
 
     return recommendations
+
+
+# ---------------------------------------------------------------------------
+# Compiled lookup tables
+#
+# The outcome of the rules depends only on which bucket each input falls into,
+# so every combination is evaluated once at import and requests are served by
+# indexing into a table of immutable results.
+# ---------------------------------------------------------------------------
+
+# One representative input per bucket, lowest bucket first (see RULE_EXPLANATIONS)
+_INCOME_VARIANCE_SAMPLES = (0.0, 0.3)
+_UPI_TXN_COUNT_SAMPLES = (0, 16, 31)
+_BILL_PAYMENT_SCORE_SAMPLES = (0, 5, 8)
+_MONTHS_ACTIVE_SAMPLES = (0, 6, 12)
+_WITHDRAWAL_RATIO_SAMPLES = (0.0, 0.6, 0.8)
+_AVG_INCOME_SAMPLES = (0.0, 15001.0, 30001.0)
+
+
+def _outcome_index(
+    avg_income: float,
+    income_variance: float,
+    upi_txn_count: int,
+    bill_payment_score: int,
+    withdrawal_ratio: float,
+    months_active: int
+) -> int:
+    """Mixed-radix index of the bucket combination (radix 2, then 3 per rule)"""
+    index = income_variance >= 0.3
+    index = index * 3 + (upi_txn_count > 15) + (upi_txn_count > 30)
+    index = index * 3 + (bill_payment_score > 4) + (bill_payment_score > 7)
+    index = index * 3 + (months_active >= 6) + (months_active >= 12)
+    index = index * 3 + (withdrawal_ratio > 0.5) + (withdrawal_ratio > 0.7)
+    return index * 3 + (avg_income > 15000) + (avg_income > 30000)
+
+
+def _compile_outcomes() -> Tuple[Tuple[int, str, Tuple[str, ...]], ...]:
+    outcomes = []
+    # product() varies the last rule fastest, matching _outcome_index
+    for (variance, upi, bills, months, withdrawal, income) in product(
+        _INCOME_VARIANCE_SAMPLES,
+        _UPI_TXN_COUNT_SAMPLES,
+        _BILL_PAYMENT_SCORE_SAMPLES,
+        _MONTHS_ACTIVE_SAMPLES,
+        _WITHDRAWAL_RATIO_SAMPLES,
+        _AVG_INCOME_SAMPLES
+    ):
+        score, risk_category, explanations = _evaluate_rules(
+            income, variance, upi, bills, withdrawal, months
+        )
+        assert len(outcomes) == _outcome_index(income, variance, upi, bills, withdrawal, months)
+        outcomes.append((score, risk_category, tuple(explanations)))
+    return tuple(outcomes)
+
+
+def _compile_recommendations() -> Tuple[Tuple[str, ...], ...]:
+    recommendations = []
+    for (high_risk, unstable, low_upi, irregular_bills, high_withdrawal, below_low_risk) in product(
+        (False, True), repeat=6
+    ):
+        recommendations.append(tuple(_build_recommendations(
+            score=0 if below_low_risk else 70,
+            risk_category="High Risk" if high_risk else "Low Risk",
+            income_variance=0.3 if unstable else 0.0,
+            upi_txn_count=30 if low_upi else 31,
+            bill_payment_score=7 if irregular_bills else 8,
+            withdrawal_ratio=0.8 if high_withdrawal else 0.0
+        )))
+    return tuple(recommendations)
+
+
+_OUTCOMES = _compile_outcomes()
+_RECOMMENDATIONS = _compile_recommendations()
+
+
+def calculate_digital_trust_score(
+    avg_income: float,
+    income_variance: float,
+    upi_txn_count: int,
+    bill_payment_score: int,
+    withdrawal_ratio: float,
+    months_active: int
+) -> Tuple[int, str, Tuple[str, ...]]:
+    """
+    Calculate Digital Trust Score based on rule-based scoring logic.
+    
+    Served from the precompiled outcome table; the returned explanations
+    tuple is shared between calls and must not be modified.
+    
+    Returns:
+        Tuple of (score, risk_category, explanations)
+    """
+    return _OUTCOMES[_outcome_index(
+        avg_income, income_variance, upi_txn_count,
+        bill_payment_score, withdrawal_ratio, months_active
+    )]
+
+
+def generate_recommendations(
+    score: int,
+    risk_category: str,
+    income_variance: float,
+    upi_txn_count: int,
+    bill_payment_score: int,
+    withdrawal_ratio: float
+) -> Tuple[str, ...]:
+    """
+    Generate personalized recommendations for improving credit score.
+    
+    Served from the precompiled recommendation table.
+    
+    Returns:
+        Tuple of recommendation strings (shared, must not be modified)
+    """
+    index = risk_category == "High Risk"
+    index = index * 2 + (income_variance >= 0.3)
+    index = index * 2 + (upi_txn_count <= 30)
+    index = index * 2 + (bill_payment_score <= 7)
+    index = index * 2 + (withdrawal_ratio > 0.7)
+    index = index * 2 + (score < 70)
+    return _RECOMMENDATIONS[index]
@@ -0,0 +1,71 @@
+"""
+Fast JSON encoding for MongoDB documents.
+
+The routes normally build ``UserResponse``/``CreditProfileResponse`` objects,
+after which FastAPI validates them a second time against ``response_model``
+and serializes them with the stdlib encoder. For read endpoints whose data
+was already validated when it was written, the helpers here map documents
+straight to plain dicts with the response schema's fields and encode them
+with orjson, which handles ``datetime`` natively; ``ObjectId`` is encoded as
+its hex string. Returning ``MongoJSONResponse`` bypasses FastAPI's response
+validation entirely, while ``response_model`` still documents the shape.
+
+``python -m benchmarks.serialization`` compares both paths.
+"""
+
+from typing import Any, Dict, Optional
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+from app.explanations import profile_explanations
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content containing ObjectIds and datetimes as JSON bytes"""
+    return orjson.dumps(content, default=_default)
+
+
+class MongoJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, accepting ObjectId and datetime values"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def user_document(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a ``users`` document to the ``UserResponse`` shape"""
+    return {
+        "id": user["_id"],
+        "name": user["name"],
+        "email": user["email"],
+        "job_type": user["job_type"],
+        "months_active": user["months_active"],
+        "created_at": user["created_at"],
+    }
+
+
+def credit_profile_document(credit_profile: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Map a ``credit_profiles`` document to the ``CreditProfileResponse`` shape"""
+    if credit_profile is None:
+        return None
+    return {
+        "id": credit_profile["_id"],
+        "user_id": credit_profile["user_id"],
+        "avg_income": credit_profile["avg_income"],
+        "income_variance": credit_profile["income_variance"],
+        "upi_txn_count": credit_profile["upi_txn_count"],
+        "bill_payment_score": credit_profile["bill_payment_score"],
+        "withdrawal_ratio": credit_profile["withdrawal_ratio"],
+        "digital_trust_score": credit_profile["digital_trust_score"],
+        "risk_category": credit_profile["risk_category"],
+        "explanation": profile_explanations(credit_profile),
+        "created_at": credit_profile["created_at"],
+    }
@@ -0,0 +1,318 @@
+"""
+Pre-fork multi-worker server.
+
+The parent process imports the application (settings, compiled scoring
+tables), preloads NumPy and the ML model, binds the listening socket and
+then forks ``SERVE_WORKERS`` uvicorn workers that share that socket. Work
+done before the fork is shared copy-on-write; the MongoDB client, caches
+and background services are created per worker by the application
+lifespan, after the fork.
+
+Workers are recycled gracefully: a worker exits after serving its
+(jittered) ``WORKER_MAX_REQUESTS`` and ``SIGHUP`` restarts all workers one
+at a time. Exited workers are respawned into the same slot. ``SIGTERM`` or
+``SIGINT`` stops every worker, waiting ``WORKER_GRACEFUL_TIMEOUT`` seconds
+for in-flight requests and the lifespan shutdown before killing it.
+
+Per-worker request and restart counts are kept in shared memory and
+exported by every worker's ``/metrics``. All other metrics use
+prometheus_client's multiprocess mode: workers write them to files in
+``PROMETHEUS_MULTIPROC_DIR`` (a fresh temporary directory unless set; it is
+emptied at startup) and any worker's ``/metrics`` merges the whole pool.
+The files of exited workers are marked dead, so their gauges drop out while
+their counters keep counting.
+
+Usage (from backend/):
+    python -m app.serve --workers 16 --port 8000
+"""
+
+import gc
+import multiprocessing
+import os
+import random
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+from multiprocessing.connection import wait
+from typing import Dict, List, Optional, Sequence
+
+# Server settings
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "0")) or os.cpu_count() or 1
+WORKER_MAX_REQUESTS = int(os.getenv("WORKER_MAX_REQUESTS", "0"))
+WORKER_MAX_REQUESTS_JITTER = int(os.getenv("WORKER_MAX_REQUESTS_JITTER", "0"))
+WORKER_GRACEFUL_TIMEOUT = int(os.getenv("WORKER_GRACEFUL_TIMEOUT", "30"))
+
+# prometheus_client's multiprocess directory setting; read when it is first imported
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Seconds between supervisor checks for exited workers
+SUPERVISE_INTERVAL = 1.0
+# Exit code of a worker whose lifespan startup failed (as in uvicorn's CLI)
+STARTUP_FAILURE = 3
+
+
+class _CountRequests:
+    """ASGI middleware counting HTTP requests into a shared array slot"""
+
+    def __init__(self, app, counts, slot: int):
+        self.app = app
+        self.counts = counts
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            # Only this worker writes its slot, so no lock is needed
+            self.counts[self.slot] += 1
+        await self.app(scope, receive, send)
+
+
+class PreforkServer:
+    """Forks uvicorn workers on a shared socket and keeps them running"""
+
+    def __init__(
+        self,
+        app,
+        host: str = API_HOST,
+        port: int = API_PORT,
+        workers: int = SERVE_WORKERS,
+        max_requests: int = WORKER_MAX_REQUESTS,
+        max_requests_jitter: int = WORKER_MAX_REQUESTS_JITTER,
+        graceful_timeout: int = WORKER_GRACEFUL_TIMEOUT,
+        log_level: str = "info"
+    ):
+        if workers < 1:
+            raise ValueError("At least one worker is required")
+
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+
+        self._context = multiprocessing.get_context("fork")
+        # Shared counters: one slot per worker, written without locks
+        self.requests = self._context.RawArray("Q", workers)
+        self.restarts = self._context.RawArray("Q", workers)
+        self.pids = self._context.RawArray("q", workers)
+
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._socket: Optional[socket.socket] = None
+        self._stopping = False
+        self._recycle_pending: List[int] = []
+        self._recycling: Optional[int] = None
+        self.exit_code = 0
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        return sock
+
+    def _worker_max_requests(self) -> Optional[int]:
+        if self.max_requests <= 0:
+            return None
+        # Jitter keeps workers started together from recycling together
+        return self.max_requests + random.randint(0, max(self.max_requests_jitter, 0))
+
+    def _run_worker(self, slot: int):
+        import uvicorn
+
+        # The parent's handlers must not run here; uvicorn installs its own
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+
+        config = uvicorn.Config(
+            _CountRequests(self.app, self.requests, slot),
+            lifespan="on",
+            limit_max_requests=self._worker_max_requests(),
+            timeout_graceful_shutdown=self.graceful_timeout,
+            log_level=self.log_level
+        )
+        server = uvicorn.Server(config)
+        server.run(sockets=[self._socket])
+        if not server.started:
+            raise SystemExit(STARTUP_FAILURE)
+
+    def _spawn(self, slot: int):
+        process = self._context.Process(target=self._run_worker, args=(slot,), name=f"worker-{slot}")
+        process.start()
+        self._processes[slot] = process
+        self.pids[slot] = process.pid
+        print(f"Worker {slot} started (pid {process.pid})")
+
+    def _reap(self):
+        """Respawn workers that exited, unless the server is stopping"""
+        for slot, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del self._processes[slot]
+            self.pids[slot] = 0
+            _mark_worker_dead(process.pid)
+            if self._stopping:
+                continue
+            if process.exitcode == STARTUP_FAILURE:
+                # Respawning would fail the same way (bad settings, database unreachable)
+                print(f"Worker {slot} failed to start; shutting down")
+                self._stopping = True
+                self.exit_code = STARTUP_FAILURE
+                continue
+            print(f"Worker {slot} (pid {process.pid}) exited with code {process.exitcode}; respawning")
+            self.restarts[slot] += 1
+            self._spawn(slot)
+            if self._recycling == slot:
+                self._recycling = None
+
+    def _recycle_next(self):
+        """Restart the next worker queued by SIGHUP once the previous one is back"""
+        if self._recycling is not None or not self._recycle_pending or self._stopping:
+            return
+        slot = self._recycle_pending.pop(0)
+        process = self._processes.get(slot)
+        if process is None or not process.is_alive():
+            # Already exited; _reap respawns it
+            return
+        self._recycling = slot
+        print(f"Recycling worker {slot} (pid {process.pid})")
+        process.terminate()
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_recycle(self, signum, frame):
+        self._recycle_pending = list(range(self.workers))
+
+    def _stop_workers(self):
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        for slot, process in self._processes.items():
+            process.join(self.graceful_timeout + 5)
+            if process.is_alive():
+                print(f"Worker {slot} (pid {process.pid}) did not stop in time; killing")
+                process.kill()
+                process.join()
+            self.pids[slot] = 0
+            _mark_worker_dead(process.pid)
+        self._processes.clear()
+
+    def run(self) -> int:
+        """Fork the workers and supervise them until SIGTERM/SIGINT; returns the exit code"""
+        self._socket = self._bind()
+        print(f"Serving on http://{self.host}:{self.port} with {self.workers} workers")
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_recycle)
+
+        # Objects allocated so far are never collected, so the cyclic GC
+        # won't touch (and copy) their pages in the workers
+        gc.collect()
+        gc.freeze()
+
+        try:
+            for slot in range(self.workers):
+                self._spawn(slot)
+            while not self._stopping:
+                wait([process.sentinel for process in self._processes.values()], timeout=SUPERVISE_INTERVAL)
+                self._reap()
+                self._recycle_next()
+        finally:
+            self._stopping = True
+            self._stop_workers()
+            self._socket.close()
+            print("All workers stopped")
+        return self.exit_code
+
+
+def _mark_worker_dead(pid: int):
+    """Drop an exited worker's live gauges from the merged metrics"""
+    if os.getenv(MULTIPROC_DIR_ENV):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
+
+
+def prepare_metrics_dir() -> Optional[str]:
+    """
+    Point prometheus_client at an empty directory for the workers' metric
+    files. Must run before prometheus_client is imported.
+
+    Returns:
+        The directory if it was created here (remove it on exit), else None
+    """
+    path = os.getenv(MULTIPROC_DIR_ENV)
+    created = None
+    if not path:
+        if "prometheus_client" in sys.modules:
+            raise RuntimeError(f"prometheus_client was imported before {MULTIPROC_DIR_ENV} was set")
+        path = created = tempfile.mkdtemp(prefix="credit-risk-metrics-")
+        os.environ[MULTIPROC_DIR_ENV] = path
+    os.makedirs(path, exist_ok=True)
+    # Files left by an earlier run would be merged into this one's metrics
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+    return created
+
+
+def preload():
+    """Import and load everything workers can share, and return the ASGI app"""
+    from app.main import app
+    from app.metrics import metrics_registry
+    from app.ml.serving import preload_ml, preload_model
+
+    preload_ml(True)
+    preload_model()
+    return app, metrics_registry()
+
+
+def _main(argv: Optional[Sequence[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the API with pre-forked workers")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-requests", type=int, default=WORKER_MAX_REQUESTS,
+                        help="recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=WORKER_MAX_REQUESTS_JITTER,
+                        help="random extra requests added to each worker's limit")
+    parser.add_argument("--graceful-timeout", type=int, default=WORKER_GRACEFUL_TIMEOUT,
+                        help="seconds a stopping worker gets to finish in-flight requests")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    metrics_dir = prepare_metrics_dir()
+    from app.metrics import WorkerCollector
+
+    app, registry = preload()
+    server = PreforkServer(
+        app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        log_level=args.log_level
+    )
+    registry.register(WorkerCollector(server.requests, server.restarts, server.pids))
+    try:
+        return server.run()
+    finally:
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
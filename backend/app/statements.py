@@ -0,0 +1,216 @@
+"""
+Score features from bank/UPI transaction statements.
+
+Statements are CSV files with a header row including an ``amount`` column
+and, optionally, a ``description`` column. Positive amounts are income and
+the rest are spending. The features match the dashboard's original
+in-browser calculation:
+
+- ``avg_income``: total income / statement months (3 by default), rounded
+- ``income_variance``: population variance of income amounts / 10,000,000,
+  capped at 1 and rounded to 2 decimals
+- ``upi_txn_count``: transactions whose description contains "upi"
+- ``bill_payment_score``: 2 per description containing "bill", "elect" or
+  "water", capped at 10
+- ``withdrawal_ratio``: total spending / total income, rounded to 2 decimals
+  (and capped at 1, the API's limit)
+
+The file is read in fixed-size blocks in a single pass, so memory stays
+bounded whatever its size. Income variance is merged block by block with
+the parallel form of Welford's algorithm (Chan et al.), which stays
+accurate where a sum-of-squares formula would cancel catastrophically.
+Like the dashboard, rows whose column count differs from the header are
+skipped; so are rows whose amount is not a number.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, List, Optional
+
+# Bytes read from the upload per block
+STATEMENT_BLOCK_SIZE = 1 << 20
+# Longest line accepted; guards against binary uploads without newlines
+MAX_LINE_BYTES = 64 * 1024
+DEFAULT_STATEMENT_MONTHS = 3
+
+# Normalizes income variance (in rupees squared) into [0, 1]
+VARIANCE_NORMALIZER = 10_000_000
+
+
+class StatementError(ValueError):
+    """Raised when an upload is not a usable transaction statement"""
+
+
+@dataclass
+class StatementFeatures:
+    """Score features and totals derived from one statement"""
+    avg_income: float
+    income_variance: float
+    upi_txn_count: int
+    bill_payment_score: int
+    withdrawal_ratio: float
+    total_income: float
+    total_expense: float
+    transactions: int
+    skipped_rows: int
+
+    def score_inputs(self) -> Dict[str, Any]:
+        """Keyword arguments for ``calculate_digital_trust_score`` (without months_active)"""
+        return {
+            "avg_income": self.avg_income,
+            "income_variance": self.income_variance,
+            "upi_txn_count": self.upi_txn_count,
+            "bill_payment_score": self.bill_payment_score,
+            "withdrawal_ratio": self.withdrawal_ratio,
+        }
+
+
+class StatementAggregator:
+    """Single-pass aggregates over statement bytes fed block by block"""
+
+    def __init__(self):
+        self._columns: Optional[int] = None
+        self._amount = 0
+        self._description: Optional[int] = None
+        self._partial = b""
+
+        self.transactions = 0
+        self.skipped_rows = 0
+        self.upi_count = 0
+        self.bill_count = 0
+        self.total_income = 0.0
+        self.total_expense = 0.0
+        # Running count, mean and sum of squared deviations of income amounts
+        self.income_count = 0
+        self.income_mean = 0.0
+        self.income_m2 = 0.0
+
+    def _read_header(self, line: bytes):
+        if not line.strip():
+            return
+        headers = [name.strip().lower() for name in line.decode("utf-8-sig", errors="replace").split(",")]
+        if "amount" not in headers:
+            raise StatementError("Statement has no 'amount' column")
+        self._columns = len(headers)
+        self._amount = headers.index("amount")
+        self._description = headers.index("description") if "description" in headers else None
+
+    def feed(self, block: bytes):
+        """Consume the next block of the file"""
+        lines = (self._partial + block).split(b"\n")
+        self._partial = lines.pop()
+        if len(self._partial) > MAX_LINE_BYTES:
+            raise StatementError(f"Statement line longer than {MAX_LINE_BYTES} bytes")
+        self._consume(lines)
+
+    def _consume(self, lines: List[bytes]):
+        start = 0
+        while self._columns is None and start < len(lines):
+            self._read_header(lines[start])
+            start += 1
+
+        columns, amount_column, description_column = self._columns, self._amount, self._description
+        incomes = []
+        expense = 0.0
+        upi = bills = skipped = transactions = 0
+        for line in lines[start:]:
+            values = line.split(b",")
+            if len(values) != columns:
+                # Blank lines (and any other row shape) are ignored
+                if line.strip():
+                    skipped += 1
+                continue
+            try:
+                amount = float(values[amount_column])
+            except ValueError:
+                skipped += 1
+                continue
+            if math.isnan(amount) or math.isinf(amount):
+                skipped += 1
+                continue
+
+            transactions += 1
+            if amount > 0:
+                incomes.append(amount)
+            else:
+                expense -= amount
+            if description_column is not None:
+                description = values[description_column].lower()
+                if b"upi" in description:
+                    upi += 1
+                if b"bill" in description or b"elect" in description or b"water" in description:
+                    bills += 1
+
+        self.transactions += transactions
+        self.skipped_rows += skipped
+        self.upi_count += upi
+        self.bill_count += bills
+        self.total_expense += expense
+        if incomes:
+            self._merge_incomes(incomes)
+
+    def _merge_incomes(self, incomes: List[float]):
+        """Merge one block's income amounts into the running moments"""
+        count = len(incomes)
+        total = math.fsum(incomes)
+        mean = total / count
+        m2 = math.fsum((income - mean) ** 2 for income in incomes)
+
+        combined = self.income_count + count
+        delta = mean - self.income_mean
+        self.income_mean += delta * count / combined
+        self.income_m2 += m2 + delta * delta * self.income_count * count / combined
+        self.income_count = combined
+        self.total_income += total
+
+    def finish(self, months: int = DEFAULT_STATEMENT_MONTHS) -> StatementFeatures:
+        """Flush the last line and compute the features"""
+        if self._partial:
+            self._consume([self._partial])
+            self._partial = b""
+        if self._columns is None:
+            raise StatementError("Statement is empty")
+        if not self.transactions:
+            raise StatementError("Statement has no transactions")
+
+        variance = self.income_m2 / self.income_count if self.income_count else 0.0
+        normalized_variance = min(variance / VARIANCE_NORMALIZER, 1.0) if variance > 0 else 0.0
+        withdrawal_ratio = self.total_expense / self.total_income if self.total_income > 0 else 0.0
+
+        return StatementFeatures(
+            # Half-up, as the dashboard's Math.round
+            avg_income=float(math.floor(self.total_income / months + 0.5)),
+            income_variance=round(normalized_variance, 2),
+            upi_txn_count=self.upi_count,
+            bill_payment_score=min(self.bill_count * 2, 10),
+            withdrawal_ratio=min(round(withdrawal_ratio, 2), 1.0),
+            total_income=self.total_income,
+            total_expense=self.total_expense,
+            transactions=self.transactions,
+            skipped_rows=self.skipped_rows
+        )
+
+
+def parse_statement(
+    stream: BinaryIO,
+    months: int = DEFAULT_STATEMENT_MONTHS,
+    block_size: int = STATEMENT_BLOCK_SIZE
+) -> StatementFeatures:
+    """
+    Compute score features from a binary statement stream in one pass.
+
+    Blocking; call it from a worker thread when serving requests.
+
+    Raises:
+        StatementError: if the stream is not a usable statement
+    """
+    if months < 1:
+        raise StatementError("Statement must cover at least one month")
+
+    aggregator = StatementAggregator()
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        aggregator.feed(block)
+    return aggregator.finish(months)
@@ -0,0 +1,257 @@
+"""
+Materialized portfolio statistics.
+
+A single ``stats`` document (``_id: "portfolio"``) holds counts of scored
+users per ``risk_category`` and per ``job_type`` and a histogram of
+``digital_trust_score``, all taken from each user's latest credit profile,
+plus the total number of profiles written. Score writes keep it current
+with one atomic ``$inc``: the delta moves the user from their previous
+latest profile's category and bucket to the new one's, so reading the
+stats is a single point read however large the portfolio grows.
+
+The increments are applied after the profile is embedded, not in the same
+transaction, so a crash in between (or profiles embedded by the backfill
+job) can leave the counters off. ``rebuild_portfolio_stats`` recomputes the
+document from ``users`` with an aggregation pipeline:
+
+    python -m app.stats --rebuild
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence
+
+from bson import ObjectId
+
+from app.profiles import LATEST_PROFILE_FIELD
+from app.scoring import RISK_CATEGORIES
+
+PORTFOLIO_STATS_ID = "portfolio"
+# Histogram buckets are SCORE_BUCKET_WIDTH points wide; 100 falls in the last one
+SCORE_BUCKET_WIDTH = 10
+SCORE_BUCKETS = tuple(range(0, 100, SCORE_BUCKET_WIDTH))
+
+
+def score_bucket(score: int) -> int:
+    """Lower bound of the histogram bucket containing ``score``"""
+    return min(score // SCORE_BUCKET_WIDTH * SCORE_BUCKET_WIDTH, SCORE_BUCKETS[-1])
+
+
+def _key(value: str) -> str:
+    """Escape a value for use as a field name in an ``$inc`` path"""
+    return value.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def _unkey(key: str) -> str:
+    return key.replace("%24", "$").replace("%2E", ".").replace("%25", "%")
+
+
+def _add(inc: Dict[str, int], field: str, amount: int):
+    inc[field] = inc.get(field, 0) + amount
+    if inc[field] == 0:
+        del inc[field]
+
+
+def profile_change_delta(
+    previous_profile: Optional[Dict[str, Any]],
+    credit_profile: Optional[Dict[str, Any]],
+    job_type: str
+) -> Dict[str, int]:
+    """
+    ``$inc`` counters for replacing a user's latest profile.
+
+    Args:
+        previous_profile: The user's latest profile before the write, or
+            None if they had never been scored
+        credit_profile: The new latest profile, or None if the write did
+            not replace the latest profile (only ``profiles`` changes)
+        job_type: The user's job type
+    """
+    inc: Dict[str, int] = {"profiles": 1}
+    if credit_profile is None:
+        return inc
+
+    if previous_profile is None:
+        _add(inc, "scored_users", 1)
+        _add(inc, f"job_type.{_key(job_type)}", 1)
+    else:
+        _add(inc, f"risk_category.{_key(previous_profile['risk_category'])}", -1)
+        _add(inc, f"score_histogram.{score_bucket(previous_profile['digital_trust_score'])}", -1)
+    _add(inc, f"risk_category.{_key(credit_profile['risk_category'])}", 1)
+    _add(inc, f"score_histogram.{score_bucket(credit_profile['digital_trust_score'])}", 1)
+    return inc
+
+
+def batch_profile_delta(
+    credit_profiles: Sequence[Dict[str, Any]],
+    previous_users: Dict[ObjectId, Optional[Dict[str, Any]]]
+) -> Dict[str, int]:
+    """
+    ``$inc`` counters for a batch of profiles embedded with
+    ``embed_latest_profiles`` (the last profile per user is embedded).
+
+    Args:
+        credit_profiles: Profiles written, in order
+        previous_users: What ``embed_latest_profiles`` returned: each user's
+            fields in ``PREVIOUS_PROFILE_PROJECTION`` from before the
+            update, or None where the profile did not become latest
+    """
+    latest_by_user: Dict[ObjectId, Dict[str, Any]] = {}
+    for credit_profile in credit_profiles:
+        latest_by_user[ObjectId(credit_profile["user_id"])] = credit_profile
+
+    inc: Dict[str, int] = {}
+    _add(inc, "profiles", len(credit_profiles) - len(latest_by_user))
+    for user_id, credit_profile in latest_by_user.items():
+        user = previous_users.get(user_id)
+        if user is None:
+            delta = profile_change_delta(None, None, "")
+        else:
+            delta = profile_change_delta(user.get(LATEST_PROFILE_FIELD), credit_profile, user["job_type"])
+        for field, amount in delta.items():
+            _add(inc, field, amount)
+    return inc
+
+
+async def record_profile_write(db, previous_user: Optional[Dict[str, Any]], credit_profile: Dict[str, Any]):
+    """
+    Update the stats for one profile written by ``store_credit_profile``.
+
+    ``previous_user`` is what ``embed_latest_profile`` returned: None means
+    the profile did not become the user's latest.
+    """
+    if previous_user is None:
+        delta = profile_change_delta(None, None, "")
+    else:
+        delta = profile_change_delta(
+            previous_user.get(LATEST_PROFILE_FIELD), credit_profile, previous_user["job_type"]
+        )
+    await apply_stats_delta(db, delta)
+
+
+async def apply_stats_delta(db, inc: Dict[str, int]):
+    """Apply an ``$inc`` delta to the portfolio stats document"""
+    if not inc:
+        return
+    await db.stats.update_one(
+        {"_id": PORTFOLIO_STATS_ID},
+        {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+async def rebuild_portfolio_stats(db) -> Dict[str, Any]:
+    """
+    Recompute the stats document from the users' embedded latest profiles.
+
+    Increments that land while the aggregation runs may be lost; run it
+    when writes are quiet, or again afterwards.
+    """
+    pipeline = [
+        {"$match": {LATEST_PROFILE_FIELD: {"$ne": None}}},
+        {"$facet": {
+            "risk_category": [
+                {"$group": {"_id": f"${LATEST_PROFILE_FIELD}.risk_category", "count": {"$sum": 1}}},
+            ],
+            "job_type": [
+                {"$group": {"_id": "$job_type", "count": {"$sum": 1}}},
+            ],
+            "score_histogram": [
+                {"$bucket": {
+                    "groupBy": f"${LATEST_PROFILE_FIELD}.digital_trust_score",
+                    # Scores are 0-100, so every score falls in a boundary range and no
+                    # "default" bucket is needed (MongoDB rejects one inside the range)
+                    "boundaries": list(SCORE_BUCKETS) + [101],
+                }},
+            ],
+        }},
+    ]
+    facets = (await db.users.aggregate(pipeline).to_list(length=1))[0]
+
+    now = datetime.utcnow()
+    document = {
+        "_id": PORTFOLIO_STATS_ID,
+        "scored_users": sum(row["count"] for row in facets["risk_category"]),
+        "profiles": await db.credit_profiles.count_documents({}),
+        "risk_category": {_key(row["_id"]): row["count"] for row in facets["risk_category"]},
+        "job_type": {_key(row["_id"]): row["count"] for row in facets["job_type"]},
+        "score_histogram": {str(row["_id"]): row["count"] for row in facets["score_histogram"]},
+        "rebuilt_at": now,
+        "updated_at": now,
+    }
+    await db.stats.replace_one({"_id": PORTFOLIO_STATS_ID}, document, upsert=True)
+    return document
+
+
+async def ensure_portfolio_stats(db):
+    """
+    Build the stats document if it does not exist yet.
+
+    Called on startup, so increments from the first score writes are
+    applied on top of the existing portfolio rather than starting from zero.
+    """
+    if await db.stats.find_one({"_id": PORTFOLIO_STATS_ID}, {"_id": 1}) is None:
+        await rebuild_portfolio_stats(db)
+        print("Portfolio stats built")
+
+
+async def get_portfolio_stats(db) -> Dict[str, Any]:
+    """
+    Read the stats document, building it first if it does not exist yet.
+
+    Zero counts are omitted for job types; every risk category and score
+    bucket is always present.
+    """
+    document = await db.stats.find_one({"_id": PORTFOLIO_STATS_ID})
+    if document is None:
+        document = await rebuild_portfolio_stats(db)
+
+    risk_counts = {_unkey(key): count for key, count in document.get("risk_category", {}).items()}
+    histogram = document.get("score_histogram", {})
+    return {
+        "scored_users": document.get("scored_users", 0),
+        "profiles": document.get("profiles", 0),
+        "risk_category": {category: risk_counts.get(category, 0) for category in RISK_CATEGORIES},
+        "job_type": {
+            _unkey(key): count
+            for key, count in sorted(document.get("job_type", {}).items(), key=lambda item: -item[1])
+            if count
+        },
+        "score_histogram": [
+            {
+                "min_score": bucket,
+                "max_score": 100 if bucket == SCORE_BUCKETS[-1] else bucket + SCORE_BUCKET_WIDTH - 1,
+                "count": histogram.get(str(bucket), 0),
+            }
+            for bucket in SCORE_BUCKETS
+        ],
+        "updated_at": document.get("updated_at"),
+        "rebuilt_at": document.get("rebuilt_at"),
+    }
+
+
+async def _main(argv: Optional[Sequence[str]] = None):
+    import argparse
+
+    from app.database import connect_to_mongo, close_mongo_connection, get_database
+
+    parser = argparse.ArgumentParser(description="Portfolio statistics")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the stats document from users")
+    args = parser.parse_args(argv)
+
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        if args.rebuild:
+            await rebuild_portfolio_stats(db)
+        stats = await get_portfolio_stats(db)
+        print(f"Scored users: {stats['scored_users']} ({stats['profiles']} profiles)")
+        for category, count in stats["risk_category"].items():
+            print(f"  {category}: {count}")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(_main())
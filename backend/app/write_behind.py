@@ -0,0 +1,242 @@
+"""
+Write-behind buffer for MongoDB inserts.
+
+Documents are given a client-side ``_id`` by the caller, queued, and written
+with ``insert_many`` once ``max_batch_size`` documents are pending or
+``flush_interval_ms`` has passed since the first one was queued. The queue is
+bounded: when it is full, ``submit`` waits, pushing back on request handlers
+instead of growing without limit. A batch that cannot be written is counted
+as failed and logged, and the worker moves on to the next one; if the worker
+stops anyway, the next ``submit`` restarts it. ``drain`` (called from the lifespan
+shutdown) writes everything still pending before the client is closed.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.database import get_database
+from app.metrics import WRITE_BEHIND_FLUSH_LATENCY, WRITE_BEHIND_PENDING, WRITE_BEHIND_WRITES
+
+# Write-behind settings for credit_profiles
+CREDIT_PROFILE_WRITE_BEHIND = os.getenv("CREDIT_PROFILE_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+WRITE_BEHIND_MAX_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_MAX_BATCH_SIZE", "500"))
+WRITE_BEHIND_FLUSH_INTERVAL_MS = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL_MS", "50"))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000"))
+WRITE_BEHIND_MAX_RETRIES = 3
+
+# MongoDB error code for a unique index violation
+DUPLICATE_KEY_ERROR = 11000
+
+_STOP = object()
+
+
+class WriteBehindBuffer:
+    """
+    Buffers documents for one collection and inserts them in batches.
+
+    ``on_written``, if given, is awaited with each batch's inserted
+    documents, so writes that depend on them (denormalized copies,
+    counters) are batched too and stay off the request path.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        max_batch_size: int = WRITE_BEHIND_MAX_BATCH_SIZE,
+        flush_interval_ms: float = WRITE_BEHIND_FLUSH_INTERVAL_MS,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING,
+        on_written: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+    ):
+        self.collection_name = collection_name
+        self.on_written = on_written
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue(max_pending)
+        self._worker: Optional[asyncio.Task] = None
+        self._closed = False
+        # Queued documents not yet handed to insert_many, by _id (see amend)
+        self._queued: Dict[Any, Dict[str, Any]] = {}
+        self._pending_gauge = WRITE_BEHIND_PENDING.labels(collection_name)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    async def submit(self, document: Dict[str, Any]):
+        """
+        Queue a document for insertion.
+
+        The document must already carry its ``_id``. Waits while the buffer
+        is full; after ``drain`` has started, writes the document directly.
+        """
+        if self._closed:
+            await self._write([document])
+            return
+        self._ensure_worker()
+        self._queued[document["_id"]] = document
+        await self._queue.put(document)
+        self._pending_gauge.set(self._queue.qsize())
+
+    def amend(self, document_id: Any, fields: Dict[str, Any]) -> bool:
+        """
+        Set fields on a document that is still queued, so they are written
+        with the insert.
+
+        Returns False if the document is not queued (already being written,
+        written, or never submitted); the caller must then update it in the
+        collection.
+        """
+        document = self._queued.get(document_id)
+        if document is None:
+            return False
+        document.update(fields)
+        return True
+
+    async def drain(self):
+        """Stop buffering and write everything that is still queued"""
+        if self._closed:
+            return
+        self._closed = True
+        await self._queue.put(_STOP)
+        if self._worker is not None:
+            await self._worker
+            self._worker = None
+
+        # Submitters that were blocked on a full queue may have queued after the stop marker
+        leftover = []
+        while not self._queue.empty():
+            document = self._queue.get_nowait()
+            if document is not _STOP:
+                leftover.append(document)
+        self._queued.clear()
+        for start in range(0, len(leftover), self.max_batch_size):
+            await self._write(leftover[start:start + self.max_batch_size])
+        self._pending_gauge.set(0)
+
+    def _ensure_worker(self):
+        """Restart the worker if it has stopped, so a full queue never blocks forever"""
+        if self._worker is None or not self._worker.done():
+            return
+        if not self._worker.cancelled() and self._worker.exception() is not None:
+            print(f"Write-behind: {self.collection_name} worker stopped ({self._worker.exception()!r}); "
+                  f"restarting")
+        self._worker = asyncio.create_task(self._run())
+
+    async def _collect_batch(self) -> List[Any]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.flush_interval
+
+        while len(batch) < self.max_batch_size and batch[-1] is not _STOP:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            stop = batch[-1] is _STOP
+            documents = batch[:-1] if stop else batch
+            for document in documents:
+                self._queued.pop(document["_id"], None)
+            if documents:
+                try:
+                    await self._write(documents)
+                except Exception as exc:
+                    # Never let one batch stop the worker: submitters would block on the full queue
+                    WRITE_BEHIND_WRITES.labels(self.collection_name, "failed").inc(len(documents))
+                    print(f"Write-behind: dropped {len(documents)} {self.collection_name} documents: {exc!r}")
+            self._pending_gauge.set(self._queue.qsize())
+            if stop:
+                return
+
+    async def _write(self, documents: List[Dict[str, Any]]):
+        """Insert a batch, then run ``on_written`` for the documents that were written"""
+        written = await self._insert(documents)
+        if written and self.on_written is not None:
+            try:
+                await self.on_written(written)
+            except Exception as exc:
+                print(f"Write-behind: follow-up writes for {len(written)} {self.collection_name} "
+                      f"documents failed: {exc!r}")
+
+    async def _insert(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert a batch, retrying transient failures; returns the documents now stored"""
+        collection = get_database()[self.collection_name]
+        for attempt in range(1, WRITE_BEHIND_MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                await collection.insert_many(documents, ordered=False)
+            except BulkWriteError as exc:
+                # Documents that already exist came from an earlier partial attempt
+                errors = exc.details.get("writeErrors", [])
+                failed = [e for e in errors if e.get("code") != DUPLICATE_KEY_ERROR]
+                WRITE_BEHIND_WRITES.labels(self.collection_name, "written").inc(len(documents) - len(errors))
+                if failed:
+                    WRITE_BEHIND_WRITES.labels(self.collection_name, "failed").inc(len(failed))
+                    print(f"Write-behind: {len(failed)} {self.collection_name} documents rejected: "
+                          f"{failed[0].get('errmsg')}")
+                rejected = {e.get("index") for e in failed}
+                return [document for index, document in enumerate(documents) if index not in rejected]
+            except PyMongoError as exc:
+                if attempt == WRITE_BEHIND_MAX_RETRIES:
+                    WRITE_BEHIND_WRITES.labels(self.collection_name, "failed").inc(len(documents))
+                    print(f"Write-behind: dropped {len(documents)} {self.collection_name} documents "
+                          f"after {attempt} attempts: {exc}")
+                    return []
+                await asyncio.sleep(0.1 * 2 ** attempt)
+            except Exception as exc:
+                # Not transient (e.g. InvalidDocument); retrying would fail the same way
+                WRITE_BEHIND_WRITES.labels(self.collection_name, "failed").inc(len(documents))
+                print(f"Write-behind: dropped {len(documents)} {self.collection_name} documents: {exc!r}")
+                return []
+            else:
+                WRITE_BEHIND_FLUSH_LATENCY.labels(self.collection_name).observe(time.perf_counter() - start)
+                WRITE_BEHIND_WRITES.labels(self.collection_name, "written").inc(len(documents))
+                return documents
+        return []
+
+
+# Buffer for credit_profiles, started by the lifespan when write-behind is enabled
+_credit_profile_buffer: Optional[WriteBehindBuffer] = None
+
+
+async def start_credit_profile_buffer(
+    enabled: bool = CREDIT_PROFILE_WRITE_BEHIND,
+    on_written: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+):
+    global _credit_profile_buffer
+
+    if enabled:
+        _credit_profile_buffer = WriteBehindBuffer("credit_profiles", on_written=on_written)
+        await _credit_profile_buffer.start()
+        print("Write-behind enabled for credit_profiles")
+
+
+async def drain_credit_profile_buffer():
+    global _credit_profile_buffer
+
+    if _credit_profile_buffer is not None:
+        await _credit_profile_buffer.drain()
+        _credit_profile_buffer = None
+
+
+def get_credit_profile_buffer() -> Optional[WriteBehindBuffer]:
+    """Get the credit_profiles buffer, or None if writes are synchronous"""
+    return _credit_profile_buffer
@@ -0,0 +1,99 @@
+"""
+Conditional GET benchmark.
+
+Polls ``GET /users`` (one page) and ``GET /user/{id}`` the way the
+frontends do, through ``app.main:app`` on an in-process ASGI transport
+backed by the in-memory MongoDB stand-in, and compares plain requests
+with revalidations carrying the previous response's ETag in
+``If-None-Match`` (what a browser sends for a ``Cache-Control: no-cache``
+response). Reports CPU time and wall time per request and response body
+bytes.
+
+The stand-in runs queries in Python, so CPU time includes the work a real
+MongoDB would do out of process: compare the two modes, not absolute
+numbers. A detail 304 still reads the user's version with a point read,
+so expect it to save the body's bytes but little or no CPU (the printed
+difference there is within run-to-run noise).
+
+Usage (from backend/):
+    python -m benchmarks.etags --users 2000 --polls 500
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict, Optional
+
+import httpx
+
+# Sets up the stand-in environment before the app is imported
+from benchmarks.load_test import AsyncMongoMockClient, api
+
+import app.database
+import app.history
+
+
+async def poll(client: httpx.AsyncClient, path: str, polls: int, etag: Optional[str]) -> Dict[str, float]:
+    headers = {"If-None-Match": etag} if etag else {}
+    body_bytes = 0
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    for _ in range(polls):
+        response = await client.get(path, headers=headers)
+        expected = 304 if etag else 200
+        if response.status_code != expected:
+            raise AssertionError(f"{path}: expected {expected}, got {response.status_code}")
+        body_bytes += len(response.content)
+    return {
+        "cpu_ms": (time.process_time() - cpu) / polls * 1000,
+        "wall_ms": (time.perf_counter() - wall) / polls * 1000,
+        "bytes": body_bytes / polls,
+    }
+
+
+async def run(args):
+    app.database.AsyncIOMotorClient = AsyncMongoMockClient
+    app.history.SCORE_HISTORY_TIMESERIES = False
+
+    async with api.router.lifespan_context(api):
+        transport = httpx.ASGITransport(app=api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://etags") as client:
+            for start in range(0, args.users, 1000):
+                await client.post("/register/bulk", json={"users": [
+                    {"name": f"Poll {i}", "email": f"poll.{i}@example.com", "job_type": "Gig Worker",
+                     "months_active": i % 48}
+                    for i in range(start, min(start + 1000, args.users))
+                ]})
+            user_id = (await client.get("/users?limit=1")).json()["users"][0]["id"]
+            await client.post("/calculate-score", json={
+                "user_id": user_id, "avg_income": 30000, "income_variance": 0.2, "upi_txn_count": 40,
+                "bill_payment_score": 8, "withdrawal_ratio": 0.3
+            })
+
+            print(f"{'endpoint':<24}{'mode':<14}{'cpu ms':>10}{'wall ms':>10}{'bytes':>10}")
+            for label, path in ((f"/users?limit={args.page_size}", f"/users?limit={args.page_size}"),
+                                ("/user/{id}", f"/user/{user_id}")):
+                etag = (await client.get(path)).headers["etag"]
+                full = await poll(client, path, args.polls, None)
+                revalidated = await poll(client, path, args.polls, etag)
+                for mode, result in (("200 full", full), ("304 etag", revalidated)):
+                    print(f"{label:<24}{mode:<14}{result['cpu_ms']:>10.3f}{result['wall_ms']:>10.3f}"
+                          f"{result['bytes']:>10.0f}")
+                print(f"{'':<24}{'saved':<14}{1 - revalidated['cpu_ms'] / full['cpu_ms']:>10.0%}"
+                      f"{'':>10}{full['bytes'] - revalidated['bytes']:>10.0f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--polls", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+In-process async load test.
+
+Drives ``app.main:app`` through an in-process ASGI transport with an async
+HTTP client, backed by an in-memory MongoDB stand-in (mongomock-motor), so
+no server or database is needed. Runs a configurable mix of register /
+score / list / detail calls at a fixed concurrency and reports throughput
+and p50/p95/p99 latency per route.
+
+The stand-in executes queries synchronously in Python, so results measure
+the application's own per-request cost (validation, scoring, serialization,
+middleware), not real database latency. Compare runs on the same machine.
+Admission control is off unless ``ADMISSION_CONTROL=true`` is set
+(``python -m benchmarks.overload`` covers it).
+
+Requires the packages in requirements-dev.txt.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --requests 5000 --concurrency 64
+    python -m benchmarks.load_test --mix score=8,detail=2 --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+# The stand-in's queries block the event loop, so admission queue timeouts
+# would reflect the stand-in rather than the API; opt in with ADMISSION_CONTROL=true
+os.environ.setdefault("ADMISSION_CONTROL", "false")
+
+import app.database
+import app.history
+from app.main import app as api
+
+OPERATIONS = ("register", "score", "list", "detail")
+DEFAULT_MIX = "register=1,score=4,list=1,detail=4"
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LoadTest:
+    """Shared state for one load test run"""
+
+    def __init__(self, client: httpx.AsyncClient, seed: int):
+        self.client = client
+        self.rng = random.Random(seed)
+        self.user_ids: List[str] = []
+        self.registered = 0
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def next_user(self) -> dict:
+        self.registered += 1
+        return {
+            "name": f"Load Test {self.registered}",
+            "email": f"load.test.{self.registered}@example.com",
+            "job_type": self.rng.choice(["Delivery Driver", "Freelance Designer", "Gig Worker"]),
+            "months_active": self.rng.randint(0, 48),
+        }
+
+    def applicant(self) -> dict:
+        return {
+            "user_id": self.rng.choice(self.user_ids),
+            "avg_income": round(self.rng.uniform(5000, 60000), 2),
+            "income_variance": round(self.rng.random(), 3),
+            "upi_txn_count": self.rng.randint(0, 100),
+            "bill_payment_score": self.rng.randint(0, 10),
+            "withdrawal_ratio": round(self.rng.random(), 3),
+        }
+
+    async def register(self):
+        response = await self.client.post("/register", json=self.next_user())
+        if response.is_success:
+            self.user_ids.append(response.json()["id"])
+        return "POST /register", response
+
+    async def score(self):
+        return "POST /calculate-score", await self.client.post("/calculate-score", json=self.applicant())
+
+    async def list(self):
+        return "GET /users", await self.client.get("/users", params={"limit": 100})
+
+    async def detail(self):
+        user_id = self.rng.choice(self.user_ids)
+        return "GET /user/{id}", await self.client.get(f"/user/{user_id}")
+
+    async def seed(self, count: int):
+        for _ in range(count):
+            await self.register()
+        self.latencies.clear()
+        self.statuses.clear()
+
+    async def worker(self, operations: List[str], weights: List[int], remaining: List[int]):
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            operation = self.rng.choices(operations, weights)[0]
+            start = time.perf_counter()
+            route, response = await getattr(self, operation)()
+            self.latencies[route].append(time.perf_counter() - start)
+            self.statuses[route][response.status_code] += 1
+
+
+def summarize(latencies: List[float], statuses: Dict[int, int], elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    errors = sum(count for code, count in statuses.items() if code >= 400)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+async def run(args) -> dict:
+    # Any client the app creates during startup is the in-memory stand-in,
+    # which cannot create time-series collections
+    app.database.AsyncIOMotorClient = AsyncMongoMockClient
+    app.history.SCORE_HISTORY_TIMESERIES = False
+
+    async with api.router.lifespan_context(api):
+        transport = httpx.ASGITransport(app=api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            test = LoadTest(client, args.seed)
+            await test.seed(args.seed_users)
+
+            operations = list(args.mix)
+            weights = [args.mix[name] for name in operations]
+            remaining = [args.requests]
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                test.worker(operations, weights, remaining) for _ in range(args.concurrency)
+            ))
+            elapsed = time.perf_counter() - start
+
+    all_latencies = [value for values in test.latencies.values() for value in values]
+    all_statuses: Dict[int, int] = defaultdict(int)
+    for statuses in test.statuses.values():
+        for code, count in statuses.items():
+            all_statuses[code] += count
+
+    return {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "seed_users": args.seed_users,
+            "seed": args.seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "started_at": datetime.utcnow().isoformat(),
+        "elapsed_s": round(elapsed, 3),
+        "routes": {
+            route: summarize(test.latencies[route], test.statuses[route], elapsed)
+            for route in sorted(test.latencies)
+        },
+        "total": summarize(all_latencies, all_statuses, elapsed),
+    }
+
+
+def print_report(results: dict, baseline: dict = None):
+    header = f"{'route':<24}{'reqs':>8}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'Δrps':>9}{'Δp95':>9}"
+    print(header)
+    rows = list(results["routes"].items()) + [("TOTAL", results["total"])]
+    for route, stats in rows:
+        line = (
+            f"{route:<24}{stats['requests']:>8}{stats['errors']:>6}{stats['throughput_rps']:>10.1f}"
+            f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+        if baseline:
+            before = baseline["total"] if route == "TOTAL" else baseline["routes"].get(route)
+            if before:
+                line += f"{_delta(stats['throughput_rps'], before['throughput_rps']):>9}"
+                line += f"{_delta(stats['p95_ms'], before['p95_ms']):>9}"
+        print(line)
+
+
+def _delta(after: float, before: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="total requests to issue")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"weighted operation mix (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed-users", type=int, default=200, help="users registered before measuring")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON results to compare against")
+    args = parser.parse_args(argv)
+    if args.seed_users < 1:
+        parser.error("--seed-users must be at least 1")
+
+    results = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Overload benchmark for admission control.
+
+Serves a stand-in app through an in-process ASGI transport: its routes hold
+one of ``--db-connections`` simulated database connections for
+``--service-ms`` each, the way the real routes hold MongoDB pool
+connections, and ``/health`` does a 1 ms "ping" through the same
+connections. Requests arrive open-loop at ``--overload`` times the
+capacity for ``--seconds``. The run is repeated with and without
+``AdmissionMiddleware``.
+
+Requests are never cancelled, because a real server keeps working on a
+request after its client gives up. A response slower than
+``--client-timeout-ms`` counts as timed out: the client has already
+retried or failed, so the work was wasted. Reports goodput (responses
+within the timeout), 503s, and p50/p99 latency for successful requests
+and for ``/health`` probes.
+
+Usage (from backend/):
+    python -m benchmarks.overload
+    python -m benchmarks.overload --overload 3 --seconds 5 --limit 16 --queue 32
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI
+
+from app.admission import AdmissionMiddleware, AdmissionPool
+from benchmarks.load_test import percentile
+
+
+def build_app(args, admission: bool) -> FastAPI:
+    api = FastAPI()
+    connections = asyncio.Semaphore(args.db_connections)
+
+    async def query(seconds: float):
+        async with connections:
+            await asyncio.sleep(seconds)
+
+    @api.post("/calculate-score")
+    async def calculate_score():
+        await query(args.service_ms / 1000)
+        return {"digital_trust_score": 50}
+
+    @api.get("/health")
+    async def health():
+        await query(0.001)
+        return {"status": "healthy"}
+
+    if admission:
+        timeout = args.queue_timeout_ms / 1000
+        api.add_middleware(AdmissionMiddleware, pools={
+            name: AdmissionPool(name, args.limit, args.queue, timeout)
+            for name in ("scoring", "lists", "reads", "default")
+        })
+    return api
+
+
+async def run(args, admission: bool) -> Dict[str, object]:
+    api = build_app(args, admission)
+    capacity = args.db_connections / (args.service_ms / 1000)
+    interval = 1 / (capacity * args.overload)
+    total = int(args.seconds * capacity * args.overload)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[int, int] = defaultdict(int)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://bench") as client:
+        async def call(method: str, path: str, kind: str):
+            start = time.perf_counter()
+            response = await client.request(method, path)
+            elapsed = time.perf_counter() - start
+            if kind == "health":
+                latencies["health"].append(elapsed)
+                return
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                latencies["ok"].append(elapsed)
+
+        tasks = []
+        start = time.perf_counter()
+        for index in range(total):
+            # Sleep until this request's arrival time, keeping the rate open-loop
+            delay = start + index * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(call("POST", "/calculate-score", "score")))
+            if index % args.probe_every == 0:
+                tasks.append(asyncio.create_task(call("GET", "/health", "health")))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    timeout = args.client_timeout_ms / 1000
+    ok = sorted(latencies["ok"])
+    health = sorted(latencies["health"])
+    return {
+        "requests": total,
+        "goodput": sum(1 for latency in ok if latency <= timeout) / elapsed,
+        "timed_out": sum(1 for latency in ok if latency > timeout),
+        "rejected": statuses[503],
+        "p50_ms": percentile(ok, 50) * 1000,
+        "p99_ms": percentile(ok, 99) * 1000,
+        "health_p99_ms": percentile(health, 99) * 1000,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-connections", type=int, default=10)
+    parser.add_argument("--service-ms", type=float, default=20)
+    parser.add_argument("--overload", type=float, default=2.0, help="offered load as a multiple of capacity")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--client-timeout-ms", type=float, default=1000)
+    parser.add_argument("--limit", type=int, default=10, help="admission limit per pool")
+    parser.add_argument("--queue", type=int, default=20, help="admission queue size per pool")
+    parser.add_argument("--queue-timeout-ms", type=int, default=500)
+    parser.add_argument("--probe-every", type=int, default=50, help="send a /health probe every N requests")
+    args = parser.parse_args(argv)
+
+    capacity = args.db_connections / (args.service_ms / 1000)
+    print(f"capacity {capacity:.0f} req/s, offered {capacity * args.overload:.0f} req/s for {args.seconds:g} s, "
+          f"client timeout {args.client_timeout_ms:g} ms")
+    print(f"{'admission':<11}{'requests':>10}{'goodput/s':>11}{'timed out':>11}{'503s':>8}"
+          f"{'p50 ms':>10}{'p99 ms':>10}{'health p99 ms':>15}")
+    for admission in (False, True):
+        result = asyncio.run(run(args, admission))
+        print(f"{'on' if admission else 'off':<11}{result['requests']:>10}{result['goodput']:>11.0f}"
+              f"{result['timed_out']:>11}{result['rejected']:>8}{result['p50_ms']:>10.1f}"
+              f"{result['p99_ms']:>10.1f}{result['health_p99_ms']:>15.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
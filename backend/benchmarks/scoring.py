@@ -0,0 +1,130 @@
+"""
+Scoring equivalence check and microbenchmark.
+
+Checks that the compiled outcome/recommendation tables in ``app.scoring``
+and the vectorized engine in ``app.batch_scoring`` agree with the reference
+rule implementation on every threshold boundary and on random inputs, then
+times each path.
+
+Usage (from backend/):
+    python -m benchmarks.scoring
+    python -m benchmarks.scoring --random 200000 --repeat 5
+"""
+
+import argparse
+import random
+import sys
+import time
+from itertools import product
+
+from app import scoring
+from app.batch_scoring import score_batch
+
+# Values on, just below and just above every threshold used by the rules
+BOUNDARY_VALUES = {
+    "avg_income": (0.0, 14999.99, 15000.0, 15000.01, 29999.99, 30000.0, 30000.01, 1e6),
+    "income_variance": (0.0, 0.29, 0.2999999, 0.3, 0.3000001, 1.0),
+    "upi_txn_count": (0, 14, 15, 16, 29, 30, 31, 500),
+    "bill_payment_score": (0, 3, 4, 5, 6, 7, 8, 10),
+    "withdrawal_ratio": (0.0, 0.49, 0.5, 0.5000001, 0.69, 0.7, 0.7000001, 1.0),
+    "months_active": (0, 5, 6, 7, 11, 12, 13, 240),
+}
+
+FEATURES = tuple(BOUNDARY_VALUES)
+
+
+def random_inputs(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        (
+            rng.uniform(0, 60000),
+            rng.random(),
+            rng.randint(0, 100),
+            rng.randint(0, 10),
+            rng.random(),
+            rng.randint(0, 60),
+        )
+        for _ in range(count)
+    ]
+
+
+def check_equivalence(inputs) -> int:
+    """Compare every path with the reference rules; returns number of mismatches"""
+    mismatches = 0
+    batch = score_batch(*zip(*inputs))
+
+    for row, args in enumerate(inputs):
+        expected_score, expected_risk, expected_explanations = scoring._evaluate_rules(*args)
+        expected = (expected_score, expected_risk, tuple(expected_explanations))
+
+        compiled = scoring.calculate_digital_trust_score(*args)
+        vectorized = (int(batch.scores[row]), batch.risk_category(row), tuple(batch.explanations(row)))
+
+        _, income_variance, upi_txn_count, bill_payment_score, withdrawal_ratio, _ = args
+        recommendation_args = (
+            expected_score, expected_risk, income_variance,
+            upi_txn_count, bill_payment_score, withdrawal_ratio
+        )
+        expected_recommendations = tuple(scoring._build_recommendations(*recommendation_args))
+        recommendations = scoring.generate_recommendations(*recommendation_args)
+
+        for name, actual, wanted in (
+            ("compiled", compiled, expected),
+            ("vectorized", vectorized, expected),
+            ("recommendations", recommendations, expected_recommendations),
+        ):
+            if actual != wanted:
+                mismatches += 1
+                if mismatches <= 10:
+                    print(f"MISMATCH {name} for {dict(zip(FEATURES, args))}: {actual!r} != {wanted!r}")
+
+    return mismatches
+
+
+def time_per_call(func, inputs, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for args in inputs:
+            func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best / len(inputs)
+
+
+def time_batch(inputs, repeat: int) -> float:
+    columns = tuple(zip(*inputs))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        score_batch(*columns)
+        best = min(best, time.perf_counter() - start)
+    return best / len(inputs)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--random", type=int, default=100000, help="number of random inputs")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repetitions (best is reported)")
+    args = parser.parse_args(argv)
+
+    boundary = list(product(*BOUNDARY_VALUES.values()))
+    inputs = boundary + random_inputs(args.random)
+    print(f"Checking {len(boundary)} boundary and {args.random} random inputs...")
+    mismatches = check_equivalence(inputs)
+    if mismatches:
+        print(f"FAILED: {mismatches} mismatches")
+        return 1
+    print("OK: compiled tables and vectorized engine match the reference rules")
+
+    sample = inputs[:args.random] if args.random else inputs
+    reference = time_per_call(scoring._evaluate_rules, sample, args.repeat)
+    compiled = time_per_call(scoring.calculate_digital_trust_score, sample, args.repeat)
+    vectorized = time_batch(sample, args.repeat)
+    print(f"{'path':<12}{'ns/applicant':>14}{'speedup':>10}")
+    for name, seconds in (("reference", reference), ("compiled", compiled), ("vectorized", vectorized)):
+        print(f"{name:<12}{seconds * 1e9:>14.0f}{reference / seconds:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
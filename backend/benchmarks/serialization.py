@@ -0,0 +1,155 @@
+"""
+Response serialization microbenchmark.
+
+Serves the same user page and user detail payloads through two in-process
+FastAPI routes each:
+
+- ``pydantic``: builds ``UserResponse``/``CreditProfileResponse`` objects and
+  lets FastAPI re-validate them against ``response_model`` and encode them
+  with the stdlib JSON encoder (the previous route implementation)
+- ``fast``: maps the documents to dicts and encodes them with orjson via
+  ``MongoJSONResponse`` (the current route implementation)
+
+No database is involved; only building and serializing the response is
+timed. Response bodies are checked to decode to identical JSON.
+
+Requires the packages in requirements-dev.txt.
+
+Usage (from backend/):
+    python -m benchmarks.serialization --users 1000 --requests 200
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from bson import ObjectId
+from fastapi import FastAPI
+
+from app.explanations import explanation_fields, profile_explanations
+from app.schemas import CreditProfileResponse, UserDetailResponse, UserPageResponse, UserResponse
+from app.scoring import calculate_digital_trust_score
+from app.serialization import MongoJSONResponse, credit_profile_document, user_document
+
+
+def make_documents(count: int):
+    base = datetime(2024, 2, 16, 10, 30)
+    users = []
+    for i in range(count):
+        user_id = ObjectId()
+        score, risk_category, explanations = calculate_digital_trust_score(
+            20000 + i, (i % 10) / 10, i % 60, i % 11, (i % 7) / 7, i % 36
+        )
+        users.append({
+            "_id": user_id,
+            "name": f"Worker {i}",
+            "email": f"worker{i}@example.com",
+            "job_type": "Delivery Driver",
+            "months_active": i % 36,
+            "created_at": base + timedelta(seconds=i, milliseconds=i % 1000),
+            "latest_credit_profile": {
+                "_id": ObjectId(),
+                "user_id": str(user_id),
+                "avg_income": 20000.0 + i,
+                "income_variance": (i % 10) / 10,
+                "upi_txn_count": i % 60,
+                "bill_payment_score": i % 11,
+                "withdrawal_ratio": (i % 7) / 7,
+                "digital_trust_score": score,
+                "risk_category": risk_category,
+                **explanation_fields(explanations),
+                "created_at": base + timedelta(days=1, seconds=i),
+            },
+        })
+    return users
+
+
+def build_app(users) -> FastAPI:
+    app = FastAPI()
+    detail_user = users[0]
+
+    def user_response(user):
+        return UserResponse(
+            id=str(user["_id"]),
+            name=user["name"],
+            email=user["email"],
+            job_type=user["job_type"],
+            months_active=user["months_active"],
+            created_at=user["created_at"]
+        )
+
+    @app.get("/pydantic/users", response_model=UserPageResponse)
+    async def pydantic_users():
+        return UserPageResponse(users=[user_response(user) for user in users], next_cursor=None)
+
+    @app.get("/fast/users", response_model=UserPageResponse)
+    async def fast_users():
+        return MongoJSONResponse({"users": [user_document(user) for user in users], "next_cursor": None})
+
+    @app.get("/pydantic/detail", response_model=UserDetailResponse)
+    async def pydantic_detail():
+        profile = detail_user["latest_credit_profile"]
+        return UserDetailResponse(
+            user=user_response(detail_user),
+            latest_credit_profile=CreditProfileResponse(
+                id=str(profile["_id"]),
+                explanation=profile_explanations(profile),
+                **{key: value for key, value in profile.items() if key in CreditProfileResponse.model_fields}
+            )
+        )
+
+    @app.get("/fast/detail", response_model=UserDetailResponse)
+    async def fast_detail():
+        return MongoJSONResponse({
+            "user": user_document(detail_user),
+            "latest_credit_profile": credit_profile_document(detail_user["latest_credit_profile"])
+        })
+
+    return app
+
+
+async def time_route(client: httpx.AsyncClient, path: str, requests: int):
+    response = await client.get(path)
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get(path)
+        best = min(best, time.perf_counter() - start)
+    return best / requests, response
+
+
+async def run(args) -> int:
+    users = make_documents(args.users)
+    app = build_app(users)
+    transport = httpx.ASGITransport(app=app)
+    failed = False
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'payload':<22}{'path':<10}{'ms/request':>12}{'bytes':>10}{'speedup':>9}")
+        for payload, requests in ((f"/users ({args.users})", args.requests), ("/user/{id}", args.requests * 20)):
+            route = "users" if payload.startswith("/users") else "detail"
+            slow, slow_response = await time_route(client, f"/pydantic/{route}", requests)
+            fast, fast_response = await time_route(client, f"/fast/{route}", requests)
+            if slow_response.json() != fast_response.json():
+                print(f"MISMATCH: {payload} bodies differ between paths")
+                failed = True
+            print(f"{payload:<22}{'pydantic':<10}{slow * 1000:>12.3f}{len(slow_response.content):>10}{'':>9}")
+            print(f"{'':<22}{'fast':<10}{fast * 1000:>12.3f}{len(fast_response.content):>10}{slow / fast:>8.1f}x")
+
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000, help="users per list response")
+    parser.add_argument("--requests", type=int, default=50, help="list requests per timing round")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
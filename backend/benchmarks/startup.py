@@ -0,0 +1,99 @@
+"""
+Startup import-time and memory budget.
+
+Imports ``app.main`` (or another module) in fresh interpreter processes and
+reports the median import time and the peak RSS of the process. Exits with
+status 1 when either exceeds its budget, or when a module that must stay
+lazy (NumPy, scikit-learn, SciPy by default) was imported, so it can gate CI
+and container images.
+
+Only the import is measured: the lifespan (MongoDB connection, index
+creation, ML_PRELOAD) does not run.
+
+Usage (from backend/):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --max-import-ms 800 --max-rss-mb 80 --runs 7
+    python -m benchmarks.startup --module app.ml.model --forbid sklearn
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULE = "app.main"
+DEFAULT_FORBID = "numpy,sklearn,scipy"
+DEFAULT_MAX_IMPORT_MS = 1500.0
+DEFAULT_MAX_RSS_MB = 100.0
+
+# Runs in the child interpreter; prints one JSON line
+_PROBE = """
+import json, resource, sys, time
+baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "import_ms": elapsed * 1000,
+    "baseline_rss_mb": baseline_kb / 1024,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [name for name in {forbid!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure(module: str, forbid) -> dict:
+    """Import ``module`` in a fresh interpreter and return its measurements"""
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, forbid=list(forbid))],
+        capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default=DEFAULT_MODULE, help=f"module to import (default: {DEFAULT_MODULE})")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes to measure")
+    parser.add_argument("--max-import-ms", type=float, default=DEFAULT_MAX_IMPORT_MS,
+                        help=f"median import time budget (default: {DEFAULT_MAX_IMPORT_MS:g})")
+    parser.add_argument("--max-rss-mb", type=float, default=DEFAULT_MAX_RSS_MB,
+                        help=f"peak RSS budget (default: {DEFAULT_MAX_RSS_MB:g})")
+    parser.add_argument("--forbid", default=DEFAULT_FORBID,
+                        help=f"comma-separated modules that must not be imported (default: {DEFAULT_FORBID})")
+    args = parser.parse_args(argv)
+    forbid = [name for name in args.forbid.split(",") if name]
+
+    # The first run may compile bytecode and fill the page cache; don't count it
+    measure(args.module, forbid)
+    runs = [measure(args.module, forbid) for _ in range(args.runs)]
+
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    rss_mb = max(run["rss_mb"] for run in runs)
+    baseline_mb = min(run["baseline_rss_mb"] for run in runs)
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+
+    print(f"import {args.module}: median {import_ms:.0f} ms over {args.runs} runs "
+          f"(min {min(run['import_ms'] for run in runs):.0f}, max {max(run['import_ms'] for run in runs):.0f})")
+    print(f"peak RSS: {rss_mb:.1f} MB ({rss_mb - baseline_mb:.1f} MB above a bare interpreter)")
+
+    failures = []
+    if import_ms > args.max_import_ms:
+        failures.append(f"import time {import_ms:.0f} ms exceeds budget {args.max_import_ms:g} ms")
+    if rss_mb > args.max_rss_mb:
+        failures.append(f"peak RSS {rss_mb:.1f} MB exceeds budget {args.max_rss_mb:g} MB")
+    if loaded:
+        failures.append(f"eagerly imported: {', '.join(loaded)}")
+
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    if not failures:
+        print("within budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Statement ingestion throughput benchmark.
+
+Writes a synthetic transaction statement CSV of the requested size, then
+derives its score features two ways, each in a fresh interpreter so peak
+RSS is measured per run:
+
+- ``reference``: a direct port of the dashboard's ``parseCSV`` and
+  ``calculateMetrics`` (whole file in memory, list of row dicts, two-pass
+  variance)
+- ``streaming``: ``app.statements.parse_statement`` (one pass, fixed-size
+  blocks, merged Welford moments)
+
+Both must produce the same features. The reference is skipped above
+``--reference-max-mb`` because it holds the whole statement in memory.
+
+Usage (from backend/):
+    python -m benchmarks.statements --size-mb 300
+    python -m benchmarks.statements --size-mb 50 --keep statement.csv
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+DESCRIPTIONS = (
+    "UPI/{n}/grocery store", "UPI payment to {n}", "Electricity bill", "Water bill payment",
+    "Salary credit", "Delivery payout week {n}", "ATM withdrawal", "Mobile recharge", "Rent",
+)
+
+# Runs in the child interpreter; prints one JSON line
+_PROBE = """
+import json, resource, time
+mode, path = {mode!r}, {path!r}
+start = time.perf_counter()
+if mode == "streaming":
+    from dataclasses import asdict
+    from app.statements import parse_statement
+    with open(path, "rb") as statement:
+        features = asdict(parse_statement(statement))
+else:
+    from benchmarks.statements import reference_features
+    with open(path) as statement:
+        features = reference_features(statement.read())
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "features": features,
+}}))
+"""
+
+COMPARED = ("avg_income", "income_variance", "upi_txn_count", "bill_payment_score", "withdrawal_ratio")
+
+
+def write_statement(path: str, size_mb: float, seed: int = 7) -> int:
+    """Write a statement CSV of about ``size_mb`` megabytes; returns its row count"""
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    rows = 0
+    with open(path, "w") as statement:
+        statement.write("Date,Description,Amount,Balance\n")
+        written = 0
+        while written < target:
+            lines = []
+            for _ in range(10000):
+                income = rng.random() < 0.3
+                amount = round(rng.uniform(500, 9000), 2) if income else -round(rng.uniform(20, 3000), 2)
+                description = rng.choice(DESCRIPTIONS).format(n=rng.randint(1000, 99999))
+                lines.append(f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d},{description},{amount},"
+                             f"{round(rng.uniform(0, 50000), 2)}\n")
+            chunk = "".join(lines)
+            statement.write(chunk)
+            written += len(chunk)
+            rows += len(lines)
+    return rows
+
+
+def reference_features(text: str) -> dict:
+    """The dashboard's parseCSV + calculateMetrics, ported line for line"""
+    lines = [line for line in text.split("\n") if line.strip() != ""]
+    headers = [header.strip().lower() for header in lines[0].split(",")]
+    transactions = []
+    for line in lines[1:]:
+        values = line.split(",")
+        if len(values) == len(headers):
+            transactions.append({header: values[index].strip() for index, header in enumerate(headers)})
+
+    total_income = total_expense = 0.0
+    incomes = []
+    upi_count = bill_payments = 0
+    for transaction in transactions:
+        amount = float(transaction["amount"])
+        description = transaction.get("description", "").lower()
+        if amount > 0:
+            total_income += amount
+            incomes.append(amount)
+        else:
+            total_expense += abs(amount)
+        if "upi" in description:
+            upi_count += 1
+        if "bill" in description or "elect" in description or "water" in description:
+            bill_payments += 1
+
+    mean_income = sum(incomes) / (len(incomes) or 1)
+    variance = sum((income - mean_income) ** 2 for income in incomes) / (len(incomes) or 1)
+    normalized_variance = min(variance / 10000000, 1) if variance > 0 else 0
+    withdrawal_ratio = total_expense / total_income if total_income > 0 else 0
+    return {
+        "avg_income": float(int(total_income / 3 + 0.5)),
+        "income_variance": round(normalized_variance, 2),
+        "upi_txn_count": upi_count,
+        "bill_payment_score": min(bill_payments * 2, 10),
+        "withdrawal_ratio": min(round(withdrawal_ratio, 2), 1.0),
+    }
+
+
+def measure(mode: str, path: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(mode=mode, path=path)],
+        capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} run failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=300)
+    parser.add_argument("--reference-max-mb", type=float, default=400)
+    parser.add_argument("--keep", help="write the statement here and keep it")
+    args = parser.parse_args(argv)
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(), "statement.csv")
+    try:
+        rows = write_statement(path, args.size_mb)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"statement: {rows} rows, {size_mb:.0f} MB")
+
+        modes = ["streaming"]
+        if args.size_mb <= args.reference_max_mb:
+            modes.insert(0, "reference")
+        print(f"{'mode':<12}{'seconds':>10}{'MB/s':>10}{'rows/s':>14}{'peak RSS MB':>14}")
+        runs = {}
+        for mode in modes:
+            run = runs[mode] = measure(mode, path)
+            print(f"{mode:<12}{run['seconds']:>10.2f}{size_mb / run['seconds']:>10.1f}"
+                  f"{rows / run['seconds']:>14,.0f}{run['rss_mb']:>14.1f}")
+
+        print("features:", {name: runs["streaming"]["features"][name] for name in COMPARED})
+        if "reference" in runs:
+            mismatched = [
+                name for name in COMPARED if runs["reference"]["features"][name] != runs["streaming"]["features"][name]
+            ]
+            if mismatched:
+                print(f"MISMATCH in {', '.join(mismatched)}: {runs['reference']['features']}")
+                return 1
+            print("streaming features match the reference")
+    finally:
+        if not args.keep:
+            os.remove(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Training throughput and memory benchmark.
+
+Compares, each in a fresh interpreter so peak RSS is measured per run:
+
+- ``in-memory``: ``create_dummy_training_data(n)`` as one matrix, then
+  ``CreditRiskMLModel.train`` (the previous training path)
+- ``streaming``: ``app.ml.training.train_streaming`` over synthetic chunks,
+  so only one chunk (plus the reservoir, for forests) is held at a time
+
+Also times the synthetic labeller: the previous per-row Python loop
+against the vectorized ``label_risk``, checking both give the same labels.
+
+Usage (from backend/):
+    python -m benchmarks.training --rows 1000000 --model-type sgd
+    python -m benchmarks.training --rows 2000000 --model-type random_forest --max-samples 100000
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Runs in the child interpreter; prints one JSON line
+_PROBE = """
+import asyncio, json, resource, time
+from app.ml.model import CreditRiskMLModel, create_dummy_training_data
+from app.ml.training import synthetic_source, train_streaming
+model = CreditRiskMLModel({model_type!r})
+start = time.perf_counter()
+if {mode!r} == "in-memory":
+    X, y = create_dummy_training_data({rows})
+    model.train(X, y)
+else:
+    asyncio.run(train_streaming(model, synthetic_source({rows}, {chunk_size}), max_samples={max_samples}))
+elapsed = time.perf_counter() - start
+X, y = create_dummy_training_data(20000, seed=7)
+categories, _ = model.predict_risk_batch(X)
+labels = {{"High Risk": 0, "Medium Risk": 1, "Low Risk": 2}}
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "accuracy": sum(labels[c] == label for c, label in zip(categories, y.tolist())) / len(y),
+}}))
+"""
+
+
+def measure(mode: str, model_type: str, rows: int, chunk_size: int, max_samples: int) -> dict:
+    """Train in a fresh interpreter and return its measurements"""
+    code = _PROBE.format(mode=mode, model_type=model_type, rows=rows, chunk_size=chunk_size, max_samples=max_samples)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} training failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def label_loop(X: np.ndarray) -> np.ndarray:
+    """The previous per-row labelling loop of create_dummy_training_data"""
+    y = np.zeros(len(X), dtype=int)
+    for i in range(len(X)):
+        score = 0
+        if X[i, 1] < 0.3: score += 25
+        if X[i, 2] > 30: score += 20
+        if X[i, 3] > 7: score += 20
+        if X[i, 5] >= 12: score += 25
+        if X[i, 4] > 0.7: score -= 10
+
+        if score >= 70:
+            y[i] = 2
+        elif score >= 40:
+            y[i] = 1
+    return y
+
+
+def bench_labels(rows: int):
+    from app.ml.model import create_dummy_training_data, label_risk
+
+    X, _ = create_dummy_training_data(rows)
+    start = time.perf_counter()
+    expected = label_loop(X)
+    loop_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    labels = label_risk(X)
+    vector_seconds = time.perf_counter() - start
+    if not np.array_equal(expected, labels):
+        raise AssertionError("Vectorized labels differ from the loop")
+
+    print(f"labelling {rows} rows: loop {loop_seconds * 1000:.0f} ms, vectorized {vector_seconds * 1000:.1f} ms "
+          f"({loop_seconds / vector_seconds:.0f}x)")
+
+
+def main(argv=None) -> int:
+    from app.ml.model import MODEL_TYPES
+    from app.ml.training import DEFAULT_CHUNK_SIZE, DEFAULT_MAX_SAMPLES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--model-type", choices=MODEL_TYPES, default="sgd")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--max-samples", type=int, default=DEFAULT_MAX_SAMPLES)
+    parser.add_argument("--label-rows", type=int, default=200000, help="rows for the labeller comparison")
+    args = parser.parse_args(argv)
+
+    bench_labels(args.label_rows)
+
+    print(f"\ntraining {args.model_type} on {args.rows} synthetic rows")
+    print(f"{'mode':<12}{'seconds':>10}{'rows/s':>14}{'peak RSS MB':>14}{'accuracy':>10}")
+    for mode in ("in-memory", "streaming"):
+        run = measure(mode, args.model_type, args.rows, args.chunk_size, args.max_samples)
+        print(f"{mode:<12}{run['seconds']:>10.2f}{args.rows / run['seconds']:>14,.0f}"
+              f"{run['rss_mb']:>14.1f}{run['accuracy']:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,14 @@ async function apiPost(endpoint, data) {
   return res.json();
 }
 
+async function apiUpload(endpoint, formData) {
+  const res = await fetch(`${BASE_URL}${endpoint}`, {
+    method: "POST",
+    body: formData
+  });
+  return res.json();
+}
+
 async function apiGet(endpoint) {
   const res = await fetch(`${BASE_URL}${endpoint}`);
   return res.json();